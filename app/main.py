@@ -1,15 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Query
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional, List
-from app.database import get_db
+from app.database import get_db, get_async_db, SessionLocal
 from app.models.user import User
 from app.models.research_group import ResearchGroup, UserResearchGroup
 from app.models.literature import Literature
 from app.auth import verify_password  # 导入auth.py中的验证函数
-from app.utils.auth_helper import require_group_membership, verify_group_membership
-from app.utils.file_handler import validate_upload_file, generate_file_path, save_uploaded_file, get_file_info
-from app.utils.text_extractor import extract_metadata_from_file
+from app.utils.auth_helper import (
+    require_group_membership, verify_group_membership, require_group_membership_async, verify_group_membership_async
+)
+from app.config import config
+from app.utils.file_handler import validate_file_type, save_upload_deduplicated
+from app.utils.ingestion import ingestion_manager, submit_ingestion_job
+from app.utils.segmenter import SegmenterCompatibilityError, segmenter, warm_up_segmenter
+from app.utils.text_extractor import shutdown_pdf_page_pool
+from app.utils.group_idf import migrate_legacy_group_index
+from app.utils.text_normalization import normalization_manager
+from app.utils.pagination import paginate_literature, split_page
+from app.utils.auth_cache import auth_cache, invalidate_group_membership
 from app.utils.error_handler import (
     log_error, log_success, handle_file_upload_error, handle_permission_error,
     validate_file_upload, safe_file_operation, FileUploadError, PermissionError, ValidationError
@@ -17,17 +28,19 @@ from app.utils.error_handler import (
 from app.schemas import FileUploadResponse, LiteratureListResponse, LiteratureListItem
 from jose import jwt
 from datetime import datetime, timedelta
+import asyncio
 import logging
 from fastapi.responses import FileResponse
-from app.utils.auth_helper import verify_literature_access, get_literature_with_permission, verify_file_exists, get_content_type
-from .database import engine, Base
+from app.utils.auth_helper import verify_literature_access, get_literature_with_permission_async, verify_file_exists, get_content_type
+from .database import engine
+from app.utils.schema_migrations import upgrade_database
 from .routers import users, research_groups, literature, text_chunks, text_analysis
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
-# 创建所有数据库表
-Base.metadata.create_all(bind=engine)
+# 创建或升级数据库表结构（表、字段和索引）
+upgrade_database(engine)
 
 app = FastAPI(
     title="Research Literature Management System",
@@ -47,6 +60,44 @@ SECRET_KEY = "your-secret-key"  # 替换为随机字符串，例如 "mysecretkey
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+@app.on_event("startup")
+def migrate_group_index():
+    """启动时将旧版本缓存目录下的研究组词频索引迁移到数据目录（在后台处理任务开始写入之前）"""
+    try:
+        migrate_legacy_group_index()
+    except Exception as e:
+        log_error("group_idf_migrate", e)
+
+@app.on_event("startup")
+def start_ingestion_workers():
+    """启动时重新提交未完成的文献处理任务"""
+    db = SessionLocal()
+    try:
+        ingestion_manager.recover_unfinished(db)
+    except Exception as e:
+        log_error("ingestion_recover", e)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def load_segmenter():
+    """启动时预加载分词词典，避免首个请求承担词典加载时间"""
+    try:
+        warm_up_segmenter()
+    except SegmenterCompatibilityError:
+        # jieba版本不兼容时关键词提取和token计数都会出错，直接终止启动
+        raise
+    except Exception as e:
+        log_error("segmenter_warm_up", e)
+
+@app.on_event("shutdown")
+def stop_ingestion_workers():
+    """关闭文献处理进程池、并行分词进程池、PDF按页提取进程池和文本标准化任务"""
+    ingestion_manager.shutdown(wait=False)
+    segmenter.shutdown()
+    shutdown_pdf_page_pool()
+    normalization_manager.shutdown()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Research Literature Management System API"}
@@ -64,9 +115,16 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(OAuth2P
             raise HTTPException(status_code=401, detail="无效的令牌")
     except Exception:
         raise HTTPException(status_code=401, detail="无效的令牌")
+    
+    # 已认证用户缓存在进程内，命中时不查询数据库
+    user = auth_cache.get_principal(username, db)
+    if user is not None:
+        return user
+    
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         raise HTTPException(status_code=401, detail="用户不存在")
+    auth_cache.set_principal(user)
     return user
 
 def create_access_token(data: dict, expires_delta: timedelta):
@@ -107,6 +165,7 @@ def create_group(name: str, institution: str, description: str, research_area: s
         membership = UserResearchGroup(user_id=current_user.id, group_id=group.id)
         db.add(membership)
         db.commit()
+        invalidate_group_membership(current_user.id, group.id)
         
         log_success("group_create", current_user.id, {
             "group_id": group.id,
@@ -142,6 +201,7 @@ def join_group(group_id: str, invitation_code: str, db: Session = Depends(get_db
         membership = UserResearchGroup(user_id=current_user.id, group_id=group_id)
         db.add(membership)
         db.commit()
+        invalidate_group_membership(current_user.id, group_id)
         
         log_success("group_join", current_user.id, {
             "group_id": group_id,
@@ -163,11 +223,12 @@ async def upload_literature(
     file: UploadFile = File(...),
     group_id: str = Form(...),
     title: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     上传文献到指定研究组 - 增强版错误处理
+    数据库查询使用异步会话，文件写入在线程池中执行，不阻塞事件循环
     """
     operation_info = {
         "filename": file.filename,
@@ -181,57 +242,58 @@ async def upload_literature(
         
         # 2. 验证用户是否为指定研究组成员
         try:
-            require_group_membership(current_user.id, group_id, db)
+            await require_group_membership_async(current_user.id, group_id, db)
         except HTTPException as e:
             raise PermissionError(e.detail)
         
-        # 3. 验证文件
-        is_valid, error_msg = validate_upload_file(file)
-        if not is_valid:
-            raise ValidationError(error_msg)
-        
-        # 4. 获取文件信息
-        file_info = get_file_info(file)
-        operation_info["file_size"] = file_info["file_size"]
-        
-        # 5. 生成存储路径
-        full_path, relative_path = generate_file_path(group_id, file.filename)
+        # 3. 验证文件类型（大小在写入过程中校验，无需预先seek到文件末尾）
+        if not validate_file_type(file.filename):
+            allowed_types = ", ".join(config.ALLOWED_FILE_TYPES)
+            raise ValidationError(f"不支持的文件类型。允许的类型: {allowed_types}")
         
-        # 6. 安全保存文件到磁盘
-        def save_file():
-            return save_uploaded_file(file, full_path)
+        # 4. 单遍写入：边写边计算大小、SHA-256摘要并嗅探文件类型，按内容去重存储
+        file_info = await asyncio.to_thread(safe_file_operation, "file_save", save_upload_deduplicated, file, group_id)
+        full_path = file_info["file_path"]
+        file_size = file_info["file_size"]
+        operation_info["file_size"] = file_size
         
-        save_success = await safe_file_operation("file_save", save_file)
-        if not save_success:
-            raise FileUploadError("文件保存失败")
-        
-        # 7. 提取元数据
+        # 5. 确定标题：本研究组中已有相同内容的文献时直接复用其标题（不读取其他研究组或已删除文献的元数据）；
+        #    否则先使用文件名，后台处理完成后再用从正文提取的标题替换
         final_title = title if title else file.filename
-        try:
-            metadata = extract_metadata_from_file(full_path, file.filename)
-            if not title and metadata.get("title"):
-                final_title = metadata.get("title")
-        except Exception as e:
-            logger.warning(f"元数据提取失败，使用默认标题: {e}")
-        
-        # 8. 创建数据库记录
+        update_title = not title
+        if not title and file_info["deduplicated"]:
+            duplicate = await db.scalar(select(Literature).where(
+                Literature.file_hash == file_info["sha256"],
+                Literature.research_group_id == group_id,
+                Literature.status == 'active'
+            ).order_by(Literature.upload_time).limit(1))
+            if duplicate:
+                final_title = duplicate.title
+                update_title = False
+        
+        # 6. 创建数据库记录
         try:
             literature = Literature(
                 title=final_title,
                 filename=file.filename,
-                file_path=relative_path,
-                file_size=file_info["file_size"],
+                file_path=full_path,
+                file_size=file_size,
                 file_type=file_info["file_type"],
                 uploaded_by=current_user.id,
-                research_group_id=group_id
+                research_group_id=group_id,
+                file_hash=file_info["sha256"],
+                extract_title=update_title
             )
+            # 由本进程认领处理任务，其他进程启动时的恢复流程不会重复提交
+            literature.extraction_owner = ingestion_manager.owner_id
+            literature.extraction_heartbeat_at = datetime.utcnow()
             
             db.add(literature)
-            db.commit()
-            db.refresh(literature)
+            await db.commit()
+            await db.refresh(literature)
             
         except Exception as e:
-            # 如果数据库操作失败，尝试删除已保存的文件
+            # 如果数据库操作失败，尝试删除研究组目录中的链接（blob保留供后续复用）
             try:
                 import os
                 if os.path.exists(full_path):
@@ -240,22 +302,29 @@ async def upload_literature(
                 pass
             raise e
         
-        # 9. 记录成功日志
+        # 7. 提交后台处理任务（文本提取、分块、入库），不阻塞当前请求；
+        #    是否替换标题保存在 extract_title 字段中，服务重启后恢复的任务同样会提取标题
+        submit_ingestion_job(literature.id)
+        
+        # 8. 记录成功日志
         log_success("literature_upload", current_user.id, {
             "literature_id": literature.id,
             "title": final_title,
             "filename": file.filename,
-            "file_size": file_info["file_size"],
+            "file_size": file_size,
+            "file_hash": file_info["sha256"],
+            "deduplicated": file_info["deduplicated"],
             "group_id": group_id
         })
         
-        # 10. 返回上传结果
+        # 9. 返回上传结果
         return FileUploadResponse(
             message="文献上传成功",
             literature_id=literature.id,
             title=final_title,
             filename=file.filename,
-            file_size=file_info["file_size"]
+            file_size=file_size,
+            text_extraction_status=literature.text_extraction_status
         )
         
     except (ValidationError, PermissionError, FileUploadError) as e:
@@ -274,11 +343,14 @@ async def upload_literature(
 @app.get("/literature/public/{group_id}", response_model=LiteratureListResponse)
 def get_group_literature(
     group_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页响应中的 next_cursor"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     获取指定研究组的公共文献列表 - 增强版错误处理
+    按上传时间倒序，使用游标分页（键为 (upload_time, id)）；文献总数只在第一页统计，后续页面的查询代价与研究组大小无关
     """
     try:
         # 1. 验证用户是否为指定研究组成员
@@ -287,15 +359,25 @@ def get_group_literature(
         except HTTPException as e:
             raise handle_permission_error(Exception(e.detail), "literature_list", current_user.id)
         
-        # 2. 查询该研究组的所有活跃文献
-        literature_query = db.query(Literature, User).join(
-            User, Literature.uploaded_by == User.id
-        ).filter(
+        # 2. 查询该研究组的活跃文献（一页）
+        group_filter = (
             Literature.research_group_id == group_id,
             Literature.status == 'active'
-        ).order_by(Literature.upload_time.desc())
+        )
+        total = None if cursor else db.query(Literature.id).filter(*group_filter).count()
         
-        literature_records = literature_query.all()
+        literature_query = db.query(Literature, User).join(
+            User, Literature.uploaded_by == User.id
+        ).filter(*group_filter)
+        
+        # 按 (upload_time, id) 倒序分页，从游标位置之后继续读取
+        try:
+            literature_query = paginate_literature(literature_query, limit, cursor)
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=e.message)
+        literature_records, next_cursor = split_page(
+            literature_query.all(), limit, lambda row: {"upload_time": row[0].upload_time, "id": row[0].id}
+        )
         
         # 3. 构建响应数据
         literature_list = []
@@ -316,8 +398,9 @@ def get_group_literature(
         })
         
         return LiteratureListResponse(
-            total=len(literature_list),
-            literature=literature_list
+            total=total,
+            literature=literature_list,
+            next_cursor=next_cursor
         )
         
     except HTTPException:
@@ -368,13 +451,13 @@ async def delete_literature(
     literature_id: str,
     reason: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """软删除文献"""
     try:
-        from app.utils.literature_manager import soft_delete_literature
+        from app.utils.literature_manager import soft_delete_literature_async
         
-        success = soft_delete_literature(literature_id, current_user.id, db, reason)
+        success = await soft_delete_literature_async(literature_id, current_user.id, db, reason)
         
         if success:
             logger.info(f"文献删除成功: {literature_id} by {current_user.username}")
@@ -391,13 +474,13 @@ async def delete_literature(
 async def restore_literature(
     literature_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """恢复已删除的文献"""
     try:
-        from app.utils.literature_manager import restore_literature
+        from app.utils.literature_manager import restore_literature_async
         
-        success = restore_literature(literature_id, current_user.id, db)
+        success = await restore_literature_async(literature_id, current_user.id, db)
         
         if success:
             logger.info(f"文献恢复成功: {literature_id} by {current_user.username}")
@@ -414,13 +497,13 @@ async def restore_literature(
 async def get_deleted_literature(
     group_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取研究组的已删除文献列表"""
     try:
-        from app.utils.literature_manager import get_deleted_literature
+        from app.utils.literature_manager import get_deleted_literature_async
         
-        deleted_list = get_deleted_literature(group_id, current_user.id, db)
+        deleted_list = await get_deleted_literature_async(group_id, current_user.id, db)
         
         logger.info(f"获取删除文献列表: group={group_id}, count={len(deleted_list)}")
         return {
@@ -438,18 +521,16 @@ async def get_deleted_literature(
 async def get_literature_statistics(
     group_id: str,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """获取研究组文献统计信息"""
     try:
-        from app.utils.literature_manager import get_literature_stats
-        from app.utils.auth_helper import verify_group_membership
-        
+        from app.utils.literature_manager import get_literature_stats_async
         # 验证用户是否为研究组成员
-        if not verify_group_membership(current_user.id, group_id, db):
+        if not await verify_group_membership_async(current_user.id, group_id, db):
             raise HTTPException(status_code=403, detail="无权查看该研究组统计信息")
         
-        stats = get_literature_stats(group_id, db)
+        stats = await get_literature_stats_async(group_id, db)
         
         logger.info(f"获取文献统计: group={group_id}, active={stats['active_count']}")
         return {
@@ -475,8 +556,9 @@ async def get_storage_statistics(
         # 简单的管理员验证（实际项目中应该有更严格的权限控制）
         # 这里暂时允许所有登录用户查看
         
-        storage_stats = get_storage_stats()
-        storage_health = validate_storage()
+        # 遍历上传目录（含 _blobs/）的文件系统I/O在线程池中执行，不阻塞事件循环
+        storage_stats = await asyncio.to_thread(get_storage_stats)
+        storage_health = await asyncio.to_thread(validate_storage)
         
         logger.info(f"获取存储统计: groups={storage_stats['total_groups']}, files={storage_stats['total_files']}")
         return {
@@ -497,7 +579,7 @@ async def cleanup_storage(
     try:
         from app.utils.storage_manager import cleanup_storage
         
-        cleaned_dirs = cleanup_storage()
+        cleaned_dirs = await asyncio.to_thread(cleanup_storage)
         
         logger.info(f"存储清理完成: 清理了 {len(cleaned_dirs)} 个空目录")
         return {
@@ -513,7 +595,7 @@ async def cleanup_storage(
 @app.get("/literature/view/file/{literature_id}")
 async def view_literature_file(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -522,7 +604,7 @@ async def view_literature_file(
     """
     try:
         # 1. 获取文献信息并验证权限
-        literature = get_literature_with_permission(literature_id, current_user.id, db)
+        literature = await get_literature_with_permission_async(literature_id, current_user.id, db)
         
         # 2. 验证文件是否存在
         if not verify_file_exists(literature.file_path):
@@ -563,7 +645,7 @@ async def view_literature_file(
 @app.get("/literature/detail/{literature_id}")
 async def get_literature_detail(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -572,14 +654,14 @@ async def get_literature_detail(
     """
     try:
         # 1. 获取文献信息并验证权限
-        literature = get_literature_with_permission(literature_id, current_user.id, db)
+        literature = await get_literature_with_permission_async(literature_id, current_user.id, db)
         
         # 2. 获取上传用户信息
-        uploader = db.query(User).filter(User.id == literature.uploaded_by).first()
+        uploader = await db.get(User, literature.uploaded_by)
         uploader_name = uploader.username if uploader else "未知用户"
         
         # 3. 获取研究组信息
-        group = db.query(ResearchGroup).filter(ResearchGroup.id == literature.research_group_id).first()
+        group = await db.get(ResearchGroup, literature.research_group_id)
         group_name = group.name if group else "未知研究组"
         
         # 4. 检查文件是否存在
@@ -598,6 +680,8 @@ async def get_literature_detail(
             "research_group_id": literature.research_group_id,
             "group_name": group_name,
             "status": literature.status,
+            "text_extraction_status": literature.text_extraction_status,
+            "text_extraction_error": literature.text_extraction_error,
             "file_exists": file_exists,
             "can_view": file_exists and literature.status == 'active',
             "content_type": get_content_type(literature.file_path) if file_exists else None
@@ -621,7 +705,7 @@ async def get_literature_detail(
 @app.get("/literature/download/{literature_id}")
 async def download_literature_file(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -630,7 +714,7 @@ async def download_literature_file(
     """
     try:
         # 1. 获取文献信息并验证权限
-        literature = get_literature_with_permission(literature_id, current_user.id, db)
+        literature = await get_literature_with_permission_async(literature_id, current_user.id, db)
         
         # 2. 验证文件是否存在
         if not verify_file_exists(literature.file_path):
@@ -0,0 +1,31 @@
+"""
+文本块汇总模型
+每篇文献一行，保存文本块数量、字符数、token数和各嵌入状态的文本块数量，
+文本块统计接口只需读取这一行
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey
+from datetime import datetime
+
+from .research_group import Base
+
+class ChunkSummary(Base):
+    __tablename__ = 'chunk_summary'
+
+    literature_id = Column(String, ForeignKey('literature.id'), primary_key=True)
+
+    # 文本块汇总
+    total_chunks = Column(Integer, default=0, nullable=False)  # 文本块数量
+    total_chars = Column(Integer, default=0, nullable=False)  # 字符总数
+    total_tokens = Column(Integer, default=0, nullable=False)  # 估算的token总数
+
+    # 各嵌入状态的文本块数量
+    embedding_pending = Column(Integer, default=0, nullable=False)
+    embedding_processing = Column(Integer, default=0, nullable=False)
+    embedding_completed = Column(Integer, default=0, nullable=False)
+    embedding_failed = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # 最后刷新时间
+
+    def __repr__(self):
+        return f"<ChunkSummary(literature_id='{self.literature_id}', chunks={self.total_chunks})>"
@@ -1,5 +1,5 @@
 # 导入需要的库
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text
+from sqlalchemy import Boolean, Column, String, Integer, DateTime, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
@@ -10,6 +10,10 @@ from .research_group import Base
 # 定义Literature模型
 class Literature(Base):
     __tablename__ = 'literature'
+    __table_args__ = (
+        # 研究组文献列表按 (upload_time, id) 做游标分页
+        Index('ix_literature_group_status_upload', 'research_group_id', 'status', 'upload_time', 'id'),
+    )
     
     # 定义列（字段）
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -18,8 +22,9 @@ class Literature(Base):
     file_path = Column(String, nullable=False)  # 存储路径
     file_size = Column(Integer, nullable=False)  # 文件大小（字节）
     file_type = Column(String, nullable=False)  # 文件类型：pdf/docx/html
+    file_hash = Column(String(64), nullable=True, index=True)  # 文件内容SHA-256摘要，用于去重
     upload_time = Column(DateTime, default=datetime.utcnow, nullable=False)  # 上传时间
-    uploaded_by = Column(String, ForeignKey('users.id'), nullable=False)  # 上传用户ID
+    uploaded_by = Column(String, ForeignKey('users.id'), nullable=False, index=True)  # 上传用户ID
     research_group_id = Column(String, ForeignKey('research_groups.id'), nullable=False)  # 所属研究组ID
     status = Column(String, default='active', nullable=False)  # 状态：active/deleted
     
@@ -33,6 +38,9 @@ class Literature(Base):
     # 文本处理状态
     text_extraction_status = Column(String, default='pending', nullable=False)  # pending/processing/completed/failed
     text_extraction_error = Column(Text, nullable=True)  # 如果提取失败，记录错误信息
+    extract_title = Column(Boolean, default=False, nullable=False)  # 处理完成时是否用从正文提取的标题替换当前标题
+    extraction_owner = Column(String, nullable=True)  # 认领处理任务的进程标识，未认领或处理结束时为空
+    extraction_heartbeat_at = Column(DateTime, nullable=True)  # 认领进程最近一次确认仍在处理的时间
     
     # 定义关系 - 明确指定外键以避免歧义
     uploader = relationship("User", foreign_keys=[uploaded_by], back_populates="uploaded_literature")
@@ -41,13 +49,15 @@ class Literature(Base):
     research_group = relationship("ResearchGroup", back_populates="literature")
     text_chunks = relationship("TextChunk", back_populates="literature", cascade="all, delete-orphan")
     
-    def __init__(self, title, filename, file_path, file_size, file_type, uploaded_by, research_group_id):
+    def __init__(self, title, filename, file_path, file_size, file_type, uploaded_by, research_group_id, file_hash=None,
+                 extract_title=False):
         self.id = str(uuid.uuid4())
         self.title = title
         self.filename = filename
         self.file_path = file_path
         self.file_size = file_size
         self.file_type = file_type
+        self.file_hash = file_hash
         self.uploaded_by = uploaded_by
         self.research_group_id = research_group_id
         self.upload_time = datetime.utcnow()
@@ -61,6 +71,9 @@ class Literature(Base):
         # 文本处理状态初始化
         self.text_extraction_status = 'pending'
         self.text_extraction_error = None
+        self.extract_title = extract_title
+        self.extraction_owner = None
+        self.extraction_heartbeat_at = None
     
     def __repr__(self):
         return f"<Literature(title='{self.title}', filename='{self.filename}', type='{self.file_type}', status='{self.status}')>"
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+文献分析结果模型
+保存文献文本的预计算分析结果（统计信息、关键词、质量问题），避免每次请求重新计算；
+文献级结果由各文本块的可合并分段结果合并得到，修改单个文本块时只需重新分析该文本块
+"""
+
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, JSON
+from datetime import datetime
+
+from .research_group import Base
+
+class LiteratureAnalysis(Base):
+    __tablename__ = 'literature_analysis'
+
+    literature_id = Column(String, ForeignKey('literature.id'), primary_key=True)
+    analyzer_version = Column(Integer, nullable=False)  # 计算时的分析逻辑版本号，与当前版本不同时视为过期
+
+    # 分析结果
+    statistics = Column(JSON, nullable=False)  # 文本统计信息
+    keywords = Column(JSON, nullable=False)  # 关键词列表：[{"word": ..., "weight": ...}]
+    quality_issues = Column(JSON, nullable=False)  # 全文质量问题列表
+    chunk_count = Column(Integer, nullable=False)  # 参与分析的文本块数量
+
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # 计算时间
+
+    def __init__(self, literature_id, analyzer_version, statistics, keywords, quality_issues, chunk_count):
+        self.literature_id = literature_id
+        self.analyzer_version = analyzer_version
+        self.statistics = statistics
+        self.keywords = keywords
+        self.quality_issues = quality_issues
+        self.chunk_count = chunk_count
+        self.computed_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f"<LiteratureAnalysis(literature_id='{self.literature_id}', version={self.analyzer_version})>"
+
+class ChunkAnalysis(Base):
+    __tablename__ = 'chunk_analysis'
+
+    chunk_id = Column(String, ForeignKey('text_chunks.id'), primary_key=True)
+    literature_id = Column(String, ForeignKey('literature.id'), nullable=False, index=True)
+    analyzer_version = Column(Integer, nullable=False)  # 计算时的分析逻辑版本号
+
+    # 可合并的分段结果
+    counters = Column(JSON, nullable=False)  # 字符类别、句子、行、段落等计数
+    lines = Column(JSON, nullable=False)  # 较长非空行的摘要 -> 出现次数（用于检测重复行）
+    terms = Column(JSON, nullable=False)  # 候选关键词 -> 出现次数
+
+    computed_at = Column(DateTime, default=datetime.utcnow, nullable=False)  # 计算时间
+
+    def __init__(self, chunk_id, literature_id, analyzer_version, counters, lines, terms):
+        self.chunk_id = chunk_id
+        self.literature_id = literature_id
+        self.analyzer_version = analyzer_version
+        self.counters = counters
+        self.lines = lines
+        self.terms = terms
+        self.computed_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f"<ChunkAnalysis(chunk_id='{self.chunk_id}', version={self.analyzer_version})>"
@@ -44,5 +44,6 @@ class ResearchGroup(Base):
 class UserResearchGroup(Base):
     __tablename__ = 'user_research_groups'
     
+    # 按user_id查询使用主键 (user_id, group_id)，按研究组查询成员使用group_id索引
     user_id = Column(String, ForeignKey('users.id'), primary_key=True)
-    group_id = Column(String, ForeignKey('research_groups.id'), primary_key=True)
\ No newline at end of file
+    group_id = Column(String, ForeignKey('research_groups.id'), primary_key=True, index=True)
\ No newline at end of file
@@ -3,15 +3,24 @@
 用于存储从文献中提取和分块的文本内容
 """
 
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, JSON
+from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Text, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 from .research_group import Base
 
+# 后台处理中已写入、尚未替换旧文本块的新文本块类型；读取文本块时需排除
+STAGING_CHUNK_TYPE = "staging"
+
 class TextChunk(Base):
     __tablename__ = 'text_chunks'
+    __table_args__ = (
+        # 按文献读取文本块（按chunk_index排序、游标分页）
+        Index('ix_text_chunks_literature_chunk_index', 'literature_id', 'chunk_index'),
+        # 按嵌入状态查找文本块（待嵌入队列，或在某篇文献内筛选）
+        Index('ix_text_chunks_embedding_status', 'embedding_status', 'literature_id'),
+    )
     
     # 基本信息
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
@@ -3,15 +3,27 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+import asyncio
 
-from ..database import get_db
-from ..models.text_chunk import TextChunk
+from ..database import get_async_db, run_with_session
+from ..models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
 from ..models.literature import Literature
-from ..utils.text_analyzer import TextAnalyzer
+from ..utils.text_analyzer import text_analyzer
+from ..utils.group_idf import extract_group_keywords
+from ..utils.literature_analysis import get_literature_analysis
+from ..utils.text_normalization import (
+    normalize_literature_chunks, submit_normalization_job, get_normalization_job
+)
+from ..config import config
 from ..utils.auth import get_current_user
+from ..utils.auth_helper import verify_literature_access_async
 from ..models.user import User
 
 router = APIRouter(
@@ -19,83 +31,94 @@ router = APIRouter(
     tags=["text-analysis"]
 )
 
-# 创建文本分析器实例
-text_analyzer = TextAnalyzer()
+def _load_analysis(literature_id: str, db: Session) -> Optional[Dict[str, Any]]:
+    """读取预计算的分析结果（缺失或版本过期时重新计算），在线程池中执行，返回的字典不依赖会话"""
+    analysis = get_literature_analysis(literature_id, db)
+    if analysis is None:
+        return None
+    return {
+        "statistics": analysis.statistics,
+        "keywords": analysis.keywords,
+        "quality_issues": analysis.quality_issues,
+        "computed_at": analysis.computed_at
+    }
+
+def _detect_chunk_issues(rows: List[Any]) -> List[Dict[str, Any]]:
+    """逐块检查文本质量（CPU密集，在线程池中执行）"""
+    chunk_issues = []
+    for chunk_index, chunk_type, text in rows:
+        issues = text_analyzer.detect_text_quality_issues(text)
+        if issues:
+            chunk_issues.append({
+                "chunk_index": chunk_index,
+                "chunk_type": chunk_type,
+                "issues": issues
+            })
+    return chunk_issues
 
 @router.get("/{literature_id}/stats")
 async def analyze_literature_text(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取文献文本的统计分析"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
-    # 获取所有文本块
-    chunks = db.query(TextChunk).filter(
-        TextChunk.literature_id == literature_id
-    ).order_by(TextChunk.chunk_index).all()
+    # 读取预计算的分析结果（缺失或版本过期时重新计算，分词较慢，在线程池中执行）
+    analysis = await run_with_session(_load_analysis, literature_id)
     
-    if not chunks:
+    if analysis is None:
         raise HTTPException(status_code=404, detail="No text chunks found")
     
-    # 合并所有文本块
-    full_text = "\n\n".join(chunk.text for chunk in chunks)
-    
-    # 获取文本统计信息
-    stats = text_analyzer.get_text_stats(full_text)
-    
-    # 提取关键词
-    keywords = text_analyzer.extract_keywords(full_text, top_k=10)
-    
-    # 检测质量问题
-    quality_issues = text_analyzer.detect_text_quality_issues(full_text)
+    # 关键词优先使用研究组IDF索引（读取磁盘上的词频向量）
+    keywords = await asyncio.to_thread(extract_group_keywords, literature.research_group_id, literature_id, top_k=10)
+    if keywords is None:
+        keywords = [(item["word"], item["weight"]) for item in analysis["keywords"][:10]]
     
     return {
         "literature_id": literature_id,
-        "statistics": stats,
+        "statistics": analysis["statistics"],
         "keywords": [{"word": word, "weight": weight} for word, weight in keywords],
-        "quality_issues": quality_issues,
-        "analyzed_at": datetime.utcnow()
+        "quality_issues": analysis["quality_issues"],
+        "analyzed_at": analysis["computed_at"]
     }
 
 @router.get("/{literature_id}/keywords")
 async def get_literature_keywords(
     literature_id: str,
     top_k: int = Query(10, ge=1, le=50),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取文献的关键词"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
-    # 获取所有文本块
-    chunks = db.query(TextChunk).filter(
-        TextChunk.literature_id == literature_id
-    ).order_by(TextChunk.chunk_index).all()
+    # 优先使用研究组IDF索引：读取文献的稀疏词频向量，无需加载文本块
+    keywords = await asyncio.to_thread(extract_group_keywords, literature.research_group_id, literature_id, top_k=top_k)
     
-    if not chunks:
-        raise HTTPException(status_code=404, detail="No text chunks found")
-    
-    # 合并所有文本块
-    full_text = "\n\n".join(chunk.text for chunk in chunks)
-    
-    # 提取关键词
-    keywords = text_analyzer.extract_keywords(full_text, top_k=top_k)
+    if keywords is None:
+        # 读取预计算的分析结果（缺失或版本过期时重新计算）
+        analysis = await run_with_session(_load_analysis, literature_id)
+        
+        if analysis is None:
+            raise HTTPException(status_code=404, detail="No text chunks found")
+        
+        keywords = [(item["word"], item["weight"]) for item in analysis["keywords"][:top_k]]
     
     return {
         "literature_id": literature_id,
@@ -107,37 +130,30 @@ async def get_literature_keywords(
 @router.get("/{literature_id}/quality-check")
 async def check_text_quality(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """检查文献文本质量"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
-    # 获取所有文本块
-    chunks = db.query(TextChunk).filter(
-        TextChunk.literature_id == literature_id
-    ).order_by(TextChunk.chunk_index).all()
+    # 获取所有文本块（只读取检查需要的列）
+    chunks = (await db.execute(select(TextChunk.chunk_index, TextChunk.chunk_type, TextChunk.text).where(
+        TextChunk.literature_id == literature_id,
+        TextChunk.chunk_type != STAGING_CHUNK_TYPE
+    ).order_by(TextChunk.chunk_index))).all()
     
     if not chunks:
         raise HTTPException(status_code=404, detail="No text chunks found")
     
     # 分别检查每个文本块
-    chunk_issues = []
-    for chunk in chunks:
-        issues = text_analyzer.detect_text_quality_issues(chunk.text)
-        if issues:
-            chunk_issues.append({
-                "chunk_index": chunk.chunk_index,
-                "chunk_type": chunk.chunk_type,
-                "issues": issues
-            })
+    chunk_issues = await asyncio.to_thread(_detect_chunk_issues, chunks)
     
     return {
         "literature_id": literature_id,
@@ -150,42 +166,58 @@ async def check_text_quality(
 @router.post("/{literature_id}/normalize")
 async def normalize_literature_text(
     literature_id: str,
-    db: Session = Depends(get_db),
+    background: bool = Query(False, description="是否作为后台任务执行"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """标准化文献文本"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
-    # 获取所有文本块
-    chunks = db.query(TextChunk).filter(
-        TextChunk.literature_id == literature_id
-    ).order_by(TextChunk.chunk_index).all()
+    total_chunks = await db.scalar(select(func.count(TextChunk.id)).where(
+        TextChunk.literature_id == literature_id,
+        TextChunk.chunk_type != STAGING_CHUNK_TYPE
+    ))
     
-    if not chunks:
+    if not total_chunks:
         raise HTTPException(status_code=404, detail="No text chunks found")
     
-    # 标准化每个文本块
-    normalized_count = 0
-    for chunk in chunks:
-        normalized_text = text_analyzer.normalize_text(chunk.text)
-        if normalized_text != chunk.text:
-            chunk.text = normalized_text
-            chunk.updated_at = datetime.utcnow()
-            normalized_count += 1
+    # 大文档作为后台任务执行，通过任务进度接口查询结果
+    if background or total_chunks >= config.NORMALIZE_BACKGROUND_THRESHOLD:
+        job = submit_normalization_job(literature_id, total_chunks)
+        return JSONResponse(status_code=202, content=jsonable_encoder({
+            **job,
+            "progress_url": f"{router.prefix}/normalize-jobs/{job['job_id']}"
+        }))
     
-    if normalized_count > 0:
-        db.commit()
+    # 分批标准化，变化的文本块批量写回（在线程池中使用同步会话执行）
+    result = await run_with_session(normalize_literature_chunks, literature_id)
     
     return {
         "literature_id": literature_id,
-        "total_chunks": len(chunks),
-        "normalized_chunks": normalized_count,
+        "total_chunks": result["total_chunks"],
+        "normalized_chunks": result["normalized_chunks"],
         "normalized_at": datetime.utcnow()
-    } 
\ No newline at end of file
+    }
+
+@router.get("/normalize-jobs/{job_id}")
+async def get_normalize_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """查询后台文本标准化任务的进度（只有任务所属文献的研究组成员可以查询）"""
+    job = get_normalization_job(job_id)
+    # 无权访问时与任务不存在的响应相同，不泄露任务ID是否有效
+    if not job or not await verify_literature_access_async(current_user.id, job["literature_id"], db):
+        raise HTTPException(status_code=404, detail="Normalization job not found")
+    
+    total = job["total_chunks"]
+    job["progress"] = round(job["processed_chunks"] / total, 4) if total else 1.0
+    return job
@@ -3,14 +3,23 @@
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
 from datetime import datetime
+import asyncio
 
-from ..database import get_db
-from ..models.text_chunk import TextChunk
+from ..database import get_async_db
+from ..models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
 from ..models.literature import Literature
-from ..schemas.text_chunk import TextChunkCreate, TextChunkResponse, TextChunkUpdate
+from ..utils.literature_analysis import invalidate_literature_analysis
+from ..utils.chunk_export import iter_chunks_ndjson
+from ..utils.pagination import paginate_chunks, split_page
+from ..utils.chunk_summary import get_chunk_stats, refresh_chunk_summary
+from ..utils.error_handler import ValidationError
+from ..utils.token_counter import TokenCounter
+from ..schemas.text_chunk import TextChunkCreate, TextChunkListResponse, TextChunkResponse, TextChunkUpdate
 from ..utils.auth import get_current_user
 from ..models.user import User
 
@@ -19,112 +28,130 @@ router = APIRouter(
     tags=["text-chunks"]
 )
 
-@router.get("/{literature_id}", response_model=List[TextChunkResponse])
+@router.get("/{literature_id}", response_model=TextChunkListResponse)
 async def get_text_chunks(
     literature_id: str,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页响应中的 next_cursor，指定时忽略skip"),
     chunk_type: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    """获取指定文献的文本块列表"""
+    """获取指定文献的文本块列表（一页文本块和下一页的游标 next_cursor，与文献列表接口相同）"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
     # 构建查询
-    query = db.query(TextChunk).filter(TextChunk.literature_id == literature_id)
+    query = select(TextChunk).where(
+        TextChunk.literature_id == literature_id,
+        TextChunk.chunk_type != STAGING_CHUNK_TYPE
+    )
     
     # 如果指定了chunk_type，添加过滤条件
     if chunk_type:
-        query = query.filter(TextChunk.chunk_type == chunk_type)
+        query = query.where(TextChunk.chunk_type == chunk_type)
     
-    # 按chunk_index排序，分页
-    chunks = query.order_by(TextChunk.chunk_index).offset(skip).limit(limit).all()
+    # 按chunk_index排序；有游标时从上一页最后一块之后继续读取（键集分页），否则按skip偏移
+    try:
+        query = paginate_chunks(query, limit, cursor, skip)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=e.message)
     
-    return chunks
+    chunks, next_cursor = split_page(await db.scalars(query), limit, lambda chunk: {"chunk_index": chunk.chunk_index})
+    
+    return {"chunks": chunks, "next_cursor": next_cursor}
+
+@router.get("/{literature_id}/export")
+async def export_text_chunks(
+    literature_id: str,
+    embedding_status: Optional[str] = Query(
+        None, pattern="^(pending|processing|completed|failed)$", description="只导出该嵌入状态的文本块"
+    ),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """以NDJSON格式流式导出指定文献的全部文本块（按chunk_index排序，每行一个文本块）"""
+    # 验证文献是否存在且用户有权限访问
+    literature = await db.scalar(select(Literature).where(
+        Literature.id == literature_id,
+        Literature.status == 'active'
+    ))
+    
+    if not literature:
+        raise HTTPException(status_code=404, detail="Literature not found")
+    
+    return StreamingResponse(
+        iter_chunks_ndjson(literature_id, embedding_status),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{literature_id}.ndjson"'}
+    )
 
 @router.get("/{literature_id}/stats")
 async def get_text_chunks_stats(
     literature_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """获取指定文献的文本块统计信息"""
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
-    # 获取统计信息
-    total_chunks = db.query(TextChunk).filter(TextChunk.literature_id == literature_id).count()
-    total_chars = db.query(db.func.sum(TextChunk.char_length)).filter(
-        TextChunk.literature_id == literature_id
-    ).scalar() or 0
-    total_tokens = db.query(db.func.sum(TextChunk.estimated_tokens)).filter(
-        TextChunk.literature_id == literature_id
-    ).scalar() or 0
-    
-    # 获取各种状态的数量
-    status_counts = db.query(
-        TextChunk.embedding_status,
-        db.func.count(TextChunk.id)
-    ).filter(
-        TextChunk.literature_id == literature_id
-    ).group_by(TextChunk.embedding_status).all()
-    
-    # 转换为字典
-    status_dict = {status: count for status, count in status_counts}
-    
-    return {
-        "total_chunks": total_chunks,
-        "total_chars": total_chars,
-        "total_tokens": total_tokens,
-        "embedding_status": {
-            "pending": status_dict.get("pending", 0),
-            "processing": status_dict.get("processing", 0),
-            "completed": status_dict.get("completed", 0),
-            "failed": status_dict.get("failed", 0)
-        }
-    }
+    # 读取文本块汇总行（缺失时用一条聚合查询统计并保存）
+    return await db.run_sync(lambda session: get_chunk_stats(literature_id, session))
 
 @router.put("/{chunk_id}", response_model=TextChunkResponse)
 async def update_text_chunk(
     chunk_id: str,
     chunk_update: TextChunkUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     """更新文本块信息"""
-    chunk = db.query(TextChunk).filter(TextChunk.id == chunk_id).first()
+    chunk = await db.get(TextChunk, chunk_id)
     if not chunk:
         raise HTTPException(status_code=404, detail="Text chunk not found")
     
     # 验证文献是否存在且用户有权限访问
-    literature = db.query(Literature).filter(
+    literature = await db.scalar(select(Literature).where(
         Literature.id == chunk.literature_id,
         Literature.status == 'active'
-    ).first()
+    ))
     
     if not literature:
         raise HTTPException(status_code=404, detail="Literature not found")
     
     # 更新文本块
-    for field, value in chunk_update.dict(exclude_unset=True).items():
+    update_data = chunk_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
         setattr(chunk, field, value)
     
+    # 文本内容变化时重新计算字符数和token数（与入库时相同的方法），预计算的分析结果失效（下次读取时只重新分析该文本块）
+    if "text" in update_data:
+        chunk.char_length = len(chunk.text)
+        chunk.estimated_tokens = (await asyncio.to_thread(TokenCounter.count_many, [chunk.text]))[0]
+        await db.run_sync(
+            lambda session: invalidate_literature_analysis(chunk.literature_id, session, chunk_ids=[chunk.id])
+        )
+    
     chunk.updated_at = datetime.utcnow()
-    db.commit()
-    db.refresh(chunk)
+    
+    # 文本或嵌入状态变化时刷新文本块汇总（与文本块的更新一起提交）
+    if "text" in update_data or "embedding_status" in update_data:
+        await db.run_sync(lambda session: refresh_chunk_summary(chunk.literature_id, session))
+    await db.commit()
+    await db.refresh(chunk)
     
     return chunk 
\ No newline at end of file
@@ -58,6 +58,7 @@ class LiteratureResponse(BaseModel):
     title: str
     filename: str
     file_size: int
+    text_extraction_status: str = "pending"  # 后台文本处理状态
     file_type: str
     upload_time: datetime
     uploaded_by: str
@@ -73,6 +74,7 @@ class LiteratureListItem(BaseModel):
     title: str
     filename: str
     file_size: int
+    text_extraction_status: str = "pending"  # 后台文本处理状态
     file_type: str
     upload_time: datetime
     uploader_name: str  # 上传者用户名
@@ -82,8 +84,9 @@ class LiteratureListItem(BaseModel):
 
 # 文献列表响应模型
 class LiteratureListResponse(BaseModel):
-    total: int
+    total: Optional[int] = None  # 研究组的文献总数，只在第一页（未指定游标时）统计
     literature: List[LiteratureListItem]
+    next_cursor: Optional[str] = None  # 下一页的游标，没有更多数据时为None
 
 # 文件上传响应模型
 class FileUploadResponse(BaseModel):
@@ -91,4 +94,5 @@ class FileUploadResponse(BaseModel):
     literature_id: str
     title: str
     filename: str
-    file_size: int
\ No newline at end of file
+    file_size: int
+    text_extraction_status: str = "pending"  # 后台文本处理状态
\ No newline at end of file
@@ -3,7 +3,7 @@
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 class TextChunkBase(BaseModel):
@@ -39,4 +39,9 @@ class TextChunkResponse(TextChunkBase):
     updated_at: datetime
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True 
+
+class TextChunkListResponse(BaseModel):
+    """文本块列表的一页"""
+    chunks: List[TextChunkResponse]
+    next_cursor: Optional[str] = Field(None, description="下一页的游标，没有更多数据时为None")
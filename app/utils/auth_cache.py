@@ -0,0 +1,150 @@
+"""
+认证缓存模块
+进程内带有效期的LRU缓存，保存已认证用户（按用户名）、研究组成员关系和研究组是否存在，
+使已登录用户的常规读请求不必每次查询用户表、研究组表和成员关系表。
+只缓存肯定的结果（用户存在、是成员、研究组存在），否定结果始终查询数据库，
+因此在其他进程加入研究组后立即可见；创建研究组和加入研究组时清除对应的缓存条目
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import threading
+import time
+import logging
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config import config
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """线程安全的LRU缓存，条目在写入 ttl 秒后过期"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        """
+        Args:
+            max_entries: 最大条目数，超出时淘汰最久未使用的条目
+            ttl: 条目有效期（秒）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """读取未过期的条目，不存在或已过期时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """写入条目"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """删除条目"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class AuthCacheManager:
+    """认证缓存管理器"""
+
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            max_entries: 每类缓存的最大条目数
+            ttl: 缓存条目的有效期（秒）
+        """
+        max_entries = max_entries or config.AUTH_CACHE_MAX_ENTRIES
+        ttl = ttl or config.AUTH_CACHE_TTL_SECONDS
+        self.principals = TTLCache(max_entries, ttl)
+        self.memberships = TTLCache(max_entries, ttl)
+        self.groups = TTLCache(max_entries, ttl)
+
+    def get_principal(self, username: str, db: Session) -> Optional[User]:
+        """
+        读取缓存的已认证用户，并关联到当前请求的会话（不查询数据库）
+
+        Args:
+            username: 用户名
+            db: 当前请求的数据库会话
+
+        Returns:
+            Optional[User]: 用户对象，未缓存时返回None
+        """
+        snapshot: Optional[Dict[str, Any]] = self.principals.get(username)
+        if snapshot is None:
+            return None
+        # 缓存中只保存字段值，每个请求得到各自的对象，互不影响
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def set_principal(self, user: User) -> None:
+        """缓存已认证用户的字段值"""
+        snapshot = {column.key: getattr(user, column.key) for column in User.__table__.columns}
+        self.principals.set(user.username, snapshot)
+
+    def invalidate_principal(self, username: str) -> None:
+        """用户信息变化时清除缓存"""
+        self.principals.pop(username)
+
+    def is_member(self, user_id: str, group_id: str) -> bool:
+        """是否已缓存用户为研究组成员"""
+        return self.memberships.get((user_id, group_id)) is not None
+
+    def set_member(self, user_id: str, group_id: str) -> None:
+        """缓存用户为研究组成员"""
+        self.memberships.set((user_id, group_id), True)
+
+    def invalidate_membership(self, user_id: str, group_id: str) -> None:
+        """成员关系变化时清除缓存"""
+        self.memberships.pop((user_id, group_id))
+
+    def group_exists(self, group_id: str) -> bool:
+        """是否已缓存研究组存在"""
+        return self.groups.get(group_id) is not None
+
+    def set_group(self, group_id: str) -> None:
+        """缓存研究组存在"""
+        self.groups.set(group_id, True)
+
+    def invalidate_group(self, group_id: str) -> None:
+        """研究组变化时清除缓存"""
+        self.groups.pop(group_id)
+
+    def clear(self) -> None:
+        """清空所有认证缓存"""
+        self.principals.clear()
+        self.memberships.clear()
+        self.groups.clear()
+
+# 创建全局认证缓存实例
+auth_cache = AuthCacheManager()
+
+# 便捷函数
+def invalidate_group_membership(user_id: str, group_id: str) -> None:
+    """创建或加入研究组后清除相关缓存的便捷函数"""
+    auth_cache.invalidate_membership(user_id, group_id)
+    auth_cache.invalidate_group(group_id)
@@ -3,17 +3,20 @@
 用于验证用户权限和组成员身份
 """
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.models.research_group import ResearchGroup, UserResearchGroup
 from app.models.literature import Literature
+from app.utils.auth_cache import auth_cache
 from fastapi import HTTPException
 from typing import Optional
 import os
 
 def verify_group_membership(user_id: str, group_id: str, db: Session) -> bool:
     """
-    验证用户是否为指定研究组的成员
+    验证用户是否为指定研究组的成员（肯定的结果会缓存，见 auth_cache）
     
     Args:
         user_id: 用户ID
@@ -23,6 +26,10 @@ def verify_group_membership(user_id: str, group_id: str, db: Session) -> bool:
     Returns:
         bool: 是否为组成员
     """
+    # 已缓存的成员关系无需查询
+    if auth_cache.is_member(user_id, group_id):
+        return True
+    
     try:
         # 查询用户-研究组关系
         membership = db.query(UserResearchGroup).filter(
@@ -30,6 +37,8 @@ def verify_group_membership(user_id: str, group_id: str, db: Session) -> bool:
             UserResearchGroup.group_id == group_id
         ).first()
         
+        if membership is not None:
+            auth_cache.set_member(user_id, group_id)
         return membership is not None
         
     except Exception as e:
@@ -47,8 +56,13 @@ def verify_group_exists(group_id: str, db: Session) -> bool:
     Returns:
         bool: 研究组是否存在
     """
+    if auth_cache.group_exists(group_id):
+        return True
+    
     try:
         group = db.query(ResearchGroup).filter(ResearchGroup.id == group_id).first()
+        if group is not None:
+            auth_cache.set_group(group_id)
         return group is not None
     except Exception as e:
         print(f"验证研究组存在失败: {e}")
@@ -231,4 +245,182 @@ def get_content_type(file_path: str) -> str:
         '.txt': 'text/plain'
     }
     
-    return content_types.get(file_extension, 'application/octet-stream')
\ No newline at end of file
+    return content_types.get(file_extension, 'application/octet-stream')
+
+# ===== 异步版本：供 async def 路由通过 AsyncSession 查询，数据库I/O不阻塞事件循环 =====
+
+async def verify_group_membership_async(user_id: str, group_id: str, db: AsyncSession) -> bool:
+    """
+    验证用户是否为指定研究组的成员（异步版本）
+    
+    Args:
+        user_id: 用户ID
+        group_id: 研究组ID
+        db: 异步数据库会话
+        
+    Returns:
+        bool: 是否为组成员
+    """
+    if auth_cache.is_member(user_id, group_id):
+        return True
+    
+    try:
+        membership = await db.scalar(select(UserResearchGroup).where(
+            UserResearchGroup.user_id == user_id,
+            UserResearchGroup.group_id == group_id
+        ).limit(1))
+        
+        if membership is not None:
+            auth_cache.set_member(user_id, group_id)
+        return membership is not None
+        
+    except Exception as e:
+        print(f"验证组成员身份失败: {e}")
+        return False
+
+async def verify_group_exists_async(group_id: str, db: AsyncSession) -> bool:
+    """
+    验证研究组是否存在（异步版本）
+    
+    Args:
+        group_id: 研究组ID
+        db: 异步数据库会话
+        
+    Returns:
+        bool: 研究组是否存在
+    """
+    if auth_cache.group_exists(group_id):
+        return True
+    
+    try:
+        group = await db.get(ResearchGroup, group_id)
+        if group is not None:
+            auth_cache.set_group(group_id)
+        return group is not None
+    except Exception as e:
+        print(f"验证研究组存在失败: {e}")
+        return False
+
+async def get_user_groups_async(user_id: str, db: AsyncSession) -> list:
+    """
+    获取用户所属的所有研究组（异步版本）
+    
+    Args:
+        user_id: 用户ID
+        db: 异步数据库会话
+        
+    Returns:
+        list: 研究组列表
+    """
+    try:
+        groups = await db.scalars(select(ResearchGroup).join(
+            UserResearchGroup, ResearchGroup.id == UserResearchGroup.group_id
+        ).where(UserResearchGroup.user_id == user_id))
+        
+        return list(groups)
+        
+    except Exception as e:
+        print(f"获取用户研究组失败: {e}")
+        return []
+
+async def require_group_membership_async(user_id: str, group_id: str, db: AsyncSession) -> None:
+    """
+    要求用户必须是指定研究组成员，否则抛出异常（异步版本）
+    
+    Args:
+        user_id: 用户ID
+        group_id: 研究组ID
+        db: 异步数据库会话
+        
+    Raises:
+        HTTPException: 如果用户不是组成员
+    """
+    if not await verify_group_exists_async(group_id, db):
+        raise HTTPException(status_code=404, detail="研究组不存在")
+    
+    if not await verify_group_membership_async(user_id, group_id, db):
+        raise HTTPException(status_code=403, detail="您不是该研究组的成员，无权访问")
+
+async def get_group_info_async(group_id: str, db: AsyncSession) -> dict:
+    """
+    获取研究组基本信息（异步版本）
+    
+    Args:
+        group_id: 研究组ID
+        db: 异步数据库会话
+        
+    Returns:
+        dict: 研究组信息
+    """
+    try:
+        group = await db.get(ResearchGroup, group_id)
+        if group:
+            return {
+                "id": group.id,
+                "name": group.name,
+                "institution": group.institution,
+                "description": group.description,
+                "research_area": group.research_area
+            }
+        return None
+    except Exception as e:
+        print(f"获取研究组信息失败: {e}")
+        return None
+
+async def verify_literature_access_async(user_id: str, literature_id: str, db: AsyncSession) -> bool:
+    """
+    验证用户对特定文献的访问权限（异步版本）
+    
+    Args:
+        user_id: 用户ID
+        literature_id: 文献ID
+        db: 异步数据库会话
+        
+    Returns:
+        bool: 是否有访问权限
+    """
+    try:
+        literature = await db.get(Literature, literature_id)
+        if not literature or literature.status != 'active':
+            return False
+        
+        return await verify_group_membership_async(user_id, literature.research_group_id, db)
+        
+    except Exception as e:
+        print(f"验证文献访问权限失败: {e}")
+        return False
+
+async def get_literature_with_permission_async(literature_id: str, user_id: str, db: AsyncSession) -> Optional[Literature]:
+    """
+    获取文献信息并验证权限（异步版本）
+    
+    Args:
+        literature_id: 文献ID
+        user_id: 用户ID
+        db: 异步数据库会话
+        
+    Returns:
+        Literature: 文献对象
+        
+    Raises:
+        HTTPException: 根据不同情况抛出相应的HTTP异常
+    """
+    try:
+        literature = await db.get(Literature, literature_id)
+        
+        if not literature:
+            raise HTTPException(status_code=404, detail="文献不存在")
+        
+        if literature.status != 'active':
+            raise HTTPException(status_code=410, detail="文献已被删除")
+        
+        if not await verify_group_membership_async(user_id, literature.research_group_id, db):
+            raise HTTPException(status_code=403, detail="您无权访问此文献，请确认您是该研究组的成员")
+        
+        return literature
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"获取文献信息失败: {e}")
+        raise HTTPException(status_code=500, detail="获取文献信息失败")
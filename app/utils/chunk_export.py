@@ -0,0 +1,73 @@
+"""
+文本块导出模块
+以NDJSON格式流式导出文献的全部文本块（每行一个JSON对象），供嵌入等下游任务一次性拉取；
+使用服务端游标分批读取列数据，不构造ORM对象，内存占用与文献大小无关
+"""
+
+import json
+import logging
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+
+from app.config import config
+from app.database import SessionLocal
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+
+logger = logging.getLogger(__name__)
+
+# 导出的列（按顺序）
+_EXPORT_COLUMNS = [
+    TextChunk.__table__.c[name] for name in (
+        "id", "literature_id", "chunk_index", "chunk_type", "text", "char_length",
+        "estimated_tokens", "metadata", "embedding_status", "created_at", "updated_at"
+    )
+]
+
+def _json_default(value):
+    """序列化JSON无法直接表示的值（时间戳）"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+def iter_chunks_ndjson(
+    literature_id: str,
+    embedding_status: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Iterator[str]:
+    """
+    按 chunk_index 顺序流式生成文献文本块的NDJSON（每批文本块合并为一段输出）
+
+    使用独立的数据库会话：流式响应在请求处理函数返回后才开始迭代
+
+    Args:
+        literature_id: 文献ID
+        embedding_status: 只导出该嵌入状态的文本块，为None时导出全部
+        batch_size: 每批从游标读取的行数
+
+    Yields:
+        str: 若干行NDJSON文本
+    """
+    batch_size = batch_size or config.CHUNK_EXPORT_BATCH_SIZE
+    statement = select(*_EXPORT_COLUMNS).where(
+        TextChunk.__table__.c.literature_id == literature_id,
+        TextChunk.__table__.c.chunk_type != STAGING_CHUNK_TYPE
+    )
+    if embedding_status:
+        statement = statement.where(TextChunk.__table__.c.embedding_status == embedding_status)
+    statement = statement.order_by(TextChunk.__table__.c.chunk_index)
+
+    db = SessionLocal()
+    exported = 0
+    try:
+        result = db.execute(statement, execution_options={"yield_per": batch_size})
+        for rows in result.partitions():
+            yield "".join(
+                json.dumps(row._asdict(), ensure_ascii=False, default=_json_default) + "\n"
+                for row in rows
+            )
+            exported += len(rows)
+    finally:
+        db.close()
+        logger.info(f"文献 {literature_id} 导出文本块 {exported} 个")
@@ -0,0 +1,112 @@
+"""
+文本块汇总管理模块
+用一条聚合查询统计文献的文本块数量、字符数、token数和各嵌入状态的数量，结果保存在 chunk_summary 表中；
+文献处理完成和文本块更新时刷新汇总行，统计接口只读取一行（汇总行缺失时回退到聚合查询）
+"""
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from typing import Any, Dict
+from datetime import datetime
+import logging
+
+from app.models.chunk_summary import ChunkSummary
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+
+logger = logging.getLogger(__name__)
+
+# 统计的嵌入状态
+EMBEDDING_STATUSES = ("pending", "processing", "completed", "failed")
+
+class ChunkSummaryManager:
+    """文本块汇总管理器"""
+
+    @staticmethod
+    def aggregate(literature_id: str, db: Session) -> Dict[str, int]:
+        """
+        用一条聚合查询统计文献的文本块
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+
+        Returns:
+            Dict[str, int]: 与 chunk_summary 表列名一致的汇总值
+        """
+        columns = [
+            func.count(TextChunk.id),
+            func.coalesce(func.sum(TextChunk.char_length), 0),
+            func.coalesce(func.sum(TextChunk.estimated_tokens), 0),
+        ] + [
+            func.coalesce(func.sum(case((TextChunk.embedding_status == status, 1), else_=0)), 0)
+            for status in EMBEDDING_STATUSES
+        ]
+        row = db.query(*columns).filter(
+            TextChunk.literature_id == literature_id,
+            TextChunk.chunk_type != STAGING_CHUNK_TYPE
+        ).one()
+
+        names = ["total_chunks", "total_chars", "total_tokens"] + [f"embedding_{status}" for status in EMBEDDING_STATUSES]
+        return {name: int(value) for name, value in zip(names, row)}
+
+    @staticmethod
+    def refresh(literature_id: str, db: Session) -> ChunkSummary:
+        """
+        重新统计并更新文献的汇总行（随调用方的事务一起提交）
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+
+        Returns:
+            ChunkSummary: 更新后的汇总行
+        """
+        db.flush()
+        values = ChunkSummaryManager.aggregate(literature_id, db)
+
+        summary = db.get(ChunkSummary, literature_id)
+        if summary is None:
+            summary = ChunkSummary(literature_id=literature_id)
+            db.add(summary)
+        for name, value in values.items():
+            setattr(summary, name, value)
+        summary.updated_at = datetime.utcnow()
+        return summary
+
+    @staticmethod
+    def get_stats(literature_id: str, db: Session) -> Dict[str, Any]:
+        """
+        获取文献的文本块统计：读取汇总行，缺失时执行聚合查询并保存
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+
+        Returns:
+            Dict[str, Any]: total_chunks、total_chars、total_tokens 和 embedding_status 各状态数量
+        """
+        summary = db.get(ChunkSummary, literature_id)
+        if summary is None:
+            summary = ChunkSummaryManager.refresh(literature_id, db)
+            db.commit()
+
+        return {
+            "total_chunks": summary.total_chunks,
+            "total_chars": summary.total_chars,
+            "total_tokens": summary.total_tokens,
+            "embedding_status": {
+                status: getattr(summary, f"embedding_{status}") for status in EMBEDDING_STATUSES
+            }
+        }
+
+# 创建全局文本块汇总管理器实例
+chunk_summary_manager = ChunkSummaryManager()
+
+# 便捷函数
+def refresh_chunk_summary(literature_id: str, db: Session) -> ChunkSummary:
+    """刷新文本块汇总行的便捷函数"""
+    return chunk_summary_manager.refresh(literature_id, db)
+
+def get_chunk_stats(literature_id: str, db: Session) -> Dict[str, Any]:
+    """获取文本块统计的便捷函数"""
+    return chunk_summary_manager.get_stats(literature_id, db)
@@ -193,6 +193,9 @@ def safe_file_operation(operation_name: str, operation_func, *args, **kwargs):
         result = operation_func(*args, **kwargs)
         log_success(operation_name)
         return result
+    except LiteratureSystemError:
+        # 业务异常（如文件过大）保持原样向上抛出
+        raise
     except OSError as e:
         if "No space left on device" in str(e):
             raise FileUploadError("存储空间不足，无法保存文件")
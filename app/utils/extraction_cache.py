@@ -0,0 +1,160 @@
+"""
+提取文本缓存模块
+按文件内容摘要和提取器/清理器版本缓存逐页清理后的文本，
+同一文件再次处理时只需读取一次压缩缓存，无需重新解析PDF/DOCX/HTML
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+from app.config import config
+from app.utils.text_cleaner import CLEANER_VERSION
+from app.utils.text_extractor import EXTRACTOR_VERSION, iter_document_texts
+
+logger = logging.getLogger(__name__)
+
+def compute_file_digest(file_path: str, chunk_size: Optional[int] = None) -> str:
+    """
+    流式计算文件的SHA-256摘要（用于没有记录 file_hash 的历史文献）
+
+    Args:
+        file_path: 文件路径
+        chunk_size: 每次读取的字节数
+
+    Returns:
+        str: 十六进制摘要
+    """
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_SIZE
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+class ExtractionCache:
+    """
+    提取文本缓存管理器
+
+    缓存文件为 gzip 压缩的 JSON Lines，每行一页：[页码, 清理后的文本]，
+    读取时逐行解压，内存占用与逐页提取相同。
+    缓存键包含提取器和清理器版本号，任一版本变化后旧缓存自然失效。
+    """
+
+    def __init__(self, cache_root: Optional[str] = None):
+        self.cache_root = cache_root or config.EXTRACTION_CACHE_DIR
+
+    def get_cache_path(self, digest: str) -> str:
+        """
+        获取缓存文件路径：<缓存根目录>/<摘要前两位>/<摘要>-e<提取器版本>-c<清理器版本>.jsonl.gz
+
+        Args:
+            digest: 文件的SHA-256摘要
+
+        Returns:
+            str: 缓存文件路径
+        """
+        filename = f"{digest}-e{EXTRACTOR_VERSION}-c{CLEANER_VERSION}.jsonl.gz"
+        return os.path.join(self.cache_root, digest[:2], filename)
+
+    def has(self, digest: str) -> bool:
+        """检查缓存是否存在"""
+        return os.path.exists(self.get_cache_path(digest))
+
+    def iter_cached_pages(self, digest: str) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        逐页读取缓存
+
+        Args:
+            digest: 文件的SHA-256摘要
+
+        Yields:
+            Tuple[Optional[int], str]: (页码, 清理后的文本)
+        """
+        with gzip.open(self.get_cache_path(digest), "rt", encoding="utf-8") as f:
+            for line in f:
+                page_number, text = json.loads(line)
+                yield page_number, text
+
+    def iter_document_texts(self, file_path: str,
+                            digest: Optional[str] = None) -> Iterator[Tuple[Optional[int], str]]:
+        """
+        逐页获取文档清理后的文本，优先读取缓存；未命中时边提取边写入缓存
+
+        缓存先写入临时文件，只有完整遍历文档后才原子替换为正式缓存，
+        提取失败或调用方提前停止时不会留下不完整的缓存
+
+        Args:
+            file_path: 文件路径
+            digest: 文件的SHA-256摘要，未提供时根据文件内容计算
+
+        Yields:
+            Tuple[Optional[int], str]: (页码, 清理后的文本)，与 text_extractor.iter_document_texts 一致
+        """
+        if not digest:
+            digest = compute_file_digest(file_path)
+
+        cache_path = self.get_cache_path(digest)
+        if os.path.exists(cache_path):
+            yielded = 0
+            try:
+                for page in self.iter_cached_pages(digest):
+                    yielded += 1
+                    yield page
+                logger.info(f"提取文本缓存命中: {digest}")
+                return
+            except (OSError, EOFError, ValueError) as e:
+                logger.warning(f"提取文本缓存损坏，已删除: {cache_path}, {e}")
+                self.remove(digest)
+                # 已经产出部分内容时无法回退，只能抛出；否则重新提取
+                if yielded:
+                    raise
+
+        yield from self._extract_and_store(file_path, cache_path)
+
+    def _extract_and_store(self, file_path: str, cache_path: str) -> Iterator[Tuple[Optional[int], str]]:
+        """提取文本并写入缓存"""
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        completed = False
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                for page_number, text in iter_document_texts(file_path):
+                    f.write(json.dumps([page_number, text], ensure_ascii=False))
+                    f.write("\n")
+                    yield page_number, text
+            os.replace(tmp_path, cache_path)
+            completed = True
+            logger.info(f"提取文本已缓存: {cache_path}")
+        finally:
+            if not completed and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def remove(self, digest: str) -> bool:
+        """
+        删除缓存
+
+        Args:
+            digest: 文件的SHA-256摘要
+
+        Returns:
+            bool: 是否删除了缓存文件
+        """
+        cache_path = self.get_cache_path(digest)
+        try:
+            os.remove(cache_path)
+            return True
+        except FileNotFoundError:
+            return False
+
+# 创建全局提取文本缓存实例
+extraction_cache = ExtractionCache()
+
+def iter_document_texts_cached(file_path: str,
+                               digest: Optional[str] = None) -> Iterator[Tuple[Optional[int], str]]:
+    """逐页获取文档清理后的文本（带缓存）的便捷函数"""
+    return extraction_cache.iter_document_texts(file_path, digest)
@@ -5,16 +5,24 @@
 
 import os
 import uuid
+import hashlib
+import tempfile
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Optional, Tuple, Dict, Any
 from fastapi import UploadFile, HTTPException
 import logging
 
 from app.config import config
-from app.utils.storage_manager import ensure_group_directory, get_unique_filename
+from app.utils.storage_manager import (
+    ensure_group_directory, get_unique_filename, ensure_blob_directory, store_blob, link_blob
+)
+from app.utils.error_handler import ValidationError
 
 logger = logging.getLogger(__name__)
 
+# 文件类型嗅探读取的头部字节数
+SNIFF_HEADER_SIZE = 1024
+
 def validate_file_type(filename: str) -> bool:
     """
     验证文件类型是否被允许
@@ -60,27 +68,195 @@ def generate_file_path(group_id: str, filename: str) -> str:
     # 返回完整路径
     return os.path.join(group_dir, unique_filename)
 
-def save_uploaded_file(file: UploadFile, file_path: str) -> bool:
+def sniff_file_type(header: bytes) -> Optional[str]:
     """
-    保存上传的文件到指定路径
+    根据文件头部字节嗅探实际文件类型
+    
+    Args:
+        header: 文件开头的若干字节
+        
+    Returns:
+        Optional[str]: 识别出的扩展名（如 .pdf），无法识别时返回None
+    """
+    if header.startswith(b"%PDF-"):
+        return ".pdf"
+    if header.startswith(b"PK\x03\x04"):
+        return ".docx"
+    
+    head = header.lstrip(b"\xef\xbb\xbf \t\r\n")[:512].lower()
+    if head.startswith(b"<!doctype html") or b"<html" in head:
+        return ".html"
+    return None
+
+def write_upload_single_pass(
+    file: UploadFile,
+    target_dir: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    单遍写入上传文件
+    按固定大小分块写入目标目录下的临时文件，同时完成大小统计、SHA-256摘要和文件类型嗅探，
+    超出大小限制时立即中止，不会将整个文件读入内存。
+    
+    Args:
+        file: 上传的文件对象
+        target_dir: 临时文件所在目录（应与最终存放位置同一文件系统）
+        max_size: 允许的最大字节数，默认使用 config.MAX_FILE_SIZE
+        chunk_size: 每次读取的块大小，默认使用 config.UPLOAD_CHUNK_SIZE
+        
+    Returns:
+        Dict[str, Any]: 包含 tmp_path、file_size、sha256、detected_type 的字典，
+                        调用方负责将 tmp_path 重命名或删除
+        
+    Raises:
+        ValidationError: 文件为空或超过大小限制
+        OSError: 磁盘写入失败
+    """
+    max_size = max_size or config.MAX_FILE_SIZE
+    chunk_size = chunk_size or config.UPLOAD_CHUNK_SIZE
+    
+    os.makedirs(target_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target_dir, prefix=".upload-", suffix=".part")
+    
+    digest = hashlib.sha256()
+    header = b""
+    written = 0
+    try:
+        file.file.seek(0)
+        with os.fdopen(fd, "wb") as buffer:
+            while True:
+                block = file.file.read(chunk_size)
+                if not block:
+                    break
+                written += len(block)
+                if written > max_size:
+                    max_size_mb = max_size // (1024 * 1024)
+                    raise ValidationError(f"文件过大。最大允许大小: {max_size_mb}MB")
+                if len(header) < SNIFF_HEADER_SIZE:
+                    header += block[:SNIFF_HEADER_SIZE - len(header)]
+                digest.update(block)
+                buffer.write(block)
+            buffer.flush()
+            os.fsync(buffer.fileno())
+        
+        if written == 0:
+            raise ValidationError("文件不能为空")
+        
+        return {
+            "tmp_path": tmp_path,
+            "file_size": written,
+            "sha256": digest.hexdigest(),
+            "detected_type": sniff_file_type(header)
+        }
+        
+    except BaseException:
+        # 任何失败都不能留下半截的临时文件
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def stream_upload_to_file(
+    file: UploadFile,
+    file_path: str,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> int:
+    """
+    流式保存上传的文件
+    分块写入同目录临时文件，写完后原子重命名为目标文件。
     
     Args:
         file: 上传的文件对象
         file_path: 目标文件路径
+        max_size: 允许的最大字节数，默认使用 config.MAX_FILE_SIZE
+        chunk_size: 每次读取的块大小，默认使用 config.UPLOAD_CHUNK_SIZE
         
     Returns:
-        bool: 保存是否成功
+        int: 实际写入的字节数
+        
+    Raises:
+        ValidationError: 文件为空或超过大小限制
+        OSError: 磁盘写入失败
     """
+    # 临时文件与目标文件放在同一目录，保证 os.replace 是原子操作
+    result = write_upload_single_pass(
+        file, os.path.dirname(file_path) or ".", max_size, chunk_size
+    )
     try:
-        # 确保目标目录存在
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(result["tmp_path"], file_path)
+    except BaseException:
+        os.remove(result["tmp_path"])
+        raise
+    
+    logger.info(f"文件流式保存成功: {file_path} ({result['file_size']} 字节)")
+    return result["file_size"]
+
+def save_upload_deduplicated(file: UploadFile, group_id: str) -> Dict[str, Any]:
+    """
+    单遍保存上传文件并按内容去重
+    文件先写入内容寻址的blob存储（按SHA-256命名），再以硬链接的形式放入研究组目录。
+    相同内容的文件只在磁盘上保存一份。
+    
+    Args:
+        file: 上传的文件对象
+        group_id: 研究组ID
         
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            content = file.file.read()
-            buffer.write(content)
+    Returns:
+        Dict[str, Any]: 文件信息，包含 file_path、file_size、file_type、sha256、
+                        detected_type 和 deduplicated（是否命中已有blob）
         
-        logger.info(f"文件保存成功: {file_path}")
+    Raises:
+        ValidationError: 文件为空、超过大小限制或内容与扩展名不符
+        OSError: 磁盘写入失败
+    """
+    file_type = Path(file.filename).suffix.lower()
+    
+    result = write_upload_single_pass(file, ensure_blob_directory())
+    try:
+        detected_type = result["detected_type"]
+        if detected_type and not _is_same_file_type(detected_type, file_type):
+            raise ValidationError(f"文件内容与扩展名不符：内容识别为 {detected_type}，扩展名为 {file_type}")
+        
+        blob_path, is_new = store_blob(result["tmp_path"], result["sha256"])
+    except BaseException:
+        if os.path.exists(result["tmp_path"]):
+            os.remove(result["tmp_path"])
+        raise
+    
+    full_path = generate_file_path(group_id, file.filename)
+    link_blob(blob_path, full_path)
+    
+    logger.info(
+        f"文件保存成功: {full_path} ({result['file_size']} 字节, "
+        f"sha256={result['sha256'][:12]}, {'复用已有blob' if not is_new else '新blob'})"
+    )
+    return {
+        "file_path": full_path,
+        "file_size": result["file_size"],
+        "file_type": file_type,
+        "sha256": result["sha256"],
+        "detected_type": detected_type,
+        "deduplicated": not is_new
+    }
+
+def _is_same_file_type(detected_type: str, file_type: str) -> bool:
+    """判断嗅探类型与扩展名是否对应同一种MIME类型"""
+    return config.FILE_TYPE_MAPPING.get(detected_type) == config.FILE_TYPE_MAPPING.get(file_type)
+
+def save_uploaded_file(file: UploadFile, file_path: str) -> bool:
+    """
+    保存上传的文件到指定路径（流式分块写入）
+    
+    Args:
+        file: 上传的文件对象
+        file_path: 目标文件路径
+        
+    Returns:
+        bool: 保存是否成功
+    """
+    try:
+        stream_upload_to_file(file, file_path)
         return True
         
     except Exception as e:
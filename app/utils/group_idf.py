@@ -0,0 +1,354 @@
+"""
+研究组词频索引模块
+为每个研究组维护文档频率（DF）表，文献处理完成时增量加入、软删除时移出、恢复时重新加入；
+关键词提取只需读取文献的稀疏词频向量，与研究组的IDF逐项相乘后排序，无需每次请求重新拟合向量化器
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows 下只做进程内加锁
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class GroupIdfManager:
+    """
+    研究组IDF表管理器
+
+    每个研究组一个目录：
+    - vocabulary.txt: 词表，每行一个词，行号即词的编号；只追加不修改，已有编号永远有效
+    - df.npy: 与词表对齐的文档频率（int32）
+    - state.json: 当前计入统计的文献ID列表（文档总数即其长度）
+    - docs/<文献ID>.npz: 文献的稀疏词频向量（indices/counts 两个int32数组），软删除后保留以便恢复
+
+    写操作持有进程内锁和排他文件锁（后台处理在多个进程中并发写入同一研究组），
+    读操作持有共享文件锁，保证读到的词表、文档频率和文献列表来自同一次写入
+    """
+
+    def __init__(self, root_dir: Optional[str] = None, vocabulary_cache_size: Optional[int] = None):
+        self.root_dir = root_dir or config.GROUP_IDF_DIR
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # 词表只追加，按文件大小增量读取新增部分；按研究组LRU淘汰
+        self._vocabulary_cache: "OrderedDict[str, Tuple[int, List[str]]]" = OrderedDict()
+        self._vocabulary_cache_size = vocabulary_cache_size or config.GROUP_IDF_VOCABULARY_CACHE_SIZE
+        self._cache_guard = threading.Lock()
+
+    def _group_dir(self, group_id: str) -> str:
+        return os.path.join(self.root_dir, group_id)
+
+    def _doc_path(self, group_id: str, literature_id: str) -> str:
+        return os.path.join(self._group_dir(group_id), "docs", f"{literature_id}.npz")
+
+    @contextmanager
+    def _group_lock(self, group_id: str) -> Iterator[str]:
+        """获取研究组的写锁，返回研究组目录"""
+        with self._locks_guard:
+            lock = self._locks.setdefault(group_id, threading.Lock())
+
+        group_dir = self._group_dir(group_id)
+        os.makedirs(os.path.join(group_dir, "docs"), exist_ok=True)
+        with lock, open(os.path.join(group_dir, ".lock"), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield group_dir
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    @contextmanager
+    def _group_read_lock(self, group_id: str) -> Iterator[Optional[str]]:
+        """
+        获取研究组的读锁（共享文件锁，可与其他读者并发），返回研究组目录
+
+        研究组尚未建立索引时不创建目录，返回None
+        """
+        group_dir = self._group_dir(group_id)
+        try:
+            lock_file = open(os.path.join(group_dir, ".lock"), "r")
+        except FileNotFoundError:
+            yield None
+            return
+
+        with lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH)
+                try:
+                    yield group_dir
+                finally:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                with self._locks_guard:
+                    lock = self._locks.setdefault(group_id, threading.Lock())
+                with lock:
+                    yield group_dir
+
+    # ---------- 文件读写 ----------
+
+    def _load_vocabulary(self, group_id: str) -> List[str]:
+        """读取词表（缓存已读部分，只读取文件新增的内容）"""
+        path = os.path.join(self._group_dir(group_id), "vocabulary.txt")
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            return []
+
+        with self._cache_guard:
+            cached_size, terms = self._vocabulary_cache.get(group_id, (0, []))
+            if group_id in self._vocabulary_cache:
+                self._vocabulary_cache.move_to_end(group_id)
+        if size < cached_size:
+            cached_size, terms = 0, []
+        if size > cached_size:
+            with open(path, "rb") as f:
+                f.seek(cached_size)
+                new_data = f.read(size - cached_size)
+            # 只接收完整的行，未写完的行留到下次读取
+            complete = new_data.rfind(b"\n") + 1
+            terms = terms + new_data[:complete].decode("utf-8").splitlines()
+            cached_size += complete
+            with self._cache_guard:
+                self._vocabulary_cache[group_id] = (cached_size, terms)
+                self._vocabulary_cache.move_to_end(group_id)
+                while len(self._vocabulary_cache) > self._vocabulary_cache_size:
+                    self._vocabulary_cache.popitem(last=False)
+        return terms
+
+    def _load_df(self, group_dir: str, size: int) -> np.ndarray:
+        """读取文档频率数组，长度补齐到词表大小"""
+        try:
+            df = np.load(os.path.join(group_dir, "df.npy"))
+        except FileNotFoundError:
+            df = np.zeros(0, dtype=np.int32)
+        if len(df) < size:
+            df = np.concatenate((df, np.zeros(size - len(df), dtype=np.int32)))
+        return df
+
+    def _load_state(self, group_dir: str) -> List[str]:
+        try:
+            with open(os.path.join(group_dir, "state.json"), encoding="utf-8") as f:
+                return json.load(f)["active"]
+        except FileNotFoundError:
+            return []
+
+    @staticmethod
+    def _atomic_write(path: str, write) -> None:
+        """写入临时文件后原子替换"""
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _save(self, group_dir: str, df: np.ndarray, active: List[str]) -> None:
+        self._atomic_write(os.path.join(group_dir, "df.npy"), lambda f: np.save(f, df))
+        self._atomic_write(
+            os.path.join(group_dir, "state.json"),
+            lambda f: f.write(json.dumps({"active": active}).encode("utf-8"))
+        )
+
+    def _load_doc(self, group_id: str, literature_id: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        try:
+            with np.load(self._doc_path(group_id, literature_id)) as data:
+                return data["indices"], data["counts"]
+        except FileNotFoundError:
+            return None
+
+    # ---------- 写操作 ----------
+
+    def add_literature(self, group_id: str, literature_id: str, term_counts: Mapping[str, int]) -> None:
+        """
+        加入（或替换）文献的词频向量，并更新研究组的文档频率
+
+        Args:
+            group_id: 研究组ID
+            literature_id: 文献ID
+            term_counts: 文献中各词的出现次数
+        """
+        with self._group_lock(group_id) as group_dir:
+            vocabulary = self._load_vocabulary(group_id)
+            index = {term: i for i, term in enumerate(vocabulary)}
+
+            new_terms = [term for term in term_counts if term not in index and "\n" not in term]
+            if new_terms:
+                with open(os.path.join(group_dir, "vocabulary.txt"), "a", encoding="utf-8") as f:
+                    f.write("".join(f"{term}\n" for term in new_terms))
+                vocabulary = self._load_vocabulary(group_id)
+                index.update((term, i) for i, term in enumerate(vocabulary[len(index):], start=len(index)))
+
+            df = self._load_df(group_dir, len(vocabulary))
+            active = self._load_state(group_dir)
+
+            # 重新处理时先减去旧向量
+            if literature_id in active:
+                old = self._load_doc(group_id, literature_id)
+                if old is not None:
+                    df[old[0]] -= 1
+                active.remove(literature_id)
+
+            pairs = sorted((index[term], count) for term, count in term_counts.items() if term in index)
+            indices = np.array([i for i, _ in pairs], dtype=np.int32)
+            counts = np.array([c for _, c in pairs], dtype=np.int32)
+            self._atomic_write(
+                self._doc_path(group_id, literature_id),
+                lambda f: np.savez(f, indices=indices, counts=counts)
+            )
+
+            df[indices] += 1
+            active.append(literature_id)
+            self._save(group_dir, df, active)
+
+        logger.info(f"研究组 {group_id} 词频索引已加入文献 {literature_id}（{len(indices)} 个词）")
+
+    def deactivate_literature(self, group_id: str, literature_id: str) -> bool:
+        """
+        从文档频率中移出文献（软删除），保留词频向量以便恢复
+
+        Returns:
+            bool: 文献原先是否计入统计
+        """
+        with self._group_lock(group_id) as group_dir:
+            active = self._load_state(group_dir)
+            if literature_id not in active:
+                return False
+
+            df = self._load_df(group_dir, len(self._load_vocabulary(group_id)))
+            doc = self._load_doc(group_id, literature_id)
+            if doc is not None:
+                df[doc[0]] -= 1
+            active.remove(literature_id)
+            self._save(group_dir, df, active)
+            return True
+
+    def activate_literature(self, group_id: str, literature_id: str) -> bool:
+        """
+        将已有词频向量的文献重新计入文档频率（恢复软删除）
+
+        Returns:
+            bool: 是否重新计入（没有词频向量或已计入时返回False）
+        """
+        with self._group_lock(group_id) as group_dir:
+            active = self._load_state(group_dir)
+            doc = self._load_doc(group_id, literature_id)
+            if literature_id in active or doc is None:
+                return False
+
+            df = self._load_df(group_dir, len(self._load_vocabulary(group_id)))
+            df[doc[0]] += 1
+            active.append(literature_id)
+            self._save(group_dir, df, active)
+            return True
+
+    # ---------- 查询 ----------
+
+    def extract_keywords(self, group_id: str, literature_id: str, top_k: int = 10) -> Optional[List[Tuple[str, float]]]:
+        """
+        基于研究组IDF提取文献关键词：权重 = (1 + ln tf) * (ln((1 + N) / (1 + df)) + 1)，L2归一化
+
+        Args:
+            group_id: 研究组ID
+            literature_id: 文献ID
+            top_k: 返回的关键词数量
+
+        Returns:
+            Optional[List[Tuple[str, float]]]: (关键词, 权重) 列表，文献尚未建立词频向量时返回None
+        """
+        with self._group_read_lock(group_id) as group_dir:
+            if group_dir is None:
+                return None
+            doc = self._load_doc(group_id, literature_id)
+            if doc is None:
+                return None
+
+            indices, counts = doc
+            if len(indices) == 0 or top_k <= 0:
+                return []
+
+            vocabulary = self._load_vocabulary(group_id)
+            df = self._load_df(group_dir, len(vocabulary))
+            documents = max(len(self._load_state(group_dir)), 1)
+
+        idf = np.log((1 + documents) / (1 + df[indices])) + 1
+        weights = (1 + np.log(counts)) * idf
+        weights /= np.linalg.norm(weights)
+
+        # 索引按词表编号升序保存，稳定排序使权重相同的词顺序固定
+        top = np.argsort(-weights, kind="stable")[:top_k]
+        return [(vocabulary[indices[i]], round(float(weights[i]), 4)) for i in top]
+
+    def get_group_summary(self, group_id: str) -> Dict[str, int]:
+        """研究组索引的文档数和词表大小"""
+        with self._group_read_lock(group_id) as group_dir:
+            if group_dir is None:
+                return {"documents": 0, "vocabulary_size": 0}
+            return {
+                "documents": len(self._load_state(group_dir)),
+                "vocabulary_size": len(self._load_vocabulary(group_id))
+            }
+
+# 进程内的迁移锁（Windows 下没有fcntl时使用）
+_migration_lock = threading.Lock()
+
+def migrate_legacy_index(legacy_dir: str, root_dir: str) -> bool:
+    """
+    将旧版本放在缓存目录下的索引移动到数据目录（数据目录已存在时不覆盖）
+
+    在应用启动和数据库迁移脚本中显式调用；持有数据目录旁的文件锁，多个进程同时启动时只有一个执行移动
+
+    Args:
+        legacy_dir: 旧索引目录
+        root_dir: 新索引目录
+
+    Returns:
+        bool: 是否执行了迁移
+    """
+    if not os.path.isdir(legacy_dir):
+        return False
+
+    parent_dir = os.path.dirname(os.path.abspath(root_dir))
+    os.makedirs(parent_dir, exist_ok=True)
+    lock_path = os.path.join(parent_dir, f".{os.path.basename(os.path.abspath(root_dir))}.migrate.lock")
+    with _migration_lock, open(lock_path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            # 获得锁后重新检查：其他进程可能已完成迁移
+            if not os.path.isdir(legacy_dir) or os.path.exists(root_dir):
+                return False
+            shutil.move(legacy_dir, root_dir)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    logger.info(f"研究组词频索引已从 {legacy_dir} 迁移到 {root_dir}")
+    return True
+
+# 创建全局研究组IDF管理器实例
+group_idf_manager = GroupIdfManager()
+
+def migrate_legacy_group_index() -> bool:
+    """将旧版本缓存目录下的研究组索引迁移到 config.GROUP_IDF_DIR 的便捷函数"""
+    return migrate_legacy_index(config.LEGACY_GROUP_IDF_DIR, group_idf_manager.root_dir)
+
+def extract_group_keywords(group_id: str, literature_id: str, top_k: int = 10) -> Optional[List[Tuple[str, float]]]:
+    """基于研究组IDF提取关键词的便捷函数"""
+    return group_idf_manager.extract_keywords(group_id, literature_id, top_k)
@@ -0,0 +1,469 @@
+"""
+文献后台处理模块
+负责在独立的进程池中完成文本提取、分块和文本块入库，避免阻塞请求处理的事件循环；
+多个应用进程共享数据库时，每个处理任务先原子地认领文献（认领进程标识 + 心跳时间），同一文献同时只由一个进程处理
+"""
+
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+
+from sqlalchemy import exists, insert, or_, update
+from sqlalchemy.orm import Session
+
+from app.config import config
+from app.database import SessionLocal
+from app.models.literature import Literature
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+from app.utils.extraction_cache import compute_file_digest, extraction_cache, iter_document_texts_cached
+from app.utils.literature_analysis import compute_literature_analysis, invalidate_literature_analysis
+from app.utils.chunk_summary import refresh_chunk_summary
+from app.utils.text_extractor import disable_parallel_pdf_extraction, extract_title_from_text
+from app.utils.text_processor import iter_text_chunks
+
+logger = logging.getLogger(__name__)
+
+class ClaimLostError(Exception):
+    """处理任务的认领已超时并被其他进程接管"""
+
+def claim_literature(literature_id: str, owner: str, db: Session, values: Optional[Dict[Any, Any]] = None) -> bool:
+    """
+    原子地认领文献的处理任务（一条带条件的UPDATE，不提交）：
+    文献未被认领、已由 owner 认领，或认领进程超过 INGESTION_CLAIM_TIMEOUT_SECONDS 未更新心跳时认领成功
+
+    Args:
+        literature_id: 文献ID
+        owner: 认领进程标识
+        db: 数据库会话
+        values: 认领成功时一并更新的字段
+
+    Returns:
+        bool: 是否认领成功
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=config.INGESTION_CLAIM_TIMEOUT_SECONDS)
+    updated = db.query(Literature).filter(
+        Literature.id == literature_id,
+        or_(
+            Literature.extraction_owner.is_(None),
+            Literature.extraction_owner == owner,
+            Literature.extraction_heartbeat_at.is_(None),
+            Literature.extraction_heartbeat_at < stale
+        )
+    ).update({
+        Literature.extraction_owner: owner,
+        Literature.extraction_heartbeat_at: now,
+        **(values or {})
+    }, synchronize_session=False)
+    return updated == 1
+
+def _heartbeat(literature_id: str, owner: str, db: Session) -> None:
+    """
+    在当前事务中更新认领心跳（与随后的写入一起提交）
+
+    Raises:
+        ClaimLostError: 认领已被其他进程接管
+    """
+    updated = db.query(Literature).filter(
+        Literature.id == literature_id,
+        Literature.extraction_owner == owner
+    ).update({Literature.extraction_heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+    if updated != 1:
+        raise ClaimLostError(f"文献 {literature_id} 的处理任务已被其他进程接管")
+
+def _find_duplicate_source(literature: Literature, db: Session) -> Optional[Literature]:
+    """
+    查找内容相同、已处理完成且有文本块的文献，用于复用其文本块
+
+    Args:
+        literature: 待处理的文献
+        db: 数据库会话
+
+    Returns:
+        Optional[Literature]: 可复用的文献，没有时返回None
+    """
+    if not literature.file_hash:
+        return None
+
+    return db.query(Literature).filter(
+        Literature.file_hash == literature.file_hash,
+        Literature.id != literature.id,
+        Literature.text_extraction_status == 'completed',
+        exists().where(TextChunk.literature_id == Literature.id, TextChunk.chunk_type != STAGING_CHUNK_TYPE)
+    ).order_by(Literature.upload_time).first()
+
+def _copy_chunks_from_duplicate(literature: Literature, source: Literature, db: Session) -> int:
+    """
+    从内容相同且已处理完成的文献复制文本块，避免重复解析同一文件
+
+    Args:
+        literature: 待处理的文献
+        source: 可复用的文献
+        db: 数据库会话
+
+    Returns:
+        int: 复制的文本块数量
+    """
+    source_chunks = db.query(TextChunk).filter(
+        TextChunk.literature_id == source.id,
+        TextChunk.chunk_type != STAGING_CHUNK_TYPE
+    ).order_by(TextChunk.chunk_index).all()
+
+    db.add_all([
+        TextChunk(
+            literature_id=literature.id,
+            chunk_index=chunk.chunk_index,
+            chunk_type=chunk.chunk_type,
+            text=chunk.text,
+            char_length=chunk.char_length,
+            estimated_tokens=chunk.estimated_tokens,
+            metadata=dict(chunk.metadata or {})
+        )
+        for chunk in source_chunks
+    ])
+
+    logger.info(f"文献 {literature.id} 复用文献 {source.id} 的 {len(source_chunks)} 个文本块")
+    return len(source_chunks)
+
+def _chunk_row(chunk: Dict[str, Any], literature_id: str) -> Dict[str, Any]:
+    """将分块结果转换为 text_chunks 表的一行（用于批量插入，不创建ORM对象），先以暂存类型写入"""
+    now = datetime.utcnow()
+    return {
+        "id": str(uuid.uuid4()),
+        "literature_id": literature_id,
+        "chunk_index": chunk["chunk_index"],
+        "chunk_type": STAGING_CHUNK_TYPE,
+        "text": chunk["text"],
+        "char_length": chunk["char_length"],
+        "estimated_tokens": chunk["estimated_tokens"],
+        "metadata": {
+            key: chunk[key]
+            for key in ("start_char", "end_char", "page_number", "page_end")
+            if chunk.get(key) is not None
+        },
+        "embedding_status": "pending",
+        "created_at": now,
+        "updated_at": now
+    }
+
+def _fill_extraction_cache(literature: Literature) -> str:
+    """
+    完成文档解析并写入提取文本缓存（不访问数据库）
+    在开启写事务之前调用，解析PDF等耗时操作期间不持有数据库写锁
+
+    Args:
+        literature: 待处理的文献
+
+    Returns:
+        str: 文件的SHA-256摘要（提取缓存的键）
+    """
+    digest = literature.file_hash or compute_file_digest(literature.file_path)
+    if not extraction_cache.has(digest):
+        for _ in iter_document_texts_cached(literature.file_path, digest):
+            pass
+    return digest
+
+def _delete_staged_chunks(literature_id: str, db: Session) -> None:
+    """删除文献的暂存文本块（上次处理中断或本次处理失败时留下的）"""
+    db.query(TextChunk).filter(
+        TextChunk.literature_id == literature_id,
+        TextChunk.chunk_type == STAGING_CHUNK_TYPE
+    ).delete(synchronize_session=False)
+
+def _ingest_streaming(literature_id: str, file_path: str, digest: str, db: Session,
+                      update_title: bool, owner: str) -> Tuple[int, Optional[str]]:
+    """
+    流式处理文献：逐页读取清理后的文本，增量分块，并按批写入暂存文本块
+    内存占用只与少量页面和一个批次的文本块有关，与文档大小无关；
+    文本从提取缓存读取（见 _fill_extraction_cache），每批写入后立即提交，
+    写锁只在单个批次的插入期间持有；暂存文本块在 run_ingestion_job 的最后一个事务中替换旧文本块。
+    每批与认领心跳一起提交，认领被接管后不再写入
+
+    Args:
+        literature_id: 文献ID
+        file_path: 文件路径
+        digest: 文件的SHA-256摘要
+        db: 数据库会话
+        update_title: 是否从首页文本中提取标题
+        owner: 认领进程标识
+
+    Returns:
+        Tuple[int, Optional[str]]: (写入的文本块数量, 提取的标题；未提取时为None)
+    """
+    insert_chunks = insert(TextChunk.__table__)
+    batch: List[Dict[str, Any]] = []
+    chunk_count = 0
+    title = None
+
+    def segments():
+        nonlocal title
+        title_pending = update_title
+        for page_number, text in iter_document_texts_cached(file_path, digest):
+            if title_pending and text.strip():
+                title = extract_title_from_text(text)
+                title_pending = False
+            yield page_number, text
+
+    for chunk in iter_text_chunks(
+        segments(),
+        chunk_size=config.TEXT_CHUNK_SIZE,
+        chunk_overlap=config.TEXT_CHUNK_OVERLAP,
+        size_unit=config.TEXT_CHUNK_SIZE_UNIT
+    ):
+        batch.append(_chunk_row(chunk, literature_id))
+        if len(batch) >= config.CHUNK_PERSIST_BATCH_SIZE:
+            _heartbeat(literature_id, owner, db)
+            db.execute(insert_chunks, batch)
+            db.commit()
+            chunk_count += len(batch)
+            batch = []
+
+    if batch:
+        _heartbeat(literature_id, owner, db)
+        db.execute(insert_chunks, batch)
+        db.commit()
+        chunk_count += len(batch)
+
+    if chunk_count == 0:
+        raise ValueError("未能从文件中提取到文本内容")
+
+    return chunk_count, title
+
+def run_ingestion_job(literature_id: str, update_title: bool = False, owner: Optional[str] = None) -> Dict[str, Any]:
+    """
+    处理单个文献：提取文本、分块并保存文本块（在工作进程中执行）
+    状态流转：pending -> processing -> completed/failed；文献已被其他进程认领时不处理
+
+    Args:
+        literature_id: 文献ID
+        update_title: 是否用从文本中提取的标题覆盖当前标题（为False时使用文献的 extract_title 标记）
+        owner: 认领进程标识，不指定时为本次任务生成一个
+
+    Returns:
+        Dict[str, Any]: 处理结果
+    """
+    owner = owner or f"job:{uuid.uuid4()}"
+    db = SessionLocal()
+    try:
+        literature = db.query(Literature).filter(Literature.id == literature_id).first()
+        if not literature:
+            logger.warning(f"待处理的文献不存在: {literature_id}")
+            return {"literature_id": literature_id, "status": "missing"}
+
+        if not claim_literature(literature_id, owner, db, {
+            Literature.text_extraction_status: 'processing',
+            Literature.text_extraction_error: None
+        }):
+            db.rollback()
+            logger.info(f"文献正由其他进程处理，跳过: {literature_id}")
+            return {"literature_id": literature_id, "status": "skipped"}
+        db.commit()
+        update_title = update_title or literature.extract_title
+
+        # 先在写事务之外完成文本提取（SQLite的写锁在第一条写语句时获取），
+        # 解析文档期间其他进程的上传、文本块更新等写操作不会因等待写锁而超时
+        source = _find_duplicate_source(literature, db)
+        db.commit()
+
+        title = None
+        if source is None:
+            digest = _fill_extraction_cache(literature)
+            # 新文本块以暂存类型按批写入并逐批提交，处理期间读取到的仍是旧文本块
+            _heartbeat(literature_id, owner, db)
+            _delete_staged_chunks(literature_id, db)
+            db.commit()
+            chunk_count, title = _ingest_streaming(
+                literature_id, literature.file_path, digest, db, update_title, owner
+            )
+
+        # 最后一个短事务：用新文本块替换旧文本块，清理旧的分析结果，并与文本块汇总、处理状态一起提交（释放认领）
+        _heartbeat(literature_id, owner, db)
+        invalidate_literature_analysis(literature_id, db)
+        db.query(TextChunk).filter(
+            TextChunk.literature_id == literature_id,
+            TextChunk.chunk_type != STAGING_CHUNK_TYPE
+        ).delete(synchronize_session=False)
+
+        if source is not None:
+            chunk_count = _copy_chunks_from_duplicate(literature, source, db)
+            # 复用的文本块来自同一文件，标题从首个文本块提取（不沿用其他文献的标题）
+            if update_title:
+                first_text = db.query(TextChunk.text).filter(
+                    TextChunk.literature_id == source.id,
+                    TextChunk.chunk_type != STAGING_CHUNK_TYPE
+                ).order_by(TextChunk.chunk_index).limit(1).scalar()
+                if first_text:
+                    title = extract_title_from_text(first_text)
+        else:
+            db.execute(update(TextChunk.__table__).where(
+                TextChunk.__table__.c.literature_id == literature_id,
+                TextChunk.__table__.c.chunk_type == STAGING_CHUNK_TYPE
+            ).values(chunk_type="literature_text"))
+
+        if title:
+            literature.title = title
+        refresh_chunk_summary(literature_id, db)
+        literature.text_extraction_status = 'completed'
+        literature.extract_title = False
+        literature.extraction_owner = None
+        literature.extraction_heartbeat_at = None
+        db.commit()
+
+        # 预计算文本分析结果（同时更新研究组关键词索引）；失败时分析接口在首次请求时重新计算
+        try:
+            compute_literature_analysis(literature_id, db)
+        except Exception as e:
+            logger.warning(f"预计算文献分析结果失败 {literature_id}: {e}")
+            db.rollback()
+
+        logger.info(f"文献处理完成: {literature_id}, 文本块数量: {chunk_count}")
+        return {"literature_id": literature_id, "status": "completed", "chunk_count": chunk_count}
+
+    except ClaimLostError as e:
+        # 接管的进程会清理暂存文本块并重新处理，这里不再修改任何数据
+        logger.warning(str(e))
+        db.rollback()
+        return {"literature_id": literature_id, "status": "superseded"}
+
+    except Exception as e:
+        logger.error(f"文献处理失败 {literature_id}: {e}")
+        db.rollback()
+        try:
+            # 仍持有认领时标记失败并释放认领，已提交的暂存文本块一并清理，旧文本块保持不变
+            failed = db.query(Literature).filter(
+                Literature.id == literature_id,
+                Literature.extraction_owner == owner
+            ).update({
+                Literature.text_extraction_status: 'failed',
+                Literature.text_extraction_error: str(e),
+                Literature.extraction_owner: None,
+                Literature.extraction_heartbeat_at: None
+            }, synchronize_session=False)
+            if failed:
+                _delete_staged_chunks(literature_id, db)
+            db.commit()
+        except Exception as update_error:
+            logger.error(f"更新文献处理状态失败 {literature_id}: {update_error}")
+            db.rollback()
+        return {"literature_id": literature_id, "status": "failed", "error": str(e)}
+
+    finally:
+        db.close()
+
+class IngestionManager:
+    """文献后台处理管理器（本地进程池 + 任务队列）"""
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or config.INGESTION_MAX_WORKERS
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, Future] = {}
+        # 请求线程提交任务，进程池的回调线程清理记录
+        self._lock = threading.Lock()
+        # 本进程认领处理任务时使用的标识（主机名:进程ID:随机后缀）
+        self.owner_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        懒加载进程池；使用spawn启动，避免子进程继承父进程的数据库连接
+        工作进程内按页串行提取PDF（并行度由本进程池提供，不再嵌套创建PDF提取进程池）
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=disable_parallel_pdf_extraction
+            )
+        return self._executor
+
+    def submit(self, literature_id: str, update_title: bool = False) -> bool:
+        """
+        提交文献处理任务，立即返回
+
+        Args:
+            literature_id: 文献ID
+            update_title: 是否用提取出的标题覆盖当前标题
+
+        Returns:
+            bool: 是否提交成功（失败时文献保持pending状态，下次启动时会重新入队）
+        """
+        with self._lock:
+            existing = self._pending.get(literature_id)
+            if existing and not existing.done():
+                logger.info(f"文献已在处理队列中: {literature_id}")
+                return True
+
+            try:
+                future = self._get_executor().submit(run_ingestion_job, literature_id, update_title, self.owner_id)
+            except Exception as e:
+                logger.error(f"提交文献处理任务失败 {literature_id}: {e}")
+                return False
+
+            self._pending[literature_id] = future
+        # 回调可能在当前线程中立即执行（任务已完成时），需在释放锁之后注册
+        future.add_done_callback(lambda f, lit_id=literature_id: self._on_done(lit_id, f))
+        logger.info(f"文献处理任务已入队: {literature_id}")
+        return True
+
+    def _on_done(self, literature_id: str, future: Future) -> None:
+        """任务完成回调：清理队列记录并记录异常"""
+        with self._lock:
+            if self._pending.get(literature_id) is future:
+                self._pending.pop(literature_id, None)
+
+        error = future.exception()
+        if error:
+            logger.error(f"文献处理任务异常退出 {literature_id}: {error}")
+
+    def recover_unfinished(self, db: Session) -> int:
+        """
+        重新提交未完成的任务（服务重启时 pending/processing 状态的文献）
+        每个文献先原子地认领再提交：其他进程已认领且心跳未超时的文献跳过，多个进程同时启动时不会重复处理；
+        是否替换标题由文献的 extract_title 标记决定
+
+        Args:
+            db: 数据库会话
+
+        Returns:
+            int: 重新提交的任务数量
+        """
+        unfinished = db.query(Literature.id).filter(
+            Literature.status == 'active',
+            Literature.text_extraction_status.in_(['pending', 'processing'])
+        ).all()
+
+        submitted = 0
+        for (literature_id,) in unfinished:
+            claimed = claim_literature(literature_id, self.owner_id, db)
+            db.commit()
+            if claimed and self.submit(literature_id):
+                submitted += 1
+
+        if submitted:
+            logger.info(f"重新提交 {submitted} 个未完成的文献处理任务（共 {len(unfinished)} 个未完成）")
+        return submitted
+
+    def queue_size(self) -> int:
+        """当前排队或处理中的任务数量"""
+        with self._lock:
+            return sum(1 for future in self._pending.values() if not future.done())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None
+        with self._lock:
+            self._pending.clear()
+
+# 创建全局后台处理管理器实例
+ingestion_manager = IngestionManager()
+
+def submit_ingestion_job(literature_id: str, update_title: bool = False) -> bool:
+    """提交文献处理任务的便捷函数"""
+    return ingestion_manager.submit(literature_id, update_title)
@@ -0,0 +1,176 @@
+"""
+文献分析结果管理模块
+在文献处理完成时计算一次文本统计、关键词和质量问题并保存到 literature_analysis 表，
+分析接口直接读取保存的结果；文本块被修改时使结果失效，下次读取时重新计算。
+每个文本块的可合并分段结果保存在 chunk_analysis 表中，重新计算时只分析缺失或过期的文本块，
+再合并所有分段结果得到文献级结果，不需要重新拼接和分析全文
+"""
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from typing import Optional, Sequence
+from datetime import datetime
+import logging
+
+from app.config import config
+from app.models.literature import Literature
+from app.models.literature_analysis import ChunkAnalysis, LiteratureAnalysis
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+from app.utils.group_idf import group_idf_manager
+from app.utils.text_analyzer import ANALYZER_VERSION, text_analyzer
+
+logger = logging.getLogger(__name__)
+
+class LiteratureAnalysisManager:
+    """文献分析结果管理器"""
+
+    @staticmethod
+    def _update_chunk_partials(literature_id: str, db: Session) -> None:
+        """为缺少分段结果或分段结果已过期的文本块重新计算分段结果（分批分词）"""
+        stale = db.query(TextChunk.id, TextChunk.text).outerjoin(
+            ChunkAnalysis, ChunkAnalysis.chunk_id == TextChunk.id
+        ).filter(
+            TextChunk.literature_id == literature_id,
+            TextChunk.chunk_type != STAGING_CHUNK_TYPE,
+            (ChunkAnalysis.chunk_id.is_(None)) | (ChunkAnalysis.analyzer_version != ANALYZER_VERSION)
+        ).all()
+        if not stale:
+            return
+
+        batch_size = config.CHUNK_PERSIST_BATCH_SIZE
+        for start in range(0, len(stale), batch_size):
+            batch = stale[start:start + batch_size]
+            chunk_ids = [chunk_id for chunk_id, _ in batch]
+            db.query(ChunkAnalysis).filter(ChunkAnalysis.chunk_id.in_(chunk_ids)).delete()
+            partials = text_analyzer.analyze_chunks([text for _, text in batch])
+            db.execute(insert(ChunkAnalysis.__table__), [
+                {
+                    "chunk_id": chunk_id,
+                    "literature_id": literature_id,
+                    "analyzer_version": ANALYZER_VERSION,
+                    "computed_at": datetime.utcnow(),
+                    **partial
+                }
+                for chunk_id, partial in zip(chunk_ids, partials)
+            ])
+        logger.info(f"已重新分析文献 {literature_id} 的 {len(stale)} 个文本块")
+
+    @staticmethod
+    def compute_analysis(literature_id: str, db: Session) -> Optional[LiteratureAnalysis]:
+        """
+        重新计算文献的分析结果并保存（覆盖已有结果）：
+        只分析缺失或过期的文本块，再按文本块顺序合并所有分段结果；
+        合并得到的词频同时用于更新研究组关键词索引
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+
+        Returns:
+            Optional[LiteratureAnalysis]: 分析结果，文献没有文本块时返回None
+        """
+        LiteratureAnalysisManager._update_chunk_partials(literature_id, db)
+
+        partials = [
+            {"counters": counters, "lines": lines, "terms": terms}
+            for counters, lines, terms in db.query(
+                ChunkAnalysis.counters, ChunkAnalysis.lines, ChunkAnalysis.terms
+            ).join(TextChunk, TextChunk.id == ChunkAnalysis.chunk_id).filter(
+                TextChunk.literature_id == literature_id,
+                TextChunk.chunk_type != STAGING_CHUNK_TYPE
+            ).order_by(TextChunk.chunk_index)
+        ]
+
+        analysis = db.get(LiteratureAnalysis, literature_id)
+        if not partials:
+            if analysis is not None:
+                db.delete(analysis)
+            db.commit()
+            return None
+
+        merged = text_analyzer.merge_partials(partials)
+        statistics = text_analyzer.stats_from_merged(merged)
+        keywords = [
+            {"word": word, "weight": weight}
+            for word, weight in text_analyzer.keywords_from_merged(merged, top_k=config.ANALYSIS_KEYWORDS_TOP_K)
+        ]
+        quality_issues = text_analyzer.quality_issues_from_merged(merged)
+
+        if analysis is None:
+            analysis = LiteratureAnalysis(literature_id, ANALYZER_VERSION, statistics, keywords,
+                                          quality_issues, len(partials))
+            db.add(analysis)
+        else:
+            analysis.analyzer_version = ANALYZER_VERSION
+            analysis.statistics = statistics
+            analysis.keywords = keywords
+            analysis.quality_issues = quality_issues
+            analysis.chunk_count = len(partials)
+            analysis.computed_at = datetime.utcnow()
+
+        db.commit()
+        logger.info(f"文献分析结果已更新: {literature_id}")
+
+        # 更新研究组关键词索引；失败不影响分析结果，关键词接口会回退到保存的关键词
+        literature = db.get(Literature, literature_id)
+        if literature is not None and literature.status == 'active':
+            try:
+                group_idf_manager.add_literature(literature.research_group_id, literature_id, merged["terms"])
+            except Exception as e:
+                logger.warning(f"更新研究组关键词索引失败 {literature_id}: {e}")
+
+        return analysis
+
+    @staticmethod
+    def get_analysis(literature_id: str, db: Session) -> Optional[LiteratureAnalysis]:
+        """
+        获取文献的分析结果，没有保存的结果或分析逻辑版本已变化时重新计算
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+
+        Returns:
+            Optional[LiteratureAnalysis]: 分析结果，文献没有文本块时返回None
+        """
+        analysis = db.get(LiteratureAnalysis, literature_id)
+        if analysis is not None and analysis.analyzer_version == ANALYZER_VERSION:
+            return analysis
+        return LiteratureAnalysisManager.compute_analysis(literature_id, db)
+
+    @staticmethod
+    def invalidate_analysis(literature_id: str, db: Session, chunk_ids: Optional[Sequence[str]] = None) -> None:
+        """
+        使文献的分析结果失效（文本块被修改时调用，随调用方的事务一起提交）
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+            chunk_ids: 内容发生变化的文本块ID，为None时所有文本块的分段结果都失效
+        """
+        db.query(LiteratureAnalysis).filter(
+            LiteratureAnalysis.literature_id == literature_id
+        ).delete()
+
+        query = db.query(ChunkAnalysis).filter(ChunkAnalysis.literature_id == literature_id)
+        if chunk_ids is not None:
+            if not chunk_ids:
+                return
+            query = query.filter(ChunkAnalysis.chunk_id.in_(list(chunk_ids)))
+        query.delete()
+
+# 创建全局文献分析结果管理器实例
+literature_analysis_manager = LiteratureAnalysisManager()
+
+# 便捷函数
+def compute_literature_analysis(literature_id: str, db: Session) -> Optional[LiteratureAnalysis]:
+    """重新计算文献分析结果的便捷函数"""
+    return literature_analysis_manager.compute_analysis(literature_id, db)
+
+def get_literature_analysis(literature_id: str, db: Session) -> Optional[LiteratureAnalysis]:
+    """获取文献分析结果的便捷函数"""
+    return literature_analysis_manager.get_analysis(literature_id, db)
+
+def invalidate_literature_analysis(literature_id: str, db: Session, chunk_ids: Optional[Sequence[str]] = None) -> None:
+    """使文献分析结果失效的便捷函数"""
+    literature_analysis_manager.invalidate_analysis(literature_id, db, chunk_ids)
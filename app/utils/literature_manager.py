@@ -3,15 +3,19 @@
 负责文献的生命周期管理，包括软删除、恢复等功能
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
 from typing import List, Dict, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from app.models.literature import Literature
 from app.models.user import User
 from app.models.research_group import ResearchGroup
-from app.utils.auth_helper import verify_group_membership
+from app.utils.auth_helper import verify_group_membership, verify_group_membership_async
+from app.utils.group_idf import group_idf_manager
 
 logger = logging.getLogger(__name__)
 
@@ -63,6 +67,12 @@ class LiteratureManager:
             
             db.commit()
             
+            # 从研究组关键词索引的文档频率中移出（保留词频向量以便恢复）
+            try:
+                group_idf_manager.deactivate_literature(literature.research_group_id, literature_id)
+            except Exception as e:
+                logger.warning(f"更新研究组关键词索引失败 {literature_id}: {e}")
+            
             logger.info(f"文献软删除成功: {literature_id} by {user_id}")
             return True
             
@@ -115,6 +125,12 @@ class LiteratureManager:
             
             db.commit()
             
+            # 重新计入研究组关键词索引
+            try:
+                group_idf_manager.activate_literature(literature.research_group_id, literature_id)
+            except Exception as e:
+                logger.warning(f"更新研究组关键词索引失败 {literature_id}: {e}")
+            
             logger.info(f"文献恢复成功: {literature_id} by {user_id}")
             return True
             
@@ -238,6 +254,220 @@ class LiteratureManager:
                 "type_distribution": {}
             }
 
+    # ===== 异步版本：供 async def 路由通过 AsyncSession 查询，数据库I/O不阻塞事件循环 =====
+    
+    @staticmethod
+    async def soft_delete_literature_async(
+        literature_id: str, 
+        user_id: str, 
+        db: AsyncSession,
+        reason: str = None
+    ) -> bool:
+        """
+        软删除文献（异步版本）
+        
+        Args:
+            literature_id: 文献ID
+            user_id: 操作用户ID
+            db: 异步数据库会话
+            reason: 删除原因
+            
+        Returns:
+            bool: 删除是否成功
+        """
+        try:
+            literature = await db.scalar(select(Literature).where(
+                Literature.id == literature_id,
+                Literature.status == 'active'
+            ))
+            
+            if not literature:
+                logger.warning(f"文献不存在或已删除: {literature_id}")
+                return False
+            
+            if literature.uploaded_by != user_id:
+                if not await verify_group_membership_async(user_id, literature.research_group_id, db):
+                    logger.warning(f"用户 {user_id} 无权删除文献 {literature_id}")
+                    return False
+            
+            literature.status = 'deleted'
+            literature.deleted_at = datetime.utcnow()
+            literature.deleted_by = user_id
+            literature.delete_reason = reason
+            
+            await db.commit()
+            
+            # 研究组关键词索引读写磁盘文件，在线程池中执行
+            try:
+                await asyncio.to_thread(
+                    group_idf_manager.deactivate_literature, literature.research_group_id, literature_id
+                )
+            except Exception as e:
+                logger.warning(f"更新研究组关键词索引失败 {literature_id}: {e}")
+            
+            logger.info(f"文献软删除成功: {literature_id} by {user_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"文献软删除失败: {e}")
+            await db.rollback()
+            return False
+    
+    @staticmethod
+    async def restore_literature_async(
+        literature_id: str, 
+        user_id: str, 
+        db: AsyncSession
+    ) -> bool:
+        """
+        恢复已删除的文献（异步版本）
+        
+        Args:
+            literature_id: 文献ID
+            user_id: 操作用户ID
+            db: 异步数据库会话
+            
+        Returns:
+            bool: 恢复是否成功
+        """
+        try:
+            literature = await db.scalar(select(Literature).where(
+                Literature.id == literature_id,
+                Literature.status == 'deleted'
+            ))
+            
+            if not literature:
+                logger.warning(f"文献不存在或未删除: {literature_id}")
+                return False
+            
+            if literature.deleted_by != user_id:
+                if not await verify_group_membership_async(user_id, literature.research_group_id, db):
+                    logger.warning(f"用户 {user_id} 无权恢复文献 {literature_id}")
+                    return False
+            
+            literature.status = 'active'
+            literature.deleted_at = None
+            literature.deleted_by = None
+            literature.delete_reason = None
+            literature.restored_at = datetime.utcnow()
+            literature.restored_by = user_id
+            
+            await db.commit()
+            
+            try:
+                await asyncio.to_thread(
+                    group_idf_manager.activate_literature, literature.research_group_id, literature_id
+                )
+            except Exception as e:
+                logger.warning(f"更新研究组关键词索引失败 {literature_id}: {e}")
+            
+            logger.info(f"文献恢复成功: {literature_id} by {user_id}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"文献恢复失败: {e}")
+            await db.rollback()
+            return False
+    
+    @staticmethod
+    async def get_deleted_literature_async(
+        group_id: str, 
+        user_id: str, 
+        db: AsyncSession
+    ) -> List[Dict]:
+        """
+        获取研究组的已删除文献列表（异步版本，上传者和删除者用户名在同一条查询中读取）
+        
+        Args:
+            group_id: 研究组ID
+            user_id: 用户ID
+            db: 异步数据库会话
+            
+        Returns:
+            List[Dict]: 已删除文献列表
+        """
+        try:
+            if not await verify_group_membership_async(user_id, group_id, db):
+                logger.warning(f"用户 {user_id} 无权查看研究组 {group_id} 的删除文献")
+                return []
+            
+            uploader = aliased(User)
+            deleter = aliased(User)
+            rows = await db.execute(select(Literature, uploader.username, deleter.username).join(
+                uploader, Literature.uploaded_by == uploader.id
+            ).outerjoin(
+                deleter, Literature.deleted_by == deleter.id
+            ).where(
+                Literature.research_group_id == group_id,
+                Literature.status == 'deleted'
+            ).order_by(Literature.deleted_at.desc()))
+            
+            return [
+                {
+                    "id": lit.id,
+                    "title": lit.title,
+                    "filename": lit.filename,
+                    "file_size": lit.file_size,
+                    "file_type": lit.file_type,
+                    "upload_time": lit.upload_time,
+                    "uploader_name": uploader_name,
+                    "deleted_at": lit.deleted_at,
+                    "deleted_by": deleter_name or "未知",
+                    "delete_reason": lit.delete_reason
+                }
+                for lit, uploader_name, deleter_name in rows
+            ]
+            
+        except Exception as e:
+            logger.error(f"获取删除文献列表失败: {e}")
+            return []
+    
+    @staticmethod
+    async def get_literature_statistics_async(group_id: str, db: AsyncSession) -> Dict:
+        """
+        获取研究组文献统计信息（异步版本）
+        
+        Args:
+            group_id: 研究组ID
+            db: 异步数据库会话
+            
+        Returns:
+            Dict: 统计信息
+        """
+        try:
+            # 按状态和文件类型分组，一条查询得到数量和文件大小
+            rows = (await db.execute(select(
+                Literature.status,
+                Literature.file_type,
+                func.count(Literature.id),
+                func.coalesce(func.sum(Literature.file_size), 0)
+            ).where(
+                Literature.research_group_id == group_id,
+                Literature.status.in_(['active', 'deleted'])
+            ).group_by(Literature.status, Literature.file_type))).all()
+            
+            active = [(file_type, count, size) for status, file_type, count, size in rows if status == 'active']
+            active_count = sum(count for _, count, _ in active)
+            deleted_count = sum(count for status, _, count, _ in rows if status == 'deleted')
+            
+            return {
+                "active_count": active_count,
+                "deleted_count": deleted_count,
+                "total_count": active_count + deleted_count,
+                "total_size": sum(size for _, _, size in active),
+                "type_distribution": {file_type: count for file_type, count, _ in active}
+            }
+            
+        except Exception as e:
+            logger.error(f"获取文献统计失败: {e}")
+            return {
+                "active_count": 0,
+                "deleted_count": 0,
+                "total_count": 0,
+                "total_size": 0,
+                "type_distribution": {}
+            }
+
 # 创建全局文献管理器实例
 literature_manager = LiteratureManager()
 
@@ -255,4 +485,20 @@ def get_deleted_literature(group_id: str, user_id: str, db: Session) -> List[Dic
 
 def get_literature_stats(group_id: str, db: Session) -> Dict:
     """获取文献统计的便捷函数"""
-    return literature_manager.get_literature_statistics(group_id, db)
\ No newline at end of file
+    return literature_manager.get_literature_statistics(group_id, db)
+
+async def soft_delete_literature_async(literature_id: str, user_id: str, db: AsyncSession, reason: str = None) -> bool:
+    """软删除文献的便捷函数（异步版本）"""
+    return await literature_manager.soft_delete_literature_async(literature_id, user_id, db, reason)
+
+async def restore_literature_async(literature_id: str, user_id: str, db: AsyncSession) -> bool:
+    """恢复文献的便捷函数（异步版本）"""
+    return await literature_manager.restore_literature_async(literature_id, user_id, db)
+
+async def get_deleted_literature_async(group_id: str, user_id: str, db: AsyncSession) -> List[Dict]:
+    """获取删除文献列表的便捷函数（异步版本）"""
+    return await literature_manager.get_deleted_literature_async(group_id, user_id, db)
+
+async def get_literature_stats_async(group_id: str, db: AsyncSession) -> Dict:
+    """获取文献统计的便捷函数（异步版本）"""
+    return await literature_manager.get_literature_statistics_async(group_id, db)
@@ -0,0 +1,125 @@
+"""
+游标分页工具
+列表接口按排序键做键集分页（WHERE 排序键 > 上一页最后一行 ORDER BY 排序键 LIMIT n），
+每页的查询代价与页码无关；游标对客户端不透明，只需原样传回
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, or_
+from sqlalchemy.orm import Query
+
+from app.models.literature import Literature
+from app.models.text_chunk import TextChunk
+from app.utils.error_handler import ValidationError
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    将上一页最后一行的排序键编码为游标（时间值按ISO格式保存）
+
+    Args:
+        values: 排序键字段 -> 值
+
+    Returns:
+        str: URL安全的游标字符串
+    """
+    payload = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in values.items()
+    }
+    raw = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, fields: Sequence[str], datetime_fields: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    解码游标
+
+    Args:
+        cursor: encode_cursor 生成的游标
+        fields: 游标必须包含的字段
+        datetime_fields: 需要还原为datetime的字段
+
+    Returns:
+        Dict[str, Any]: 排序键字段 -> 值
+
+    Raises:
+        ValidationError: 游标格式无效
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw.decode("utf-8"))
+        if not isinstance(values, dict) or any(field not in values for field in fields):
+            raise ValueError("缺少排序键字段")
+        for field in datetime_fields:
+            values[field] = datetime.fromisoformat(values[field])
+        return values
+    except (ValueError, TypeError) as e:
+        raise ValidationError(f"无效的分页游标: {e}", "INVALID_CURSOR")
+
+def paginate_literature(query: Query, limit: int, cursor: Optional[str] = None) -> Query:
+    """
+    文献列表按上传时间倒序分页：键为 (upload_time, id)，上传时间相同时按ID倒序
+
+    Args:
+        query: 以 Literature 为第一个实体、已添加过滤条件的查询
+        limit: 每页数量
+        cursor: 上一页的 next_cursor
+
+    Returns:
+        Query: 多取一行的分页查询，结果交给 split_page 处理
+
+    Raises:
+        ValidationError: 游标格式无效
+    """
+    if cursor:
+        position = decode_cursor(cursor, ["upload_time", "id"], datetime_fields=["upload_time"])
+        # 从上一页最后一篇文献之后继续读取
+        query = query.filter(or_(
+            Literature.upload_time < position["upload_time"],
+            (Literature.upload_time == position["upload_time"]) & (Literature.id < position["id"])
+        ))
+    return query.order_by(Literature.upload_time.desc(), Literature.id.desc()).limit(limit + 1)
+
+def paginate_chunks(statement: Select, limit: int, cursor: Optional[str] = None, skip: int = 0) -> Select:
+    """
+    文本块列表按 chunk_index 分页；有游标时从上一页最后一块之后继续读取，否则按skip偏移
+
+    Args:
+        statement: 已添加过滤条件的 select(TextChunk)
+        limit: 每页数量
+        cursor: 上一页的 next_cursor
+        skip: 没有游标时跳过的文本块数量
+
+    Returns:
+        Select: 多取一行的分页查询，结果交给 split_page 处理
+
+    Raises:
+        ValidationError: 游标格式无效
+    """
+    if cursor:
+        position = decode_cursor(cursor, ["chunk_index"])
+        statement = statement.where(TextChunk.chunk_index > position["chunk_index"])
+    else:
+        statement = statement.offset(skip)
+    return statement.order_by(TextChunk.chunk_index).limit(limit + 1)
+
+def split_page(rows: Sequence[Any], limit: int, cursor_values: Callable[[Any], Dict[str, Any]]) -> Tuple[List[Any], Optional[str]]:
+    """
+    截取一页结果并生成下一页的游标（分页查询多取一行，用于判断是否还有下一页）
+
+    Args:
+        rows: 分页查询的结果
+        limit: 每页数量
+        cursor_values: 由一页最后一行取得排序键的函数
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (本页的行, 下一页的游标，没有下一页时为None)
+    """
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(cursor_values(rows[-1]))
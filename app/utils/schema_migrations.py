@@ -0,0 +1,174 @@
+"""
+数据库结构迁移模块
+按版本号顺序执行迁移，已执行的版本记录在 schema_migrations 表中；
+应用启动时调用 upgrade_database，新数据库和旧版本数据库（如只有早期 literature 表字段的数据库）都升级到最新结构。
+每个迁移只在对象不存在时才创建表、字段和索引，可以在 create_all 建立的数据库上重复执行
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import logging
+
+from sqlalchemy import Boolean, Column, DateTime, Integer, MetaData, String, Table, Text, inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.types import TypeEngine
+
+from app.models import User, ResearchGroup, UserResearchGroup, Literature
+from app.models.text_chunk import TextChunk
+from app.models.literature_analysis import LiteratureAnalysis, ChunkAnalysis
+from app.models.chunk_summary import ChunkSummary
+
+logger = logging.getLogger(__name__)
+
+# 迁移记录表（不属于模型的 Base.metadata）
+_migration_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False)
+)
+
+@dataclass(frozen=True)
+class Migration:
+    """一个结构迁移"""
+    version: int
+    description: str
+    upgrade: Callable[[Connection], None]
+
+def _create_tables(conn: Connection, *tables: Table) -> None:
+    """创建不存在的表（连同表上声明的索引）"""
+    for table in tables:
+        table.create(conn, checkfirst=True)
+
+def _add_columns(conn: Connection, table_name: str, columns: List[Tuple[str, TypeEngine, str]]) -> None:
+    """
+    为已有表添加缺少的字段
+
+    Args:
+        conn: 数据库连接
+        table_name: 表名
+        columns: (字段名, 字段类型, 附加约束SQL) 列表
+    """
+    existing = {column["name"] for column in inspect(conn).get_columns(table_name)}
+    for name, column_type, constraint in columns:
+        if name in existing:
+            continue
+        ddl = f"ALTER TABLE {table_name} ADD COLUMN {name} {column_type.compile(dialect=conn.dialect)}"
+        conn.exec_driver_sql(f"{ddl} {constraint}".rstrip())
+        logger.info(f"添加字段: {table_name}.{name}")
+
+def _create_indexes(conn: Connection, table: Table, *names: str) -> None:
+    """按名称创建模型上声明、数据库中还不存在的索引"""
+    indexes = {index.name: index for index in table.indexes}
+    for name in names:
+        indexes[name].create(conn, checkfirst=True)
+
+def _create_base_tables(conn: Connection) -> None:
+    _create_tables(conn, User.__table__, ResearchGroup.__table__, UserResearchGroup.__table__,
+                   Literature.__table__, TextChunk.__table__)
+
+def _add_literature_columns(conn: Connection) -> None:
+    # 原 test/update_literature_table.py 中的字段
+    _add_columns(conn, "literature", [
+        ("deleted_at", DateTime(), ""),
+        ("deleted_by", String(), ""),
+        ("delete_reason", Text(), ""),
+        ("restored_at", DateTime(), ""),
+        ("restored_by", String(), ""),
+        ("file_hash", String(64), ""),
+        ("text_extraction_status", String(), "NOT NULL DEFAULT 'pending'"),
+        ("text_extraction_error", Text(), "")
+    ])
+    _create_indexes(conn, Literature.__table__, "ix_literature_file_hash")
+
+def _create_analysis_tables(conn: Connection) -> None:
+    _create_tables(conn, LiteratureAnalysis.__table__, ChunkAnalysis.__table__, ChunkSummary.__table__)
+
+def _create_hot_query_indexes(conn: Connection) -> None:
+    _create_indexes(conn, Literature.__table__, "ix_literature_group_status_upload", "ix_literature_uploaded_by")
+    _create_indexes(conn, TextChunk.__table__, "ix_text_chunks_literature_chunk_index", "ix_text_chunks_embedding_status")
+    _create_indexes(conn, UserResearchGroup.__table__, "ix_user_research_groups_group_id")
+
+def _add_ingestion_claim_columns(conn: Connection) -> None:
+    _add_columns(conn, "literature", [
+        ("extract_title", Boolean(), "NOT NULL DEFAULT FALSE"),
+        ("extraction_owner", String(), ""),
+        ("extraction_heartbeat_at", DateTime(), "")
+    ])
+
+# 迁移列表（按版本号递增，只能追加，不能修改已发布的迁移）
+MIGRATIONS: List[Migration] = [
+    Migration(1, "创建用户、研究组、成员关系、文献和文本块表", _create_base_tables),
+    Migration(2, "文献表添加软删除、内容摘要和文本处理状态字段", _add_literature_columns),
+    Migration(3, "创建文献分析、文本块分析和文本块汇总表", _create_analysis_tables),
+    Migration(4, "为研究组文献列表、上传者、文本块和成员关系的查询条件创建索引", _create_hot_query_indexes),
+    Migration(5, "文献表添加标题提取标记和后台处理任务的认领字段", _add_ingestion_claim_columns),
+]
+
+class SchemaMigrationManager:
+    """数据库结构迁移管理器"""
+
+    def __init__(self, migrations: Optional[List[Migration]] = None):
+        self.migrations = sorted(migrations or MIGRATIONS, key=lambda migration: migration.version)
+
+    @staticmethod
+    def get_version(engine: Engine) -> int:
+        """
+        获取数据库当前的结构版本
+
+        Args:
+            engine: 数据库引擎
+
+        Returns:
+            int: 已执行的最大迁移版本号，未执行过迁移时为0
+        """
+        with engine.connect() as conn:
+            if not inspect(conn).has_table(schema_migrations.name):
+                return 0
+            versions = conn.execute(schema_migrations.select().with_only_columns(schema_migrations.c.version)).scalars()
+            return max(versions, default=0)
+
+    def upgrade(self, engine: Engine) -> List[int]:
+        """
+        执行所有未执行的迁移，每个迁移和它的版本记录在同一个事务中提交
+
+        Args:
+            engine: 数据库引擎
+
+        Returns:
+            List[int]: 本次执行的迁移版本号
+        """
+        with engine.begin() as conn:
+            schema_migrations.create(conn, checkfirst=True)
+
+        current = self.get_version(engine)
+        applied = []
+        for migration in self.migrations:
+            if migration.version <= current:
+                continue
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version,
+                    description=migration.description,
+                    applied_at=datetime.utcnow()
+                ))
+            applied.append(migration.version)
+            logger.info(f"数据库迁移 {migration.version} 已执行: {migration.description}")
+
+        return applied
+
+# 创建全局迁移管理器实例
+schema_migration_manager = SchemaMigrationManager()
+
+# 便捷函数
+def upgrade_database(engine: Engine) -> List[int]:
+    """将数据库升级到最新结构的便捷函数"""
+    return schema_migration_manager.upgrade(engine)
+
+def get_schema_version(engine: Engine) -> int:
+    """获取数据库结构版本的便捷函数"""
+    return schema_migration_manager.get_version(engine)
@@ -0,0 +1,275 @@
+"""
+中文分词服务
+统一管理jieba分词器：启动时加载一次词典（使用持久化的词典缓存），加载研究领域用户词典，
+大文档按行切分后多进程并行分词；token计数和关键词提取共用同一个分词器。
+安装了 jieba_fast 时使用其C扩展实现的分词器，分词结果与jieba相同
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import jieba
+
+try:
+    # jieba_fast 用C扩展实现了前缀词典DAG、动态规划和HMM，接口与jieba相同，分词速度约为两倍
+    import jieba_fast
+except ImportError:
+    jieba_fast = None
+
+from app.config import config
+
+logger = logging.getLogger(__name__)
+
+# 分词器实现
+TOKENIZER_BACKEND = "jieba_fast" if jieba_fast is not None else "jieba"
+_TOKENIZER_CLASS = jieba_fast.Tokenizer if jieba_fast is not None else jieba.Tokenizer
+
+# jieba 精确模式划分中文段和其他字符所用的正则（jieba_fast 的中文段不含连字符，统一使用jieba的划分）
+_RE_HAN = jieba.re_han_default
+_RE_SKIP = jieba.re_skip_default
+
+# jieba.Tokenizer.cut 在精确模式、HMM下对每个中文段调用的方法；这是jieba的私有方法，
+# requirements.txt 固定了jieba和jieba_fast的版本，加载词典时检查该方法存在且分词结果与 lcut 一致
+_CUT_HAN_METHOD = "_Tokenizer__cut_DAG"
+_SELF_CHECK_TEXT = "我们在协同文献库中使用深度学习模型，Deep learning 3.5%。\n"
+
+class SegmenterCompatibilityError(RuntimeError):
+    """已安装的jieba/jieba_fast版本与按中文段分词的实现不兼容"""
+
+# 工作进程内的分词器实例（由进程池初始化函数创建）
+_worker_segmenter = None
+
+def _init_worker(user_dict_path: Optional[str], cache_dir: Optional[str]) -> None:
+    """并行分词工作进程的初始化：加载与主进程相同的词典"""
+    global _worker_segmenter
+    _worker_segmenter = Segmenter(user_dict_path, cache_dir, parallel_threshold=0)
+    _worker_segmenter.initialize()
+
+def _cut_block(text: str) -> List[str]:
+    """在工作进程中对一段文本分词"""
+    return _worker_segmenter.cut_serial(text)
+
+class Segmenter:
+    """
+    jieba分词管理器
+
+    使用独立的 jieba.Tokenizer 实例而不是模块级的默认分词器，
+    词典缓存文件保存在 SEGMENTER_CACHE_DIR 下，重启后直接反序列化，无需重新构建前缀词典。
+    jieba 自带的 enable_parallel 会替换模块级函数且只支持默认分词器，
+    这里改为在进程池中按行分块分词，结果与串行分词完全一致（换行符本身就是jieba的分词边界）。
+
+    串行分词按jieba精确模式（HMM）的规则先把文本划分为中文段（连续的中文、字母、数字等）和其他字符，
+    各中文段独立分词，因此每个中文段的分词结果可以按内容缓存：英文单词、数字和常用短语在文档中反复出现，
+    只需分词一次。结果与 jieba.Tokenizer.lcut 完全相同
+    """
+
+    def __init__(
+        self,
+        user_dict_path: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        parallel_threshold: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        block_cache_size: Optional[int] = None
+    ):
+        """
+        Args:
+            user_dict_path: 用户词典路径（jieba词典格式：词语 [词频] [词性]）
+            cache_dir: 词典缓存目录
+            parallel_threshold: 文本长度达到该值时使用多进程分词，0表示不启用
+            max_workers: 并行分词的进程数
+            block_cache_size: 缓存分词结果的中文段数量上限，超出时清空重新缓存
+        """
+        self.user_dict_path = user_dict_path if user_dict_path is not None else config.SEGMENTER_USER_DICT
+        self.cache_dir = cache_dir if cache_dir is not None else config.SEGMENTER_CACHE_DIR
+        self.parallel_threshold = (parallel_threshold if parallel_threshold is not None
+                                   else config.SEGMENTER_PARALLEL_THRESHOLD)
+        self.max_workers = max_workers or config.SEGMENTER_PARALLEL_WORKERS
+        self.block_cache_size = block_cache_size or config.SEGMENTER_BLOCK_CACHE_SIZE
+        self._block_words: Dict[str, List[str]] = {}
+        self._tokenizer = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def initialize(self) -> None:
+        """加载词典和用户词典（重复调用无副作用）"""
+        if self._tokenizer is not None:
+            return
+
+        with self._lock:
+            if self._tokenizer is not None:
+                return
+
+            tokenizer = _TOKENIZER_CLASS()
+            if self.cache_dir:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tokenizer.tmp_dir = self.cache_dir
+            tokenizer.initialize()
+
+            if self.user_dict_path:
+                if os.path.exists(self.user_dict_path):
+                    tokenizer.load_userdict(self.user_dict_path)
+                    logger.info(f"已加载用户词典: {self.user_dict_path}")
+                else:
+                    logger.warning(f"用户词典不存在: {self.user_dict_path}")
+
+            self._check_tokenizer(tokenizer)
+            self._tokenizer = tokenizer
+
+    def _check_tokenizer(self, tokenizer) -> None:
+        """
+        检查分词器提供按中文段分词的方法，且按中文段分词的结果与 lcut 相同
+
+        Raises:
+            SegmenterCompatibilityError: jieba版本变化导致私有方法缺失或行为改变
+        """
+        cut_han = getattr(tokenizer, _CUT_HAN_METHOD, None)
+        if not callable(cut_han):
+            raise SegmenterCompatibilityError(
+                f"{type(tokenizer).__module__}.Tokenizer 缺少 {_CUT_HAN_METHOD}，"
+                f"请安装 requirements.txt 中固定的jieba/jieba_fast版本"
+            )
+
+        words = self._cut_with(cut_han, _SELF_CHECK_TEXT, {})
+        expected = tokenizer.lcut(_SELF_CHECK_TEXT)
+        if words != expected:
+            raise SegmenterCompatibilityError(
+                f"{type(tokenizer).__module__}.Tokenizer 的按中文段分词结果与 lcut 不一致: {words} != {expected}"
+            )
+
+    @property
+    def tokenizer(self) -> jieba.Tokenizer:
+        """已加载词典的jieba分词器（jieba.Tokenizer 或 jieba_fast.Tokenizer）"""
+        self.initialize()
+        return self._tokenizer
+
+    def cut_serial(self, text: str) -> List[str]:
+        """
+        在当前进程中分词，结果与 jieba.Tokenizer.lcut(text) 相同
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            List[str]: 分词结果
+        """
+        return self._cut_with(getattr(self.tokenizer, _CUT_HAN_METHOD), text, self._block_words)
+
+    def _cut_with(self, cut_han, text: str, block_words: Dict[str, List[str]]) -> List[str]:
+        """按jieba精确模式的规则划分中文段和其他字符，中文段用 cut_han 分词并按内容缓存"""
+        words: List[str] = []
+        for block in _RE_HAN.split(text):
+            if not block:
+                continue
+            if _RE_HAN.match(block):
+                cached = block_words.get(block)
+                if cached is None:
+                    if len(block_words) >= self.block_cache_size:
+                        block_words.clear()
+                    cached = block_words[block] = list(cut_han(block))
+                words.extend(cached)
+            else:
+                for piece in _RE_SKIP.split(block):
+                    if _RE_SKIP.match(piece):
+                        words.append(piece)
+                    else:
+                        words.extend(piece)
+        return words
+
+    def cut(self, text: str) -> List[str]:
+        """
+        对文本分词
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            List[str]: 分词结果
+        """
+        if not text:
+            return []
+
+        if self._parallel_enabled() and len(text) >= self.parallel_threshold:
+            blocks = self._split_blocks(text)
+            if len(blocks) > 1:
+                try:
+                    return self._cut_parallel(blocks)
+                except Exception as e:
+                    logger.warning(f"并行分词失败，改为串行分词: {e}")
+
+        return self.cut_serial(text)
+
+    def cut_many(self, texts: List[str]) -> List[List[str]]:
+        """
+        对多段文本分别分词（如一篇文档的各个文本块）
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            List[List[str]]: 与输入顺序一致的分词结果
+        """
+        if self._parallel_enabled() and len(texts) > 1 and sum(map(len, texts)) >= self.parallel_threshold:
+            try:
+                chunksize = max(len(texts) // (self.max_workers * 4), 1)
+                return list(self._get_executor().map(_cut_block, texts, chunksize=chunksize))
+            except Exception as e:
+                logger.warning(f"并行分词失败，改为串行分词: {e}")
+
+        return [self.cut_serial(text) if text else [] for text in texts]
+
+    def _parallel_enabled(self) -> bool:
+        """是否启用多进程分词（只有一个工作进程时并行没有收益）"""
+        return bool(self.parallel_threshold) and self.max_workers > 1
+
+    def _split_blocks(self, text: str) -> List[str]:
+        """在换行符之后把文本切成长度大致相同的若干块"""
+        target = max(len(text) // (self.max_workers * 4), 1)
+        blocks = []
+        start = 0
+        while start < len(text):
+            newline = text.find("\n", start + target)
+            if newline == -1:
+                blocks.append(text[start:])
+                break
+            blocks.append(text[start:newline + 1])
+            start = newline + 1
+        return blocks
+
+    def _cut_parallel(self, blocks: List[str]) -> List[str]:
+        """在进程池中分词并按原顺序拼接结果"""
+        words: List[str] = []
+        for block_words in self._get_executor().map(_cut_block, blocks):
+            words.extend(block_words)
+        return words
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """懒加载进程池；使用spawn启动，工作进程从词典缓存加载词典"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.user_dict_path, self.cache_dir)
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        """关闭并行分词进程池"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+# 创建全局分词器实例
+segmenter = Segmenter()
+
+def cut_words(text: str) -> List[str]:
+    """分词的便捷函数"""
+    return segmenter.cut(text)
+
+def warm_up_segmenter() -> None:
+    """预加载分词词典的便捷函数（在服务启动时调用，jieba版本不兼容时抛出 SegmenterCompatibilityError）"""
+    segmenter.initialize()
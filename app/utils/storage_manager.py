@@ -18,6 +18,7 @@ class StorageManager:
     
     def __init__(self):
         self.upload_root = Path(config.UPLOAD_ROOT_DIR)
+        self.blob_root = Path(config.get_blob_dir())
     
     def ensure_group_directory(self, group_id: str) -> str:
         """
@@ -35,6 +36,67 @@ class StorageManager:
         logger.info(f"确保研究组目录存在: {group_dir}")
         return str(group_dir)
     
+    def ensure_blob_directory(self) -> str:
+        """
+        确保blob存储目录存在
+        
+        Returns:
+            str: 目录路径
+        """
+        self.blob_root.mkdir(parents=True, exist_ok=True)
+        return str(self.blob_root)
+    
+    def get_blob_path(self, digest: str) -> Path:
+        """
+        获取内容摘要对应的blob路径（按摘要前两位分桶，避免单目录文件过多）
+        
+        Args:
+            digest: 文件的SHA-256十六进制摘要
+            
+        Returns:
+            Path: blob文件路径
+        """
+        return self.blob_root / digest[:2] / digest
+    
+    def store_blob(self, tmp_path: str, digest: str) -> Tuple[str, bool]:
+        """
+        将临时文件存入blob存储；若相同内容已存在则丢弃临时文件
+        
+        Args:
+            tmp_path: 已写完的临时文件路径（需与blob目录在同一文件系统）
+            digest: 文件的SHA-256十六进制摘要
+            
+        Returns:
+            Tuple[str, bool]: (blob路径, 是否为新写入的blob)
+        """
+        blob_path = self.get_blob_path(digest)
+        
+        if blob_path.exists():
+            os.remove(tmp_path)
+            logger.info(f"命中已有blob，跳过写入: {digest}")
+            return str(blob_path), False
+        
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        logger.info(f"写入新blob: {blob_path}")
+        return str(blob_path), True
+    
+    def link_blob(self, blob_path: str, target_path: str) -> None:
+        """
+        将blob链接到研究组目录中的目标路径
+        优先使用硬链接（不占用额外空间），文件系统不支持时退回复制
+        
+        Args:
+            blob_path: blob文件路径
+            target_path: 研究组目录中的目标路径
+        """
+        Path(target_path).parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob_path, target_path)
+        except OSError as e:
+            logger.warning(f"硬链接失败，改为复制文件: {e}")
+            shutil.copy2(blob_path, target_path)
+    
     def get_group_directory_info(self, group_id: str) -> Dict:
         """
         获取研究组目录信息
@@ -139,7 +201,7 @@ class StorageManager:
         total_size = 0
         
         for group_dir in self.upload_root.iterdir():
-            if group_dir.is_dir():
+            if group_dir.is_dir() and group_dir.name != config.BLOB_DIR_NAME:
                 group_info = self.get_group_directory_info(group_dir.name)
                 groups.append({
                     "group_id": group_dir.name,
@@ -169,7 +231,7 @@ class StorageManager:
             return cleaned_dirs
         
         for group_dir in self.upload_root.iterdir():
-            if group_dir.is_dir():
+            if group_dir.is_dir() and group_dir.name != config.BLOB_DIR_NAME:
                 # 检查目录是否为空
                 if not any(group_dir.iterdir()):
                     try:
@@ -227,6 +289,18 @@ def get_unique_filename(group_id: str, filename: str) -> str:
     """获取唯一文件名的便捷函数"""
     return storage_manager.generate_unique_filename(group_id, filename)
 
+def ensure_blob_directory() -> str:
+    """确保blob存储目录存在的便捷函数"""
+    return storage_manager.ensure_blob_directory()
+
+def store_blob(tmp_path: str, digest: str) -> Tuple[str, bool]:
+    """存入blob的便捷函数"""
+    return storage_manager.store_blob(tmp_path, digest)
+
+def link_blob(blob_path: str, target_path: str) -> None:
+    """链接blob到研究组目录的便捷函数"""
+    storage_manager.link_blob(blob_path, target_path)
+
 def get_storage_stats() -> Dict:
     """获取存储统计的便捷函数"""
     return storage_manager.get_storage_statistics()
@@ -1 +1,507 @@
- 
\ No newline at end of file
+"""
+文本分析工具
+基于NumPy和scikit-learn实现文本统计、关键词提取、质量检测和文本标准化
+"""
+
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+
+from app.config import config
+from app.utils.segmenter import segmenter
+from app.utils.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# 分析逻辑版本号：修改统计、关键词或质量检测方式（影响输出结果）时必须递增，用于预计算结果失效
+ANALYZER_VERSION = 2
+
+# 字符类别
+CHAR_OTHER = 0
+CHAR_CJK = 1  # 中文字符
+CHAR_LETTER = 2  # 其他文字的字母（英文等）
+CHAR_DIGIT = 3
+CHAR_SPACE = 4
+CHAR_PUNCT = 5  # 标点和符号
+CHAR_GARBLED = 6  # 控制字符、替换字符、私用区字符等提取异常产生的字符
+CHAR_CLASS_COUNT = 7
+
+def _from_codepoints(codes: np.ndarray) -> str:
+    """将小端序的码位数组转换为字符串（与 _codepoints 相反）"""
+    return codes.tobytes().decode("utf-32-le", errors="surrogatepass")
+
+def _char_mask(predicate, chars: str) -> np.ndarray:
+    """对字符串中的每个字符求布尔判断（map 在C层迭代，不逐字符执行Python代码）"""
+    return np.fromiter(map(predicate, chars), dtype=bool, count=len(chars))
+
+def _build_char_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """
+    构建基本多文种平面（U+0000~U+FFFF）的字符类别表和句末标点表
+    码位范围用数组比较得到，空白、数字、字母按字符方法批量判断；只有剩余的约3000个字符需要查询Unicode类别
+    """
+    codes = np.arange(0x10000, dtype="<u4")
+    bmp = _from_codepoints(codes)
+    control = (codes < 0x20) | ((codes >= 0x7F) & (codes <= 0x9F))  # Unicode类别 Cc
+    garbled = control | (codes == 0xFFFD) | ((codes >= 0xE000) & (codes <= 0xF8FF)) | ((codes >= 0xD800) & (codes <= 0xDFFF))
+
+    # 按优先级从低到高赋值，后赋值的类别覆盖先赋值的类别
+    classes = np.zeros(0x10000, dtype=np.uint8)
+    classes[garbled] = CHAR_GARBLED
+    classes[_char_mask(str.isalpha, bmp)] = CHAR_LETTER
+    classes[_char_mask(str.isdigit, bmp)] = CHAR_DIGIT
+    classes[_char_mask(str.isspace, bmp)] = CHAR_SPACE
+    classes[(codes >= 0x4E00) & (codes <= 0x9FFF)] = CHAR_CJK
+
+    remaining = np.flatnonzero(classes == CHAR_OTHER)
+    punct = _char_mask(lambda char: unicodedata.category(char)[0] in "PS", _from_codepoints(codes[remaining]))
+    classes[remaining[punct]] = CHAR_PUNCT
+
+    sentence_end = np.zeros(0x10000, dtype=bool)
+    sentence_end[[ord(char) for char in "。！？!?"]] = True
+    return classes, sentence_end
+
+_CHAR_CLASSES, _SENTENCE_END = _build_char_tables()
+
+# 可合并计数的字段：各字符类别的数量（与类别编号顺序一致）和其他计数
+_CLASS_FIELDS = ("other", "cjk", "letter", "digit", "space", "punct", "garbled")
+_COUNTER_FIELDS = _CLASS_FIELDS + (
+    "pieces", "chars", "english_words", "sentence_ends", "sentence_tail",
+    "lines", "paragraphs", "long_run_chars", "hyphenation"
+)
+
+# 英文句点只有在后面是空白或文本结尾时才算句末（排除小数点、缩写中间的点）
+_PERIOD = ord(".")
+
+# 文本标准化：全角字母数字转半角，特殊空白转普通空格，删除零宽字符和控制字符（保留中文标点）
+_NORMALIZE_TABLE = {code: code - 0xFEE0 for code in range(0xFF10, 0xFF1A)}
+_NORMALIZE_TABLE.update({code: code - 0xFEE0 for code in range(0xFF21, 0xFF3B)})
+_NORMALIZE_TABLE.update({code: code - 0xFEE0 for code in range(0xFF41, 0xFF5B)})
+_NORMALIZE_TABLE.update({0x3000: " ", 0x00A0: " ", 0x000B: "\n", 0x000C: "\n"})
+_NORMALIZE_TABLE.update({code: None for code in (0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF)})
+_NORMALIZE_TABLE.update({
+    code: None for code in list(range(0x00, 0x20)) + [0x7F]
+    if chr(code) not in "\t\n\r\x0b\x0c"
+})
+
+_HORIZONTAL_SPACE = re.compile(r'[ \t]+')
+_SPACE_AROUND_NEWLINE = re.compile(r' ?\n ?')
+_BLANK_LINES = re.compile(r'\n{3,}')
+_PARAGRAPH_BREAK = re.compile(r'\n\s*\n')
+_BROKEN_HYPHENATION = re.compile(r'[a-z]-\n[a-z]')
+
+# 关键词候选：以中文或字母开头，由中文、字母、数字和连字符组成
+_TERM_PATTERN = re.compile(r'[一-鿿A-Za-z][一-鿿A-Za-z0-9\-]*')
+
+# 记录过滤结果的不同词语数量上限，超出时清空重新记录
+_WORD_TERMS_LIMIT = 200000
+
+def load_stopwords(path: Optional[str] = None) -> FrozenSet[str]:
+    """
+    加载停用词表（中文停用词表 + scikit-learn 英文停用词）
+
+    Args:
+        path: 停用词文件路径，每行一个词
+
+    Returns:
+        FrozenSet[str]: 停用词集合
+    """
+    path = path or config.STOPWORDS_PATH
+    try:
+        with open(path, encoding="utf-8") as f:
+            words = {line.strip() for line in f if line.strip()}
+    except OSError as e:
+        logger.warning(f"停用词表加载失败 {path}: {e}")
+        words = set()
+    return frozenset(words) | ENGLISH_STOP_WORDS
+
+def _line_digest(line: str) -> str:
+    """行内容的短摘要（检测重复行时只需比较摘要）"""
+    return hashlib.blake2b(line.encode("utf-8", errors="surrogatepass"), digest_size=8).hexdigest()
+
+def _identity(terms):
+    """TfidfVectorizer 的分析函数：文档已经是分好的词"""
+    return terms
+
+def _codepoints(text: str) -> np.ndarray:
+    """将字符串转换为码位数组"""
+    return np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+
+def _run_starts(mask: np.ndarray) -> np.ndarray:
+    """布尔序列中每段连续True的起始位置"""
+    previous = np.concatenate(([False], mask[:-1]))
+    return np.flatnonzero(mask & ~previous)
+
+def _run_lengths(mask: np.ndarray) -> np.ndarray:
+    """布尔序列中每段连续True的长度"""
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    return np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+
+class TextAnalyzer:
+    """
+    文本分析器
+
+    字符统计和质量检测在码位数组上通过查表和向量化运算完成，不逐字符执行Python代码；
+    关键词提取使用共享的jieba分词器分词，并以文本块为文档计算TF-IDF。
+    各文本段的分词结果按内容缓存，同一文献的多个分析接口只需分词一次
+    """
+
+    def __init__(self, stopwords_path: Optional[str] = None, cache_size: Optional[int] = None):
+        """
+        Args:
+            stopwords_path: 停用词文件路径
+            cache_size: 缓存分词结果的文本段数量
+        """
+        self.stopwords = load_stopwords(stopwords_path)
+        self.cache_size = cache_size or config.TEXT_ANALYZER_CACHE_SIZE
+        self._terms_cache: "OrderedDict[str, Tuple[str, ...]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._word_terms: Dict[str, str] = {}
+
+    def _classify(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """返回码位数组和字符类别数组（辅助平面字符按“其他”处理）"""
+        codes = _codepoints(text)
+        classes = _CHAR_CLASSES[np.minimum(codes, 0xFFFF)]
+        classes[codes > 0xFFFF] = CHAR_OTHER
+        return codes, classes
+
+    def _counters(self, text: str) -> Tuple[Dict[str, int], Counter]:
+        """
+        计算文本的可合并计数，统计信息和质量检测都由这些计数得出
+
+        Returns:
+            Tuple[Dict[str, int], Counter]: 计数字典，以及较长非空行（去除首尾空白后）的摘要 -> 出现次数
+        """
+        counters = dict.fromkeys(_COUNTER_FIELDS, 0)
+        counters["pieces"] = 1
+        counters["chars"] = len(text)
+        line_digests: Counter = Counter()
+        if not text:
+            return counters, line_digests
+
+        codes, classes = self._classify(text)
+        counters.update(zip(_CLASS_FIELDS, map(int, np.bincount(classes, minlength=CHAR_CLASS_COUNT))))
+
+        # 英文单词：连续字母的段数
+        counters["english_words"] = len(_run_starts(classes == CHAR_LETTER))
+
+        # 句子：连续句末标点算一次；句点后需为空白或文本结尾
+        is_space = classes == CHAR_SPACE
+        next_is_space = np.concatenate((is_space[1:], [True]))
+        sentence_end = _SENTENCE_END[np.minimum(codes, 0xFFFF)] | ((codes == _PERIOD) & next_is_space)
+        end_positions = _run_starts(sentence_end)
+        counters["sentence_ends"] = len(end_positions)
+        last_end = end_positions[-1] if len(end_positions) else -1
+        # 最后一个句末标点之后是否还有正文（有则再算一句）
+        tail = ~is_space[last_end + 1:] & ~sentence_end[last_end + 1:]
+        counters["sentence_tail"] = int(tail.any())
+
+        lines = [line.strip() for line in text.splitlines()]
+        lines = [line for line in lines if line]
+        counters["lines"] = len(lines)
+        line_digests.update(_line_digest(line) for line in lines if len(line) >= 5)
+        counters["paragraphs"] = sum(1 for block in _PARAGRAPH_BREAK.split(text) if block.strip())
+
+        # 不含空白的非中文长串（提取时丢失空格导致单词粘连）
+        run_lengths = _run_lengths(~is_space & (classes != CHAR_CJK))
+        counters["long_run_chars"] = int(run_lengths[run_lengths > 40].sum())
+        counters["hyphenation"] = len(_BROKEN_HYPHENATION.findall(text))
+        return counters, line_digests
+
+    def get_text_stats(self, text: str) -> Dict[str, Any]:
+        """
+        获取文本统计信息
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            Dict[str, Any]: 字符数、中文字符数、英文单词数、段落数、句子数、估算token数等
+        """
+        return self._stats_from_counters(self._counters(text)[0])
+
+    def _stats_from_counters(self, counters: Dict[str, int]) -> Dict[str, Any]:
+        """由可合并计数得出统计信息"""
+        total_chars = counters["chars"]
+        if not total_chars:
+            return {
+                "total_chars": 0, "non_whitespace_chars": 0, "chinese_chars": 0,
+                "english_words": 0, "digits": 0, "punctuation": 0, "whitespace": 0,
+                "lines": 0, "paragraphs": 0, "sentences": 0,
+                "avg_sentence_length": 0.0, "chinese_ratio": 0.0, "estimated_tokens": 0
+            }
+
+        non_whitespace = total_chars - counters["space"]
+        sentences = counters["sentence_ends"] + counters["sentence_tail"]
+        return {
+            "total_chars": total_chars,
+            "non_whitespace_chars": non_whitespace,
+            "chinese_chars": counters["cjk"],
+            "english_words": counters["english_words"],
+            "digits": counters["digit"],
+            "punctuation": counters["punct"],
+            "whitespace": counters["space"],
+            "lines": counters["lines"],
+            "paragraphs": counters["paragraphs"],
+            "sentences": sentences,
+            "avg_sentence_length": round(non_whitespace / sentences, 2) if sentences else 0.0,
+            "chinese_ratio": round(counters["cjk"] / non_whitespace, 4) if non_whitespace else 0.0,
+            "estimated_tokens": TokenCounter.estimate_tokens_from_counts(counters["cjk"], total_chars)
+        }
+
+    def extract_keywords(self, text: str, top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        提取关键词：以文本段（文本块之间以空行分隔）为文档计算TF-IDF，按平均权重排序
+
+        Args:
+            text: 输入文本
+            top_k: 返回的关键词数量
+
+        Returns:
+            List[Tuple[str, float]]: (关键词, 权重) 列表，按权重降序，权重相同时按词语排序
+        """
+        segments = [block for block in text.split("\n\n") if block.strip()] if text else []
+        documents = [terms for terms in self.segment_terms_many(segments) if terms]
+        if not documents or top_k <= 0:
+            return []
+
+        vectorizer = TfidfVectorizer(analyzer=_identity, sublinear_tf=True)
+        matrix = vectorizer.fit_transform(documents)
+        scores = np.asarray(matrix.sum(axis=0)).ravel() / len(documents)
+
+        # 词表按字母顺序排列，稳定排序保证权重相同的词按词语顺序输出
+        top = np.argsort(-scores, kind="stable")[:top_k]
+        vocabulary = vectorizer.get_feature_names_out()
+        return [(str(vocabulary[i]), round(float(scores[i]), 4)) for i in top]
+
+    def segment_terms_many(self, segments: Sequence[str]) -> List[Tuple[str, ...]]:
+        """
+        获取多个文本段的候选关键词（分词并过滤停用词、数字和单字），结果按文本内容缓存
+
+        Args:
+            segments: 文本段列表
+
+        Returns:
+            List[Tuple[str, ...]]: 与输入顺序一致的候选词序列
+        """
+        results: List[Optional[Tuple[str, ...]]] = [None] * len(segments)
+        missing = []
+        with self._cache_lock:
+            for i, segment in enumerate(segments):
+                terms = self._terms_cache.get(segment)
+                if terms is None:
+                    missing.append(i)
+                else:
+                    self._terms_cache.move_to_end(segment)
+                    results[i] = terms
+
+        if missing:
+            cut_results = segmenter.cut_many([segments[i] for i in missing])
+            with self._cache_lock:
+                for i, words in zip(missing, cut_results):
+                    terms = self._filter_terms(words)
+                    results[i] = terms
+                    self._terms_cache[segments[i]] = terms
+                while len(self._terms_cache) > self.cache_size:
+                    self._terms_cache.popitem(last=False)
+
+        return results
+
+    def _filter_terms(self, words: Sequence[str]) -> Tuple[str, ...]:
+        """
+        过滤分词结果，英文统一转为小写
+        每个不同的词只判断一次（结果记录在 _word_terms 中，被过滤的词记为空字符串），
+        分词结果中的大量重复词只需一次字典查找
+        """
+        word_terms = self._word_terms
+        if len(word_terms) > _WORD_TERMS_LIMIT:
+            word_terms.clear()
+        for word in set(words).difference(word_terms):
+            word_terms[word] = self._filter_word(word)
+        return tuple(term for term in map(word_terms.__getitem__, words) if term)
+
+    def _filter_word(self, word: str) -> str:
+        """单个词的过滤结果：保留的候选词（小写），被过滤时返回空字符串"""
+        if len(word) < 2 or not _TERM_PATTERN.fullmatch(word):
+            return ""
+        word = word.lower()
+        return "" if word in self.stopwords else word
+
+    def detect_text_quality_issues(self, text: str) -> List[Dict[str, Any]]:
+        """
+        检测文本质量问题（通常由PDF等格式的提取错误产生）
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            List[Dict[str, Any]]: 问题列表，每项包含 type、severity、message、value
+        """
+        return self._quality_issues_from_counters(*self._counters(text))
+
+    def _quality_issues_from_counters(self, counters: Dict[str, int], line_digests: Dict[str, int]) -> List[Dict[str, Any]]:
+        """由可合并计数检测质量问题"""
+        issues: List[Dict[str, Any]] = []
+
+        def add_issue(issue_type: str, severity: str, message: str, value: float):
+            issues.append({"type": issue_type, "severity": severity, "message": message, "value": value})
+
+        total_chars = counters["chars"]
+        non_whitespace = total_chars - counters["space"]
+        if not non_whitespace:
+            add_issue("empty", "high", "文本为空", 0)
+            return issues
+
+        if non_whitespace < 50:
+            add_issue("too_short", "low", "文本过短", non_whitespace)
+
+        garbled_ratio = counters["garbled"] / non_whitespace
+        if garbled_ratio > 0.01:
+            add_issue("garbled_chars", "high", "存在较多乱码或控制字符", round(garbled_ratio, 4))
+
+        text_ratio = (counters["cjk"] + counters["letter"] + counters["digit"]) / non_whitespace
+        if text_ratio < 0.5:
+            add_issue("low_text_ratio", "medium", "文字占比过低，可能是公式、表格或符号提取结果", round(text_ratio, 4))
+
+        long_run_ratio = counters["long_run_chars"] / non_whitespace
+        if long_run_ratio > 0.05:
+            add_issue("merged_words", "medium", "存在较多缺少空格的超长字符串", round(long_run_ratio, 4))
+
+        whitespace_ratio = counters["space"] / total_chars
+        if whitespace_ratio > 0.3:
+            add_issue("excessive_whitespace", "low", "空白字符过多", round(whitespace_ratio, 4))
+
+        # 重复出现的行（页眉、页脚等）
+        lines = counters["lines"]
+        if lines >= 5:
+            repeated = sum(count for count in line_digests.values() if count >= 3)
+            if repeated / lines > 0.2:
+                add_issue("repeated_lines", "medium", "存在大量重复行，可能是页眉页脚", round(repeated / lines, 4))
+
+        if counters["hyphenation"] >= 3:
+            add_issue("broken_hyphenation", "low", "存在跨行断开的单词", counters["hyphenation"])
+
+        return issues
+
+    # ---------- 可合并的分段分析结果 ----------
+
+    def analyze_chunks(self, texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        计算各文本块的可合并分析结果（计数、较长行的摘要和候选关键词词频），可直接保存为JSON
+
+        Args:
+            texts: 文本块列表
+
+        Returns:
+            List[Dict[str, Any]]: 与输入顺序一致的分段结果，包含 counters、lines、terms
+        """
+        results = []
+        for text, words in zip(texts, segmenter.cut_many(list(texts))):
+            counters, line_digests = self._counters(text)
+            results.append({
+                "counters": counters,
+                "lines": dict(line_digests),
+                "terms": dict(Counter(self._filter_terms(words)))
+            })
+        return results
+
+    def merge_partials(self, partials: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        合并按顺序排列的文本块分段结果，等价于分析以空行（"\n\n"）连接的全文：
+        空行两侧的字符、行、段落、句子互不影响，计数直接相加，只需补上分隔符的空白字符；
+        全文末尾是否有未以句末标点结束的正文，由最后一个非空文本块决定
+
+        Args:
+            partials: analyze_chunks 返回的分段结果（按文本块顺序）
+
+        Returns:
+            Dict[str, Any]: 合并结果，包含 counters、lines、terms，以及各词出现的文本块数 term_chunks
+        """
+        counters: Counter = Counter(dict.fromkeys(_COUNTER_FIELDS, 0))
+        line_digests: Counter = Counter()
+        terms: Counter = Counter()
+        term_chunks: Counter = Counter()
+        sentence_tail = 0
+        for partial in partials:
+            chunk_counters = partial["counters"]
+            counters.update(chunk_counters)
+            if chunk_counters["chars"] > chunk_counters["space"]:
+                sentence_tail = chunk_counters["sentence_tail"]
+            line_digests.update(partial["lines"])
+            terms.update(partial["terms"])
+            term_chunks.update(partial["terms"].keys())
+
+        separators = 2 * max(counters["pieces"] - 1, 0)
+        counters["chars"] += separators
+        counters["space"] += separators
+        counters["sentence_tail"] = sentence_tail
+        return {
+            "counters": dict(counters),
+            "lines": line_digests,
+            "terms": terms,
+            "term_chunks": term_chunks,
+            "chunks_with_terms": sum(1 for partial in partials if partial["terms"])
+        }
+
+    def stats_from_merged(self, merged: Dict[str, Any]) -> Dict[str, Any]:
+        """由合并结果得出统计信息（与 get_text_stats 分析全文的结果相同）"""
+        return self._stats_from_counters(merged["counters"])
+
+    def quality_issues_from_merged(self, merged: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """由合并结果检测质量问题（与 detect_text_quality_issues 检测全文的结果相同）"""
+        return self._quality_issues_from_counters(merged["counters"], merged["lines"])
+
+    def keywords_from_merged(self, merged: Dict[str, Any], top_k: int = 10) -> List[Tuple[str, float]]:
+        """
+        由合并结果提取关键词：权重 = (1 + ln 全文词频) * (ln((1 + 文本块数) / (1 + 含该词的文本块数)) + 1)，L2归一化
+
+        Args:
+            merged: merge_partials 的返回值
+            top_k: 返回的关键词数量
+
+        Returns:
+            List[Tuple[str, float]]: (关键词, 权重) 列表，按权重降序，权重相同时按词语排序
+        """
+        terms = merged["terms"]
+        if not terms or top_k <= 0:
+            return []
+
+        words = sorted(terms)
+        counts = np.array([terms[word] for word in words], dtype=np.float64)
+        chunk_df = np.array([merged["term_chunks"][word] for word in words], dtype=np.float64)
+        chunks = merged["chunks_with_terms"]
+
+        weights = (1 + np.log(counts)) * (np.log((1 + chunks) / (1 + chunk_df)) + 1)
+        weights /= np.linalg.norm(weights)
+        top = np.argsort(-weights, kind="stable")[:top_k]
+        return [(words[i], round(float(weights[i]), 4)) for i in top]
+
+    def normalize_text(self, text: str) -> str:
+        """
+        标准化文本：全角字母数字转半角，统一换行和空白，删除零宽字符和控制字符；
+        中文标点保持不变，对已标准化的文本再次调用结果不变
+
+        Args:
+            text: 输入文本
+
+        Returns:
+            str: 标准化后的文本
+        """
+        if not text:
+            return ""
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = text.translate(_NORMALIZE_TABLE)
+        text = _HORIZONTAL_SPACE.sub(" ", text)
+        text = _SPACE_AROUND_NEWLINE.sub("\n", text)
+        text = _BLANK_LINES.sub("\n\n", text)
+        return text.strip()
+
+# 创建全局文本分析器实例
+text_analyzer = TextAnalyzer()
@@ -0,0 +1,109 @@
+"""
+文本清理引擎
+用预编译的正则和字符白名单转换表完成文本清理，输出与原 clean_text 逐字节一致
+"""
+
+import re
+import string
+
+# 清理规则版本号：修改任何清理规则时必须递增，用于缓存失效等场景
+CLEANER_VERSION = 1
+
+# ASCII白名单：\w 在ASCII范围内即字母、数字和下划线
+_ASCII_ALLOWED = set(string.ascii_letters + string.digits + "_" + string.whitespace + ",.!?;:()-'\"")
+_ASCII_DELETE_BYTES = bytes(b for b in range(128) if chr(b) not in _ASCII_ALLOWED)
+
+class TextCleaner:
+    """
+    文本清理器
+
+    与逐条执行 re.sub 的原实现相比：
+    - 空白折叠使用 str.split/join，在C层一次完成
+    - 纯ASCII文本的字符白名单过滤使用 bytes.translate 删除表，非ASCII文本使用预编译正则
+    - 其余规则的正则只匹配真正需要修改的位置，无匹配时直接返回原字符串，不分配新字符串
+    """
+
+    # 白名单外的字符（连续出现时一次性删除）
+    DISALLOWED_CHARS = re.compile(r'[^\w\s,.!?;:()\-\'\"，。！？；：（）]+')
+    # 连字符断行
+    HYPHEN_BREAK = re.compile(r'-\s+')
+    # 连续的标点符号
+    PUNCTUATION_RUN = re.compile(r'[,.!?;:]{2,}')
+    # 句末标点与大写字母之间不是恰好一个空格的位置（此时文本中的空白只剩普通空格）
+    SENTENCE_GAP = re.compile(r'(?<=[.!?])(?: {2,})?(?=[A-Z])')
+
+    def clean(self, text: str) -> str:
+        """
+        清理提取的文本
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            str: 清理后的文本
+        """
+        if not text:
+            return ""
+
+        # 1. 替换多个空白字符为单个空格
+        text = self._collapse_whitespace(text)
+
+        # 2. 清理特殊字符，但保留基本标点
+        if text.isascii():
+            text = text.encode('ascii').translate(None, _ASCII_DELETE_BYTES).decode('ascii')
+        else:
+            text = self.DISALLOWED_CHARS.sub('', text)
+
+        # 3. 清理可能的分页符号
+        if '-' in text:
+            text = self.HYPHEN_BREAK.sub('', text)
+
+        # 4. 清理连续的标点符号
+        text = self.PUNCTUATION_RUN.sub('.', text)
+
+        # 5. 确保句子之间有适当的空格
+        text = self.SENTENCE_GAP.sub(' ', text)
+
+        return text.strip()
+
+    @staticmethod
+    def _collapse_whitespace(text: str) -> str:
+        """
+        等价于 re.sub(r'\\s+', ' ', text)
+        str.split() 与正则 \\s 使用相同的Unicode空白定义；首尾的空白需单独保留，
+        因为后续的连字符规则会受到结尾空格的影响
+        """
+        parts = text.split()
+        if not parts:
+            return " "
+
+        collapsed = " ".join(parts)
+        if text[0].isspace():
+            collapsed = " " + collapsed
+        if text[-1].isspace():
+            collapsed = collapsed + " "
+        return collapsed
+
+def clean_text_reference(text: str) -> str:
+    """
+    原始的逐条 re.sub 实现，仅作为一致性校验和基准测试的参照
+
+    Args:
+        text: 原始文本
+
+    Returns:
+        str: 清理后的文本
+    """
+    if not text:
+        return ""
+
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[^\w\s,.!?;:()\-\'\"，。！？；：（）]', '', text)
+    text = re.sub(r'-\s+', '', text)
+    text = re.sub(r'[,.!?;:]{2,}', '.', text)
+    text = re.sub(r'([.!?])\s*([A-Z])', r'\1 \2', text)
+
+    return text.strip()
+
+# 创建全局文本清理器实例
+text_cleaner = TextCleaner()
@@ -4,15 +4,25 @@
 """
 
 import os
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 import logging
-import re
+
+from app.config import config
+from app.utils.text_cleaner import text_cleaner
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 提取逻辑版本号：修改任何提取方式（影响输出文本）时必须递增，用于缓存失效
+EXTRACTOR_VERSION = 1
+
 def clean_text(text: str) -> str:
     """
     清理提取的文本
@@ -23,68 +33,235 @@ def clean_text(text: str) -> str:
     Returns:
         str: 清理后的文本
     """
-    if not text:
-        return ""
+    return text_cleaner.clean(text)
+
+def _extract_pdf_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    提取PDF中 [start, end) 范围内各页的原始文本（供进程池调用，需为模块级函数）
     
-    # 1. 替换多个空白字符为单个空格
-    text = re.sub(r'\s+', ' ', text)
+    Args:
+        file_path: PDF文件路径
+        start: 起始页（从0开始）
+        end: 结束页（不包含）
+        
+    Returns:
+        List[str]: 各页原始文本
+    """
+    import PyPDF2
     
-    # 2. 清理特殊字符，但保留基本标点
-    text = re.sub(r'[^\w\s,.!?;:()\-\'\"，。！？；：（）]', '', text)
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        return [pdf_reader.pages[page_num].extract_text() or "" for page_num in range(start, end)]
+
+class PdfPagePool:
+    """
+    PDF按页并行提取的进程池：每个进程一个，懒加载后在多个文档间复用，
+    不必为每个文档重新启动工作进程并导入PyPDF2
+
+    已是进程池工作进程的进程（如文献后台处理进程）调用 disable 后按页串行提取，
+    并行度由外层进程池提供，避免嵌套创建进程
+    """
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._max_workers = 0
+        self._lock = threading.Lock()
+        self.enabled = True
+
+    def get_executor(self, max_workers: int) -> Optional[ProcessPoolExecutor]:
+        """
+        获取进程池（大小变化时重建）
+
+        Args:
+            max_workers: 进程数
+
+        Returns:
+            Optional[ProcessPoolExecutor]: 进程池，已禁用并行提取时返回None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._executor is None or self._max_workers != max_workers:
+                if self._executor is not None:
+                    # 已提交的任务仍会完成
+                    self._executor.shutdown(wait=False)
+                self._executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+                self._max_workers = max_workers
+            return self._executor
+
+    def disable(self) -> None:
+        """在当前进程中禁用并行提取"""
+        self.enabled = False
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+                self._max_workers = 0
+
+# 创建全局PDF按页提取进程池实例
+pdf_page_pool = PdfPagePool()
+
+def disable_parallel_pdf_extraction() -> None:
+    """在当前进程中改为按页串行提取PDF（作为外层进程池的 initializer 使用）"""
+    pdf_page_pool.disable()
+
+def shutdown_pdf_page_pool() -> None:
+    """关闭PDF按页提取进程池的便捷函数（在服务关闭时调用）"""
+    pdf_page_pool.shutdown()
+
+def iter_pdf_pages(
+    file_path: str,
+    parallel_threshold: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> Iterator[str]:
+    """
+    按页序逐页产出PDF原始文本
+    页数达到阈值时按 config.PDF_PAGES_PER_TASK 页一组提交给进程内复用的进程池（pdf_page_pool）并行提取，
+    同时在途的任务数有上限，内存占用只与在途页数有关，与文档总页数无关；
+    当前进程禁用了并行提取时（文献后台处理进程）始终串行提取
     
-    # 3. 清理可能的分页符号
-    text = re.sub(r'-\s+', '', text)
+    Args:
+        file_path: PDF文件路径
+        parallel_threshold: 启用并行提取的最小页数，默认使用 config.PDF_PARALLEL_PAGE_THRESHOLD
+        max_workers: 并行进程数，默认使用 config.PDF_EXTRACT_WORKERS
+        
+    Yields:
+        str: 每一页的原始文本
+    """
+    import PyPDF2
     
-    # 4. 清理连续的标点符号
-    text = re.sub(r'[,.!?;:]{2,}', '.', text)
+    parallel_threshold = parallel_threshold or config.PDF_PARALLEL_PAGE_THRESHOLD
+    max_workers = max_workers or config.PDF_EXTRACT_WORKERS
     
-    # 5. 确保句子之间有适当的空格
-    text = re.sub(r'([.!?])\s*([A-Z])', r'\1 \2', text)
+    with open(file_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        page_count = len(pdf_reader.pages)
+        
+        executor = None
+        if page_count >= parallel_threshold and max_workers > 1:
+            executor = pdf_page_pool.get_executor(max_workers)
+        if executor is None:
+            for page in pdf_reader.pages:
+                yield page.extract_text() or ""
+            return
+    
+    pages_per_task = config.PDF_PAGES_PER_TASK
+    tasks = iter([
+        (start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ])
     
-    return text.strip()
+    in_flight = deque(
+        executor.submit(_extract_pdf_page_range, file_path, start, end)
+        for start, end in islice(tasks, max_workers * 2)
+    )
+    try:
+        while in_flight:
+            pages = in_flight.popleft().result()
+            next_task = next(tasks, None)
+            if next_task:
+                in_flight.append(executor.submit(_extract_pdf_page_range, file_path, *next_task))
+            yield from pages
+    finally:
+        # 调用方提前停止读取时取消尚未开始的任务（进程池在文档间复用，不随文档关闭）
+        for future in in_flight:
+            future.cancel()
+    
+    logger.info(f"并行提取PDF完成: {page_count} 页, {max_workers} 个进程")
 
-def extract_pdf_text(file_path: str) -> Optional[str]:
+def extract_pdf_pages(
+    file_path: str,
+    parallel_threshold: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> Optional[List[str]]:
     """
-    使用PyPDF2从PDF文件中提取文本
+    按页提取PDF原始文本
+    页数达到阈值时将页码范围切分给进程池并行提取，再按页序合并结果
     
     Args:
         file_path: PDF文件路径
+        parallel_threshold: 启用并行提取的最小页数，默认使用 config.PDF_PARALLEL_PAGE_THRESHOLD
+        max_workers: 并行进程数，默认使用 config.PDF_EXTRACT_WORKERS
         
     Returns:
-        Optional[str]: 提取的文本内容，失败时返回None
+        Optional[List[str]]: 各页原始文本（下标即页码-1），失败时返回None
     """
     try:
-        import PyPDF2
+        return list(iter_pdf_pages(file_path, parallel_threshold, max_workers))
         
-        with open(file_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            # 提取所有页面的文本
-            text_parts = []
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text_parts.append(page.extract_text())
-            
-            # 合并所有页面的文本
-            text = "\n".join(text_parts)
-            
-            # 清理文本
-            text = clean_text(text)
-            
-            if text.strip():
-                logger.info(f"成功从PDF提取文本，长度: {len(text)} 字符")
-                return text
-            else:
-                logger.warning(f"PDF文件 {file_path} 中没有可提取的文本")
-                return None
-                
     except ImportError:
         logger.error("PyPDF2库未安装，无法提取PDF文本")
         return None
     except Exception as e:
-        logger.error(f"提取PDF文本失败: {e}")
+        logger.error(f"提取PDF页面文本失败: {e}")
         return None
 
+def extract_pdf_text(file_path: str) -> Optional[str]:
+    """
+    使用PyPDF2从PDF文件中提取文本
+    
+    Args:
+        file_path: PDF文件路径
+        
+    Returns:
+        Optional[str]: 提取的文本内容，失败时返回None
+    """
+    pages = extract_pdf_pages(file_path)
+    if pages is None:
+        return None
+    
+    # 合并所有页面的文本并清理
+    text = clean_text("\n".join(pages))
+    
+    if text.strip():
+        logger.info(f"成功从PDF提取文本，长度: {len(text)} 字符")
+        return text
+    else:
+        logger.warning(f"PDF文件 {file_path} 中没有可提取的文本")
+        return None
+
+def extract_pdf_text_with_pages(file_path: str) -> Optional[Dict[str, Any]]:
+    """
+    提取PDF文本并记录每页在全文中的起始位置
+    每页单独清理后以空格连接，便于将文本块映射回页码
+    
+    Args:
+        file_path: PDF文件路径
+        
+    Returns:
+        Optional[Dict[str, Any]]: {"text": 全文, "page_starts": 各页起始字符位置}，失败时返回None
+    """
+    pages = extract_pdf_pages(file_path)
+    if pages is None:
+        return None
+    
+    parts = []
+    page_starts = []
+    offset = 0
+    for page_text in pages:
+        cleaned = clean_text(page_text)
+        if cleaned and parts:
+            offset += 1  # 页与页之间的空格
+        page_starts.append(offset)
+        if cleaned:
+            parts.append(cleaned)
+            offset += len(cleaned)
+    
+    text = " ".join(parts)
+    if not text.strip():
+        logger.warning(f"PDF文件 {file_path} 中没有可提取的文本")
+        return None
+    
+    logger.info(f"成功从PDF按页提取文本，{len(pages)} 页, 长度: {len(text)} 字符")
+    return {"text": text, "page_starts": page_starts}
+
 def extract_docx_text(file_path: str) -> Optional[str]:
     """
     从Word文档中提取文本
@@ -223,6 +400,32 @@ def extract_title_from_filename(filename: str) -> str:
     """
     return Path(filename).stem
 
+def iter_document_texts(file_path: str) -> Iterator[Tuple[Optional[int], str]]:
+    """
+    逐段产出清理后的文档文本，供流式分块使用
+    PDF按页产出（每次只持有一页文本）；DOCX和HTML没有分页信息，整体产出一次
+    
+    Args:
+        file_path: 文件路径
+        
+    Yields:
+        Tuple[Optional[int], str]: (页码（从1开始，无分页信息时为None）, 清理后的文本)
+        
+    Raises:
+        ValueError: 不支持的文件类型
+    """
+    file_ext = Path(file_path).suffix.lower()
+    
+    if file_ext == '.pdf':
+        for page_index, page_text in enumerate(iter_pdf_pages(file_path)):
+            yield page_index + 1, clean_text(page_text)
+    elif file_ext == '.docx':
+        yield None, extract_docx_text(file_path) or ""
+    elif file_ext in ['.html', '.htm']:
+        yield None, extract_html_text(file_path) or ""
+    else:
+        raise ValueError(f"不支持的文件类型: {file_ext}")
+
 def extract_metadata_from_file(file_path: str, original_filename: str) -> Dict[str, Any]:
     """
     从文件中提取元数据（标题等）
@@ -245,7 +448,10 @@ def extract_metadata_from_file(file_path: str, original_filename: str) -> Dict[s
     
     # 根据文件类型选择相应的提取函数
     if file_ext == '.pdf':
-        extracted_text = extract_pdf_text(file_path)
+        pdf_result = extract_pdf_text_with_pages(file_path)
+        extracted_text = pdf_result["text"] if pdf_result else None
+        if pdf_result:
+            metadata["page_starts"] = pdf_result["page_starts"]
     elif file_ext == '.docx':
         extracted_text = extract_docx_text(file_path)
     elif file_ext in ['.html', '.htm']:
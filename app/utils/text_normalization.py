@@ -0,0 +1,265 @@
+"""
+文本块批量标准化模块
+按批读取文献的文本块，在进程池中标准化文本，只把发生变化的文本块（连同重新计算的字符数和token数）
+用一条 executemany UPDATE 写回，并在同一事务中刷新文本块汇总；大文档作为后台任务执行，并提供任务进度查询
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.orm import Session
+
+from app.config import config
+from app.database import SessionLocal
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+from app.utils.chunk_summary import refresh_chunk_summary
+from app.utils.literature_analysis import invalidate_literature_analysis
+from app.utils.text_analyzer import text_analyzer
+from app.utils.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+# 批量写回标准化文本的语句（executemany，每个文本块一组参数），字符数和token数随文本一起更新
+_UPDATE_CHUNK_TEXT = update(TextChunk.__table__).where(
+    TextChunk.__table__.c.id == bindparam("chunk_id")
+).values(
+    text=bindparam("new_text"),
+    char_length=bindparam("new_char_length"),
+    estimated_tokens=bindparam("new_estimated_tokens"),
+    updated_at=bindparam("updated_at")
+)
+
+def _normalize_texts(texts: List[str]) -> List[str]:
+    """标准化一组文本（在工作进程中执行）"""
+    return [text_analyzer.normalize_text(text) for text in texts]
+
+class NormalizationManager:
+    """文本块批量标准化管理器（后台任务线程 + 文本标准化进程池）"""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        job_ttl: Optional[float] = None
+    ):
+        """
+        Args:
+            max_workers: 标准化文本的进程数，1表示在当前进程中执行
+            batch_size: 每批读取和写回的文本块数量
+            job_ttl: 已结束的任务保留的秒数，之后不再能查询
+        """
+        self.max_workers = max_workers or config.NORMALIZE_MAX_WORKERS
+        self.batch_size = batch_size or config.NORMALIZE_BATCH_SIZE
+        self.job_ttl = job_ttl if job_ttl is not None else config.NORMALIZE_JOB_TTL_SECONDS
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._job_executor: Optional[ThreadPoolExecutor] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._active: Dict[str, str] = {}  # 文献ID -> 进行中的任务ID
+        self._finished: Dict[str, float] = {}  # 已结束的任务ID -> 结束时刻（time.monotonic），按结束顺序排列
+        self._lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """懒加载标准化进程池"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def _normalize_batch(self, texts: List[str]) -> List[str]:
+        """标准化一批文本，批次足够大且有多个工作进程时拆分到进程池中执行"""
+        if self.max_workers > 1 and len(texts) >= self.max_workers * 2:
+            size = -(-len(texts) // self.max_workers)
+            parts = [texts[i:i + size] for i in range(0, len(texts), size)]
+            try:
+                return [text for part in self._get_pool().map(_normalize_texts, parts) for text in part]
+            except Exception as e:
+                logger.warning(f"进程池标准化失败，改为在当前进程中执行: {e}")
+        return _normalize_texts(texts)
+
+    def normalize_literature(
+        self,
+        literature_id: str,
+        db: Session,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        批量标准化文献的所有文本块：按 chunk_index 分批读取，只写回内容发生变化的文本块，
+        每批与刷新后的文本块汇总一起提交一次
+
+        Args:
+            literature_id: 文献ID
+            db: 数据库会话
+            progress_callback: 每批完成后调用，参数为 (已处理文本块数, 已标准化文本块数)
+
+        Returns:
+            Dict[str, int]: total_chunks 和 normalized_chunks
+        """
+        processed = 0
+        normalized = 0
+        last_index = -1
+        while True:
+            batch = db.query(TextChunk.id, TextChunk.chunk_index, TextChunk.text).filter(
+                TextChunk.literature_id == literature_id,
+                TextChunk.chunk_type != STAGING_CHUNK_TYPE,
+                TextChunk.chunk_index > last_index
+            ).order_by(TextChunk.chunk_index).limit(self.batch_size).all()
+            if not batch:
+                break
+
+            normalized_texts = self._normalize_batch([text for _, _, text in batch])
+            changed = [
+                (chunk_id, new_text)
+                for (chunk_id, _, text), new_text in zip(batch, normalized_texts)
+                if new_text != text
+            ]
+            if changed:
+                # 与入库时相同的方法批量估算token数量
+                token_counts = TokenCounter.count_many([new_text for _, new_text in changed])
+                now = datetime.utcnow()
+                db.execute(_UPDATE_CHUNK_TEXT, [
+                    {
+                        "chunk_id": chunk_id,
+                        "new_text": new_text,
+                        "new_char_length": len(new_text),
+                        "new_estimated_tokens": token_count,
+                        "updated_at": now
+                    }
+                    for (chunk_id, new_text), token_count in zip(changed, token_counts)
+                ])
+                # 变化的文本块的分析结果失效，字符数和token数的汇总随之更新
+                invalidate_literature_analysis(literature_id, db, [chunk_id for chunk_id, _ in changed])
+                refresh_chunk_summary(literature_id, db)
+                db.commit()
+
+            processed += len(batch)
+            normalized += len(changed)
+            last_index = batch[-1][1]
+            if progress_callback:
+                progress_callback(processed, normalized)
+
+        return {"total_chunks": processed, "normalized_chunks": normalized}
+
+    # ---------- 后台任务 ----------
+
+    def submit(self, literature_id: str, total_chunks: int) -> Dict[str, Any]:
+        """
+        提交后台标准化任务；同一文献已有进行中的任务时返回该任务
+
+        Args:
+            literature_id: 文献ID
+            total_chunks: 文献的文本块数量（用于计算进度）
+
+        Returns:
+            Dict[str, Any]: 任务信息
+        """
+        with self._lock:
+            self._prune_jobs()
+            active_id = self._active.get(literature_id)
+            if active_id is not None:
+                return dict(self._jobs[active_id])
+
+            job_id = str(uuid.uuid4())
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "literature_id": literature_id,
+                "status": "pending",
+                "total_chunks": total_chunks,
+                "processed_chunks": 0,
+                "normalized_chunks": 0,
+                "error": None,
+                "created_at": datetime.utcnow(),
+                "finished_at": None
+            }
+            self._active[literature_id] = job_id
+
+            if self._job_executor is None:
+                self._job_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="normalize")
+            self._job_executor.submit(self._run_job, job_id, literature_id)
+            logger.info(f"文本标准化任务已入队: {job_id} ({literature_id})")
+            return dict(self._jobs[job_id])
+
+    def _update_job(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _prune_jobs(self) -> None:
+        """移除结束超过 job_ttl 秒的任务（调用方持有 self._lock）"""
+        deadline = time.monotonic() - self.job_ttl
+        for job_id, finished_at in list(self._finished.items()):
+            if finished_at > deadline:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def _run_job(self, job_id: str, literature_id: str) -> None:
+        """执行后台标准化任务（使用独立的数据库会话）"""
+        self._update_job(job_id, status="running")
+        db = SessionLocal()
+        try:
+            result = self.normalize_literature(
+                literature_id, db,
+                lambda processed, normalized: self._update_job(
+                    job_id, processed_chunks=processed, normalized_chunks=normalized
+                )
+            )
+            self._update_job(job_id, status="completed", total_chunks=result["total_chunks"],
+                             finished_at=datetime.utcnow())
+            logger.info(f"文本标准化任务完成: {job_id}, 标准化文本块数量: {result['normalized_chunks']}")
+        except Exception as e:
+            logger.error(f"文本标准化任务失败 {job_id}: {e}")
+            db.rollback()
+            self._update_job(job_id, status="failed", error=str(e), finished_at=datetime.utcnow())
+        finally:
+            db.close()
+            with self._lock:
+                if self._active.get(literature_id) == job_id:
+                    self._active.pop(literature_id, None)
+                self._finished[job_id] = time.monotonic()
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        获取任务进度
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Optional[Dict[str, Any]]: 任务信息，任务不存在或已过期时返回None
+        """
+        with self._lock:
+            self._prune_jobs()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self) -> None:
+        """关闭任务线程和进程池"""
+        if self._job_executor is not None:
+            self._job_executor.shutdown(wait=False, cancel_futures=True)
+            self._job_executor = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+# 创建全局文本标准化管理器实例
+normalization_manager = NormalizationManager()
+
+def normalize_literature_chunks(literature_id: str, db: Session) -> Dict[str, int]:
+    """同步批量标准化文献文本块的便捷函数"""
+    return normalization_manager.normalize_literature(literature_id, db)
+
+def submit_normalization_job(literature_id: str, total_chunks: int) -> Dict[str, Any]:
+    """提交后台标准化任务的便捷函数"""
+    return normalization_manager.submit(literature_id, total_chunks)
+
+def get_normalization_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """查询后台标准化任务进度的便捷函数"""
+    return normalization_manager.get_job(job_id)
@@ -4,7 +4,8 @@
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+from bisect import bisect_right
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from .token_counter import TokenCounter
 
@@ -12,58 +13,220 @@ from .token_counter import TokenCounter
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 默认分隔符（按优先级排列）
+DEFAULT_SEPARATORS = ["\n\n", "\n", "。", "！", "？", ".", "!", "?", " ", ""]
+
+# 分块大小的单位
+SIZE_UNITS = ("chars", "tokens")
+
+# 每个token平均对应的字符数（英文文本约4个字符一个token，中文约1个），只用于把token预算换算成字符缓冲区大小。
+# 这是估计值而非上界：token平均更长时缓冲区容纳的块数少于 buffer_factor 个，分块次数增加，但分块结果不受影响
+AVG_CHARS_PER_TOKEN = 4
+
+def token_length_function(token_count_method: str = "auto") -> Callable[[List[str]], List[int]]:
+    """
+    创建按token计数的批量长度函数，用于按token预算分块
+
+    Args:
+        token_count_method: token计数方法，"auto"/"tiktoken" 使用缓存的tiktoken编码器
+
+    Returns:
+        Callable[[List[str]], List[int]]: 接收文本列表，返回对应token数量的函数
+    """
+    return lambda texts: TokenCounter.count_many(texts, method=token_count_method)
+
+class OffsetTextSplitter:
+    """
+    记录偏移量的递归字符分割器
+    分割规则与 RecursiveCharacterTextSplitter（keep_separator=True、length_function=len）完全一致，
+    但全程只处理 (起始, 结束) 位置而不拼接子字符串，每个文本块在原文中的位置在分割时直接得到，
+    无需事后用 text.find 查找，总耗时与文本长度成线性关系，且文本重复出现时位置依然准确
+
+    提供 length_function 时按其度量片段大小（如token数）：每个片段只计量一次，
+    合并时累加片段长度，不会对合并中的文本块反复重新计量。
+    BPE等分词方式的token数不满足可加性（片段拼接处可能合并或拆分token），
+    因此按片段token数之和判断的块大小是近似值，块的实际token数可能略高于或低于 chunk_size；
+    文本块的 estimated_tokens 按块的完整文本重新计算，不受此影响
+    """
+    
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200,
+                 separators: Optional[List[str]] = None,
+                 length_function: Optional[Callable[[List[str]], List[int]]] = None):
+        """
+        Args:
+            chunk_size: 每个块的目标大小（单位由 length_function 决定，默认字符数）
+            chunk_overlap: 块之间的重叠大小
+            separators: 分隔符列表，按优先级排列
+            length_function: 批量计算片段长度的函数，为None时使用字符数
+        """
+        if chunk_overlap > chunk_size:
+            raise ValueError(f"块重叠大小({chunk_overlap})不能大于块大小({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators or DEFAULT_SEPARATORS
+        self.length_function = length_function
+    
+    def split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """
+        分割文本，返回各文本块在原文中的位置
+        
+        Args:
+            text: 要分割的文本
+            
+        Returns:
+            List[Tuple[int, int]]: (start_char, end_char) 列表，text[start_char:end_char] 即文本块内容
+        """
+        spans: List[Tuple[int, int]] = []
+        self._split(text, 0, len(text), self.separators, spans)
+        return spans
+    
+    def _split(self, text: str, start: int, end: int, separators: List[str],
+               spans: List[Tuple[int, int]]) -> None:
+        """递归分割 text[start:end]，结果追加到 spans"""
+        # 选择区间内出现的第一个分隔符
+        separator = separators[-1]
+        new_separators: List[str] = []
+        for i, sep in enumerate(separators):
+            if sep == "":
+                separator = sep
+                break
+            if text.find(sep, start, end) != -1:
+                separator = sep
+                new_separators = separators[i + 1:]
+                break
+        
+        pieces = self._split_on_separator(text, start, end, separator)
+        good_splits: List[Tuple[int, int, int]] = []
+        for (piece_start, piece_end), length in zip(pieces, self._measure(text, pieces)):
+            if length < self.chunk_size:
+                good_splits.append((piece_start, piece_end, length))
+            else:
+                if good_splits:
+                    self._merge_splits(text, good_splits, spans)
+                    good_splits = []
+                if not new_separators:
+                    spans.append((piece_start, piece_end))
+                else:
+                    self._split(text, piece_start, piece_end, new_separators, spans)
+        
+        if good_splits:
+            self._merge_splits(text, good_splits, spans)
+    
+    def _measure(self, text: str, pieces: List[Tuple[int, int]]) -> List[int]:
+        """计算各片段的长度（同一层的片段一次性批量计量）"""
+        if self.length_function is None:
+            return [piece_end - piece_start for piece_start, piece_end in pieces]
+        return self.length_function([text[piece_start:piece_end] for piece_start, piece_end in pieces])
+    
+    @staticmethod
+    def _split_on_separator(text: str, start: int, end: int, separator: str) -> List[Tuple[int, int]]:
+        """按分隔符切分区间，分隔符保留在后一段的开头（与 keep_separator=True 一致）"""
+        if not separator:
+            return [(i, i + 1) for i in range(start, end)]
+        
+        pieces = []
+        piece_start = start
+        pos = text.find(separator, start, end)
+        while pos != -1:
+            if pos > piece_start:
+                pieces.append((piece_start, pos))
+            piece_start = pos
+            pos = text.find(separator, pos + len(separator), end)
+        if end > piece_start:
+            pieces.append((piece_start, end))
+        return pieces
+    
+    def _merge_splits(self, text: str, splits: List[Tuple[int, int, int]],
+                      spans: List[Tuple[int, int]]) -> None:
+        """
+        将相邻的小片段 (起始, 结束, 长度) 合并为不超过 chunk_size 的文本块，块之间保留 chunk_overlap 的重叠
+        片段在原文中首尾相接，当前块始终是 splits[head:index] 这一连续区间
+        """
+        head = 0
+        total = 0
+        for index, (_, _, length) in enumerate(splits):
+            if total + length > self.chunk_size and index > head:
+                self._append_stripped(text, splits[head][0], splits[index - 1][1], spans)
+                while total > self.chunk_overlap or (total + length > self.chunk_size and total > 0):
+                    total -= splits[head][2]
+                    head += 1
+            total += length
+        
+        if head < len(splits):
+            self._append_stripped(text, splits[head][0], splits[-1][1], spans)
+    
+    @staticmethod
+    def _append_stripped(text: str, start: int, end: int, spans: List[Tuple[int, int]]) -> None:
+        """去除区间首尾空白后追加，空白区间直接丢弃"""
+        segment = text[start:end]
+        stripped = segment.lstrip()
+        if not stripped:
+            return
+        start += len(segment) - len(stripped)
+        spans.append((start, start + len(stripped.rstrip())))
+
 def split_text_into_chunks(
     text: str,
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
-    token_count_method: str = "auto"
+    token_count_method: str = "auto",
+    track_offsets: bool = True,
+    size_unit: str = "chars"
 ) -> List[Dict[str, Any]]:
     """
     将文本分割成适合处理的小块
     
     Args:
         text: 要分割的文本
-        chunk_size: 每个块的目标大小（字符数）
-        chunk_overlap: 块之间的重叠大小（字符数）
+        chunk_size: 每个块的目标大小（单位见 size_unit）
+        chunk_overlap: 块之间的重叠大小（单位见 size_unit）
         token_count_method: token计数方法，可选值：
                           - "auto": 自动选择最佳方法
                           - "chars": 使用字符数估算
                           - "words": 使用分词结果估算
                           - "tiktoken": 使用tiktoken计算
+        track_offsets: 是否在分割时直接记录位置（线性时间，位置准确）；
+                       False 时沿用分割后再用 text.find 查找位置的旧方式
+        size_unit: 分块大小的单位，"chars" 按字符数，"tokens" 按 token_count_method 计算的token数
+                   （仅支持 track_offsets=True；按片段token数之和控制块大小，是近似值）
         
     Returns:
-        List[Dict[str, Any]]: 包含文本块及其元数据的列表
+        List[Dict[str, Any]]: 包含文本块及其元数据的列表，
+                              start_char/end_char 为文本块在原文中的位置（end_char 不包含）
     """
     try:
-        # 创建文本分割器
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", "。", "！", "？", ".", "!", "?", " ", ""]
-        )
+        if size_unit not in SIZE_UNITS:
+            raise ValueError(f"不支持的分块单位: {size_unit}")
+        
+        if track_offsets:
+            length_function = token_length_function(token_count_method) if size_unit == "tokens" else None
+            spans = OffsetTextSplitter(chunk_size, chunk_overlap, length_function=length_function).split_spans(text)
+        elif size_unit == "tokens":
+            raise ValueError("按token分块需要 track_offsets=True")
+        else:
+            spans = _split_and_find_offsets(text, chunk_size, chunk_overlap)
         
-        # 分割文本
-        chunks = text_splitter.split_text(text)
+        # 跳过空块
+        pieces = []
+        for i, (start_char, end_char) in enumerate(spans):
+            chunk = text[start_char:end_char]
+            if chunk.strip():
+                pieces.append((i, start_char, end_char, chunk))
+        
+        # 批量估算token数量
+        token_counts = TokenCounter.count_many([piece[3] for piece in pieces], method=token_count_method)
         
         # 为每个文本块添加元数据
         processed_chunks = []
-        for i, chunk in enumerate(chunks):
-            # 清理块中的空白字符
-            chunk = chunk.strip()
-            if not chunk:  # 跳过空块
-                continue
-                
-            # 估算token数量
-            token_count = TokenCounter.estimate_tokens(chunk, method=token_count_method)
-            
+        for (i, start_char, end_char, chunk), token_count in zip(pieces, token_counts):
             # 创建块的元数据
             chunk_data = {
                 "chunk_index": i,
                 "text": chunk,
                 "char_length": len(chunk),
                 "estimated_tokens": token_count,
-                "start_char": text.find(chunk),  # 在原文中的起始位置
+                "start_char": start_char,  # 在原文中的起始位置
+                "end_char": end_char,  # 在原文中的结束位置（不包含）
             }
             
             processed_chunks.append(chunk_data)
@@ -75,6 +238,202 @@ def split_text_into_chunks(
         logger.error(f"文本分块失败: {e}")
         return []
 
+def _split_and_find_offsets(text: str, chunk_size: int, chunk_overlap: int) -> List[Tuple[int, int]]:
+    """
+    旧的分块方式：先分割出文本块，再用 text.find 从头查找每个块的位置
+    每次查找都从原文开头扫描，长文本上是平方复杂度；块内容重复出现时位置会指向第一次出现处
+    """
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=DEFAULT_SEPARATORS
+    )
+    
+    spans = []
+    for chunk in text_splitter.split_text(text):
+        chunk = chunk.strip()
+        start_char = text.find(chunk)
+        spans.append((start_char, start_char + len(chunk)))
+    return spans
+
+def attach_page_numbers(chunks: List[Dict[str, Any]], page_starts: List[int]) -> List[Dict[str, Any]]:
+    """
+    根据各页在全文中的起始位置，为文本块标注起止页码（从1开始）
+    
+    Args:
+        chunks: 文本块列表（需包含 start_char 和 char_length）
+        page_starts: 各页起始字符位置，按页序排列
+        
+    Returns:
+        List[Dict[str, Any]]: 添加了 page_number / page_end 的文本块列表
+    """
+    if not page_starts:
+        return chunks
+    
+    for chunk in chunks:
+        start = chunk.get("start_char")
+        if start is None or start < 0:
+            continue
+        end = start + max(chunk["char_length"] - 1, 0)
+        chunk["page_number"] = max(bisect_right(page_starts, start), 1)
+        chunk["page_end"] = max(bisect_right(page_starts, end), 1)
+    
+    return chunks
+
+class IncrementalChunker:
+    """
+    增量文本分块器
+    逐段接收文本（如PDF的每一页），文本块一旦确定完整就立即产出，
+    内部缓冲区只保留尚未完成的尾部，内存占用与文档总长度无关
+
+    每个缓冲窗口按 split_text_into_chunks 的规则分割，但递归分割选用的分隔符取决于窗口内的文本，
+    窗口边界附近的块可能与对全文整体分块的结果不同（块数可能相差几个）。保证：
+    - start_char/end_char 是文本块在拼接后全文中的准确位置，chunk_index 从0连续编号
+    - 按字符分块时每个块不超过 chunk_size，除空白外全文每个字符都至少落在一个块中
+    - 全文短于缓冲区（buffer_limit）时结果与 split_text_into_chunks 完全相同
+    """
+    
+    def __init__(
+        self,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        token_count_method: str = "auto",
+        buffer_factor: int = 4,
+        size_unit: str = "chars"
+    ):
+        """
+        Args:
+            chunk_size: 每个块的目标大小（单位见 size_unit）
+            chunk_overlap: 块之间的重叠大小（单位见 size_unit）
+            token_count_method: token计数方法
+            buffer_factor: 缓冲区达到 chunk_size 的多少倍时触发一次分块
+            size_unit: 分块大小的单位，"chars" 或 "tokens"
+        """
+        if size_unit not in SIZE_UNITS:
+            raise ValueError(f"不支持的分块单位: {size_unit}")
+        
+        self.chunk_size = chunk_size
+        self.token_count_method = token_count_method
+        if size_unit == "tokens":
+            # 缓冲区按字符计量，按每个token平均对应的字符数估算，通常能容纳多个完整的块
+            self.buffer_limit = chunk_size * buffer_factor * AVG_CHARS_PER_TOKEN
+            length_function = token_length_function(token_count_method)
+        else:
+            self.buffer_limit = chunk_size * buffer_factor
+            length_function = None
+        self._splitter = OffsetTextSplitter(chunk_size, chunk_overlap, length_function=length_function)
+        self._buffer = ""
+        self._buffer_offset = 0  # 缓冲区第一个字符在全文中的位置
+        self._total_length = 0  # 已接收的全文长度
+        self._page_starts: List[int] = []
+        self._page_numbers: List[int] = []
+        self._next_index = 0
+    
+    def feed(self, text: str, page_number: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        追加一段文本，返回已经完整的文本块
+        
+        Args:
+            text: 新的文本片段
+            page_number: 该片段所在页码（可选）
+            
+        Returns:
+            List[Dict[str, Any]]: 新产出的文本块
+        """
+        if not text:
+            return []
+        
+        if self._total_length:
+            self._buffer += " "
+            self._total_length += 1
+        
+        if page_number is not None:
+            self._page_starts.append(self._total_length)
+            self._page_numbers.append(page_number)
+        
+        self._buffer += text
+        self._total_length += len(text)
+        
+        if len(self._buffer) < self.buffer_limit:
+            return []
+        return self._drain(final=False)
+    
+    def flush(self) -> List[Dict[str, Any]]:
+        """输入结束，产出缓冲区中剩余的文本块"""
+        if not self._buffer.strip():
+            return []
+        return self._drain(final=True)
+    
+    def _drain(self, final: bool) -> List[Dict[str, Any]]:
+        """对缓冲区分块；非最终阶段保留最后一个（可能不完整的）块，作为下一轮的开头"""
+        spans = self._splitter.split_spans(self._buffer)
+        if not spans:
+            return []
+        
+        ready = spans if final else spans[:-1]
+        texts = [self._buffer[start:end] for start, end in ready]
+        token_counts = TokenCounter.count_many(texts, method=self.token_count_method)
+        chunks = [
+            self._build_chunk(text, start, token_count)
+            for text, (start, _), token_count in zip(texts, ready, token_counts)
+        ]
+        
+        if final:
+            self._buffer_offset += len(self._buffer)
+            self._buffer = ""
+        else:
+            keep_from = spans[-1][0]
+            self._buffer = self._buffer[keep_from:]
+            self._buffer_offset += keep_from
+        
+        return chunks
+    
+    def _build_chunk(self, text: str, start_in_buffer: int, token_count: int) -> Dict[str, Any]:
+        """构建与 split_text_into_chunks 相同结构的文本块"""
+        start_char = self._buffer_offset + start_in_buffer
+        chunk = {
+            "chunk_index": self._next_index,
+            "text": text,
+            "char_length": len(text),
+            "estimated_tokens": token_count,
+            "start_char": start_char,
+            "end_char": start_char + len(text),
+        }
+        self._next_index += 1
+        
+        if self._page_starts:
+            end_char = start_char + max(len(text) - 1, 0)
+            chunk["page_number"] = self._page_numbers[max(bisect_right(self._page_starts, start_char) - 1, 0)]
+            chunk["page_end"] = self._page_numbers[max(bisect_right(self._page_starts, end_char) - 1, 0)]
+        
+        return chunk
+
+def iter_text_chunks(
+    segments: Iterable[tuple],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200,
+    token_count_method: str = "auto",
+    size_unit: str = "chars"
+) -> Iterator[Dict[str, Any]]:
+    """
+    流式分块：逐段读入 (页码, 文本)，文本块一旦完整即产出
+    
+    Args:
+        segments: (页码, 文本) 的可迭代对象，页码可以为None
+        chunk_size: 每个块的目标大小（单位见 size_unit）
+        chunk_overlap: 块之间的重叠大小（单位见 size_unit）
+        token_count_method: token计数方法
+        size_unit: 分块大小的单位，"chars" 或 "tokens"
+        
+    Yields:
+        Dict[str, Any]: 文本块及其元数据
+    """
+    chunker = IncrementalChunker(chunk_size, chunk_overlap, token_count_method, size_unit=size_unit)
+    for page_number, text in segments:
+        yield from chunker.feed(text, page_number)
+    yield from chunker.flush()
+
 def prepare_chunks_for_embedding(
     chunks: List[Dict[str, Any]],
     literature_id: str,
@@ -120,7 +479,8 @@ def process_literature_text(
     group_id: str,
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
-    token_count_method: str = "auto"
+    token_count_method: str = "auto",
+    page_starts: Optional[List[int]] = None
 ) -> Optional[List[Dict[str, Any]]]:
     """
     处理文献文本：分块并准备embedding
@@ -132,6 +492,7 @@ def process_literature_text(
         chunk_size: 块大小
         chunk_overlap: 块重叠大小
         token_count_method: token计数方法
+        page_starts: 各页在全文中的起始位置（PDF），提供时为文本块标注页码
         
     Returns:
         Optional[List[Dict[str, Any]]]: 处理后的文本块列表，失败时返回None
@@ -142,6 +503,9 @@ def process_literature_text(
         if not chunks:
             logger.error("文本分块失败")
             return None
+        
+        if page_starts:
+            attach_page_numbers(chunks, page_starts)
             
         # 2. 添加元数据
         enriched_chunks = prepare_chunks_for_embedding(chunks, literature_id, group_id)
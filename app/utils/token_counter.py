@@ -4,11 +4,75 @@ Token计数工具
 """
 
 import re
-from typing import Optional
+from functools import lru_cache
+from typing import Optional, List, Sequence
 import logging
 
+import numpy as np
+
+from app.config import config
+
 logger = logging.getLogger(__name__)
 
+# 按1个token/字符计数的中文字符范围（CJK统一表意文字基本区）
+CJK_FIRST = 0x4E00
+CJK_LAST = 0x9FFF
+
+def _codepoints(text: str) -> np.ndarray:
+    """将字符串转换为码位数组（UTF-32小端编码，每个字符恰好4字节）"""
+    return np.frombuffer(text.encode("utf-32-le", errors="surrogatepass"), dtype=np.uint32)
+
+def _cjk_mask(codes: np.ndarray) -> np.ndarray:
+    """码位是否为中文字符；利用无符号减法回绕，一次比较完成区间判断"""
+    return (codes - np.uint32(CJK_FIRST)) <= np.uint32(CJK_LAST - CJK_FIRST)
+
+def count_cjk_chars(text: str) -> int:
+    """
+    单遍统计中文字符数量，不构造匹配列表或替换后的字符串
+    纯ASCII文本直接返回0；较长文本使用NumPy在码位数组上向量化统计
+    
+    Args:
+        text: 输入文本
+        
+    Returns:
+        int: 中文字符数量
+    """
+    if text.isascii():
+        return 0
+    if len(text) >= config.TOKEN_ESTIMATE_NUMPY_THRESHOLD:
+        return int(np.count_nonzero(_cjk_mask(_codepoints(text))))
+    return sum(1 for char in text if "\u4e00" <= char <= "\u9fff")
+
+def _tokens_from_counts(chinese_chars: int, total_chars: int) -> int:
+    """中文字符算1个token，其他字符每4个算1个token，非空文本至少为1"""
+    if total_chars == 0:
+        return 0
+    return max(1, chinese_chars + (total_chars - chinese_chars) // 4)
+
+@lru_cache(maxsize=8)
+def get_tiktoken_encoding(model_name: Optional[str] = None):
+    """
+    获取并缓存tiktoken编码器（每个进程每种编码只加载一次）
+    加载失败（未安装tiktoken或无法下载编码文件）时同样缓存结果，避免每次计数都重试
+    
+    Args:
+        model_name: 模型名称，如果不指定则使用cl100k_base编码器
+        
+    Returns:
+        tiktoken.Encoding或None: 编码器，不可用时返回None
+    """
+    try:
+        import tiktoken
+        
+        # 如果没有指定模型，使用cl100k_base编码器（最通用）
+        if model_name:
+            return tiktoken.encoding_for_model(model_name)
+        return tiktoken.get_encoding("cl100k_base")
+        
+    except Exception as e:
+        logger.warning(f"Tiktoken编码器加载失败: {e}，使用字符数估算")
+        return None
+
 class TokenCounter:
     @staticmethod
     def estimate_tokens_by_chars(text: str) -> int:
@@ -26,13 +90,46 @@ class TokenCounter:
         if not text:
             return 0
             
-        # 分离中文和非中文字符
-        chinese_chars = len(re.findall(r'[\u4e00-\u9fff]', text))
-        other_chars = len(re.sub(r'[\u4e00-\u9fff]', '', text))
+        # 单遍统计中文字符，其余均为非中文字符
+        return _tokens_from_counts(count_cjk_chars(text), len(text))
+
+    @staticmethod
+    def estimate_tokens_from_counts(chinese_chars: int, total_chars: int) -> int:
+        """
+        由中文字符数和总字符数估算token数量，规则与 estimate_tokens_by_chars 相同
+        （用于由分段统计合并得到的文档级计数）
         
-        # 中文字符算1个token，其他字符每4个算1个token
-        estimated_tokens = chinese_chars + (other_chars // 4)
-        return max(1, estimated_tokens)  # 至少返回1
+        Args:
+            chinese_chars: 中文字符数量
+            total_chars: 总字符数量
+            
+        Returns:
+            int: 估算的token数量
+        """
+        return _tokens_from_counts(chinese_chars, total_chars)
+
+    @staticmethod
+    def estimate_tokens_by_chars_many(texts: Sequence[str]) -> List[int]:
+        """
+        批量使用字符数估算token数量，结果与逐条调用 estimate_tokens_by_chars 一致
+        所有文本拼接后只做一次码位转换，再用 np.add.reduceat 按文本分段汇总中文字符数
+        
+        Args:
+            texts: 文本列表
+            
+        Returns:
+            List[int]: 与输入顺序一致的token数量
+        """
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        joined = "".join(texts)
+        if joined.isascii():
+            return [_tokens_from_counts(0, int(length)) for length in lengths]
+        
+        mask = _cjk_mask(_codepoints(joined)).astype(np.int64)
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        # reduceat 对空区间返回起点处的值，需要按长度清零
+        chinese = np.where(lengths > 0, np.add.reduceat(np.append(mask, 0), starts), 0)
+        return [_tokens_from_counts(int(c), int(length)) for c, length in zip(chinese, lengths)]
 
     @staticmethod
     def estimate_tokens_by_words(text: str) -> int:
@@ -48,10 +145,10 @@ class TokenCounter:
         if not text:
             return 0
             
-        import jieba
+        from app.utils.segmenter import cut_words
         
-        # 分词
-        words = list(jieba.cut(text))
+        # 分词（共享的分词器，词典只加载一次）
+        words = cut_words(text)
         
         # 统计中文词和英文词
         chinese_words = len([w for w in words if re.search(r'[\u4e00-\u9fff]', w)])
@@ -73,21 +170,49 @@ class TokenCounter:
         Returns:
             int: 计算的token数量
         """
+        encoding = get_tiktoken_encoding(model_name)
+        if encoding is None:
+            return TokenCounter.estimate_tokens_by_chars(text)
+        
         try:
-            import tiktoken
-            
-            # 如果没有指定模型，使用cl100k_base编码器（最通用）
-            if model_name:
-                encoding = tiktoken.encoding_for_model(model_name)
-            else:
-                encoding = tiktoken.get_encoding("cl100k_base")
-                
             return len(encoding.encode(text))
-            
         except Exception as e:
             logger.warning(f"Tiktoken计算失败: {e}，使用字符数估算")
             return TokenCounter.estimate_tokens_by_chars(text)
 
+    @staticmethod
+    def count_many_by_tiktoken(
+        texts: Sequence[str],
+        model_name: Optional[str] = None,
+        num_threads: Optional[int] = None
+    ) -> List[int]:
+        """
+        使用tiktoken批量计算token数量，复用同一个编码器并通过 encode_batch 多线程编码
+        
+        Args:
+            texts: 文本列表
+            model_name: 模型名称，如果不指定则使用默认编码器
+            num_threads: 编码线程数
+            
+        Returns:
+            List[int]: 与输入顺序一致的token数量，结果与逐条调用 estimate_tokens_by_tiktoken 相同
+        """
+        encoding = get_tiktoken_encoding(model_name)
+        if encoding is None:
+            return TokenCounter.estimate_tokens_by_chars_many(texts)
+        
+        num_threads = num_threads or config.TOKEN_COUNT_THREADS
+        batch_size = config.TOKEN_COUNT_BATCH_SIZE
+        counts: List[int] = []
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            try:
+                counts.extend(len(tokens) for tokens in encoding.encode_batch(batch, num_threads=num_threads))
+            except Exception:
+                # 批内有文本无法编码（如包含特殊token）时逐条计数，保持与单条计数相同的回退行为
+                counts.extend(TokenCounter.estimate_tokens_by_tiktoken(text, model_name) for text in batch)
+        return counts
+
     @classmethod
     def estimate_tokens(cls, text: str, method: str = "auto") -> int:
         """
@@ -97,22 +222,45 @@ class TokenCounter:
             text: 输入文本
             method: 估算方法，可选值：
                    - "auto": 自动选择最佳方法
-                   - "chars": 使用字符数估算
+                   - "fast": 单遍字符分类估算（不依赖分词和编码器，适合统计类接口）
+                   - "chars": 使用字符数估算（与 "fast" 相同）
                    - "words": 使用分词结果估算
                    - "tiktoken": 使用tiktoken计算
             
         Returns:
             int: 估算的token数量
         """
-        if method == "chars":
+        if method in ("fast", "chars"):
             return cls.estimate_tokens_by_chars(text)
         elif method == "words":
             return cls.estimate_tokens_by_words(text)
         elif method == "tiktoken":
             return cls.estimate_tokens_by_tiktoken(text)
         else:  # auto
-            # 优先使用tiktoken，如果失败则回退到分词方法
+            # 优先使用tiktoken，如果失败则回退到字符分类估算
             try:
                 return cls.estimate_tokens_by_tiktoken(text)
             except:
-                return cls.estimate_tokens_by_words(text) 
\ No newline at end of file
+                return cls.estimate_tokens_by_chars(text)
+
+    @classmethod
+    def count_many(cls, texts: Sequence[str], method: str = "auto") -> List[int]:
+        """
+        批量估算多个文本的token数量（如一篇文档的全部文本块）
+        
+        Args:
+            texts: 文本列表
+            method: 估算方法，与 estimate_tokens 相同
+            
+        Returns:
+            List[int]: 与输入顺序一致的token数量
+        """
+        if not texts:
+            return []
+        
+        if method in ("tiktoken", "auto"):
+            return cls.count_many_by_tiktoken(texts)
+        if method in ("fast", "chars"):
+            return cls.estimate_tokens_by_chars_many(texts)
+        
+        return [cls.estimate_tokens(text, method=method) for text in texts] 
\ No newline at end of file
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+SQLite调优方案并发读写基准测试
+分别使用默认设置（回滚日志）和 production 方案（WAL、synchronous=NORMAL、busy_timeout 等）创建引擎，
+多个写线程模拟文献处理批量写入文本块，多个读线程模拟列表和统计接口，统计吞吐量和 "database is locked" 错误数
+
+用法: python test/benchmark_sqlite_profile.py [每种方案运行秒数] [写线程数] [读线程数]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.database import create_db_engine
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk
+
+BATCH_SIZE = 20  # 每个写事务插入的文本块数量
+
+def prepare_database(engine):
+    """建表并创建写入文本块所需的用户、研究组和文献"""
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    user = User(username="bench", email="bench@example.com", password_hash="x")
+    group = ResearchGroup("基准测试组", "机构", "描述", "方向")
+    db.add_all([user, group])
+    db.commit()
+    literature_ids = []
+    for i in range(4):
+        literature = Literature(f"文献{i}", f"{i}.pdf", f"{i}.pdf", 1, ".pdf", user.id, group.id)
+        db.add(literature)
+        db.commit()
+        literature_ids.append(literature.id)
+    db.close()
+    return literature_ids
+
+def run_profile(profile: str, duration: float, writers: int, readers: int):
+    """运行一种方案，返回 (写入文本块数, 读取次数, 锁冲突次数)"""
+    tmp_dir = tempfile.mkdtemp()
+    engine = create_db_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", profile=profile)
+    SessionLocal = sessionmaker(bind=engine)
+    literature_ids = prepare_database(engine)
+
+    counters = {"written": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    text = "深度学习在文献分析中的应用。Deep learning for literature analysis. " * 12
+
+    def add(name: str, value: int = 1):
+        with lock:
+            counters[name] += value
+
+    def writer(worker: int):
+        literature_id = literature_ids[worker % len(literature_ids)]
+        index = worker * 1_000_000
+        while time.perf_counter() < deadline:
+            db = SessionLocal()
+            now = datetime.utcnow()
+            try:
+                db.execute(insert(TextChunk.__table__), [
+                    {"id": f"{worker}-{index + i}", "literature_id": literature_id, "chunk_index": index + i,
+                     "chunk_type": "content", "text": text, "char_length": len(text), "estimated_tokens": 300,
+                     "metadata": {}, "embedding_status": "pending",
+                     "created_at": now, "updated_at": now}
+                    for i in range(BATCH_SIZE)
+                ])
+                db.commit()
+                index += BATCH_SIZE
+                add("written", BATCH_SIZE)
+            except OperationalError as e:
+                db.rollback()
+                if "locked" in str(e):
+                    add("locked")
+                else:
+                    raise
+            finally:
+                db.close()
+
+    def reader(worker: int):
+        literature_id = literature_ids[worker % len(literature_ids)]
+        while time.perf_counter() < deadline:
+            db = SessionLocal()
+            try:
+                db.query(func.count(TextChunk.id), func.sum(TextChunk.char_length)).filter(
+                    TextChunk.literature_id == literature_id
+                ).one()
+                db.query(TextChunk.id, TextChunk.chunk_index).filter(
+                    TextChunk.literature_id == literature_id
+                ).order_by(TextChunk.chunk_index.desc()).limit(10).all()
+                add("reads")
+            except OperationalError as e:
+                if "locked" in str(e):
+                    add("locked")
+                else:
+                    raise
+            finally:
+                db.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    engine.dispose()
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    return counters["written"], counters["reads"], counters["locked"]
+
+def main():
+    """主函数"""
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    writers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    print("🗄️  SQLite调优方案并发读写基准测试")
+    print("=" * 50)
+    print(f"⏱️  每种方案运行 {duration:.0f} 秒, 写线程 {writers} 个（每事务 {BATCH_SIZE} 个文本块）, 读线程 {readers} 个")
+
+    results = {}
+    for profile in ("default", "production"):
+        written, reads, locked = run_profile(profile, duration, writers, readers)
+        results[profile] = (written, reads)
+        print(f"\n📊 {profile}:")
+        print(f"   写入: {written / duration:10.0f} 文本块/秒")
+        print(f"   读取: {reads / duration:10.0f} 次/秒")
+        print(f"   锁冲突: {locked} 次")
+
+    default_written, default_reads = results["default"]
+    written, reads = results["production"]
+    print("\n🚀 production 方案相对默认设置:")
+    print(f"   写入吞吐: {written / max(default_written, 1):.2f}x")
+    print(f"   读取吞吐: {reads / max(default_reads, 1):.2f}x")
+
+if __name__ == "__main__":
+    main()
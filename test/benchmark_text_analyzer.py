@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+文本分析基准测试
+对500个文本块（约1000字符/块）的文档运行各分析接口并计时
+
+用法: python test/benchmark_text_analyzer.py [文本块数量]
+"""
+
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.segmenter import TOKENIZER_BACKEND, warm_up_segmenter
+from app.utils.text_analyzer import TextAnalyzer
+
+# 目标：500个文本块的文档首次分析（未缓存分词结果）远低于1秒
+TARGET_SECONDS = 0.7
+
+# 组合生成句子的词表（每个文本块由随机组合的句子构成，内容基本不重复，接近真实文献）
+SUBJECTS = ["本研究", "该方法", "实验结果", "我们的模型", "基线系统", "对比实验", "消融实验", "检索模块",
+            "知识图谱", "注意力机制", "预训练模型", "文献数据集"]
+VERBS = ["表明", "显著提升了", "有效降低了", "进一步验证了", "系统分析了", "重新定义了", "改进了", "统一建模了"]
+OBJECTS = ["跨语言检索的准确率", "引文网络中的节点表示", "长文档的语义一致性", "实体关系抽取的召回率",
+           "领域术语的识别效果", "多模态特征的融合方式", "训练过程的收敛速度", "知识图谱构建的质量",
+           "摘要生成的可读性", "低资源场景下的泛化能力"]
+ENGLISH = ["retrieval", "citation", "graph", "transformer", "attention", "corpus", "benchmark", "embedding",
+           "baseline", "accuracy", "dataset", "ablation", "encoder", "language", "model", "training",
+           "experiments", "show", "that", "the", "improves", "with", "on", "and", "results", "quality"]
+
+def build_chunks(count: int, seed: int = 0) -> list:
+    """生成中英混合的文本块（约1000字符/块），句子由词表随机组合，每块内容不同"""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        chunk = ""
+        while len(chunk) < 1000:
+            if rng.random() < 0.5:
+                chunk += (f"{rng.choice(SUBJECTS)}在{rng.randint(2, 30)}个数据集上{rng.choice(VERBS)}"
+                          f"{rng.choice(OBJECTS)}，提升幅度为{rng.randint(1, 20)}.{rng.randint(0, 9)}%。")
+            else:
+                words = [rng.choice(ENGLISH) for _ in range(rng.randint(8, 16))]
+                chunk += f"{' '.join(words).capitalize()} in section {i}.{rng.randint(1, 9)}. "
+        chunks.append(chunk[:1000])
+    return chunks
+
+def timed(label: str, func, *args):
+    """运行一次并打印耗时"""
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"   {label}: {elapsed * 1000:.1f}ms")
+    return elapsed, result
+
+def main():
+    """主函数"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    print("📊 文本分析基准测试")
+    print("=" * 50)
+
+    warm_up_segmenter()
+    analyzer = TextAnalyzer()
+    chunks = build_chunks(count)
+    full_text = "\n\n".join(chunks)
+    print(f"📄 测试文档: {count} 个文本块, {len(full_text)} 字符")
+    print(f"✂️  分词实现: {TOKENIZER_BACKEND}")
+
+    print("\n⏱️  首次分析（需要分词）:")
+    total = 0.0
+    elapsed, _ = timed("get_text_stats", analyzer.get_text_stats, full_text)
+    total += elapsed
+    elapsed, keywords = timed("extract_keywords", analyzer.extract_keywords, full_text, 10)
+    total += elapsed
+    elapsed, _ = timed("detect_text_quality_issues", analyzer.detect_text_quality_issues, full_text)
+    total += elapsed
+    elapsed, _ = timed("normalize_text（逐块）", lambda: [analyzer.normalize_text(c) for c in chunks])
+    total += elapsed
+    first_total = total
+    print(f"   合计: {total * 1000:.1f}ms {'✅' if total < TARGET_SECONDS else '⚠️'}")
+
+    print("\n⏱️  再次分析（分词结果已缓存）:")
+    total = 0.0
+    elapsed, _ = timed("get_text_stats", analyzer.get_text_stats, full_text)
+    total += elapsed
+    elapsed, _ = timed("extract_keywords", analyzer.extract_keywords, full_text, 10)
+    total += elapsed
+    elapsed, _ = timed("detect_text_quality_issues", analyzer.detect_text_quality_issues, full_text)
+    total += elapsed
+    print(f"   合计: {total * 1000:.1f}ms")
+
+    print("\n🔑 关键词:", ", ".join(word for word, _ in keywords))
+    if first_total < TARGET_SECONDS:
+        print(f"\n✅ 首次分析 {first_total * 1000:.1f}ms，低于目标 {TARGET_SECONDS * 1000:.0f}ms")
+    else:
+        print(f"\n⚠️  首次分析 {first_total * 1000:.1f}ms，超过目标 {TARGET_SECONDS * 1000:.0f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+文本分块偏移量基准测试
+对比旧方式（分割后逐块 text.find 查找位置）与 OffsetTextSplitter（分割时直接记录位置）
+在大文档上的耗时，并统计两种方式得到的错误偏移量数量
+
+用法: python test/benchmark_text_splitting.py [文档大小MB]
+"""
+
+import os
+import sys
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.text_processor import OffsetTextSplitter, _split_and_find_offsets
+
+def build_document(size_mb: float) -> str:
+    """生成中英混合的测试文档；每隔若干段插入一段相同的声明文字，模拟重复出现的文本"""
+    target = int(size_mb * 1024 * 1024)
+    notice = ("本报告内容仅供研究组内部交流使用，未经许可不得转载。"
+              "This report is for internal use of the research group only. ") * 12 + "\n\n"
+    parts = []
+    length = 0
+    i = 0
+    while length < target:
+        paragraph = (f"第{i}段：本文研究了文本分块算法在长文档上的性能表现。"
+                     f"Paragraph {i} evaluates chunk offsets on long documents. "
+                     f"实验编号 {i * 7919 % 100003}，结果表明线性算法明显更快。\n\n")
+        if i % 50 == 0:
+            paragraph = notice + paragraph
+        parts.append(paragraph)
+        length += len(paragraph)
+        i += 1
+    return "".join(parts)
+
+def count_wrong_offsets(spans, expected_spans) -> int:
+    """统计与准确位置不一致的文本块数量"""
+    return sum(1 for span, expected in zip(spans, expected_spans) if span != expected)
+
+def main():
+    """主函数"""
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    chunk_size, chunk_overlap = 1000, 200
+
+    print("✂️  文本分块偏移量基准测试")
+    print("=" * 50)
+
+    text = build_document(size_mb)
+    print(f"📄 测试文档: {len(text) / 1024 / 1024:.1f}M 字符, 块大小 {chunk_size}, 重叠 {chunk_overlap}")
+
+    start = time.perf_counter()
+    new_spans = OffsetTextSplitter(chunk_size, chunk_overlap).split_spans(text)
+    new_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    old_spans = _split_and_find_offsets(text, chunk_size, chunk_overlap)
+    old_time = time.perf_counter() - start
+
+    same_chunks = [text[s:e] for s, e in old_spans] == [text[s:e] for s, e in new_spans]
+    new_exact = all(text[s:e].strip() == text[s:e] for s, e in new_spans) and \
+        all(a[0] < b[0] for a, b in zip(new_spans, new_spans[1:]))
+    wrong = count_wrong_offsets(old_spans, new_spans)
+
+    print(f"\n⏱️  旧实现（分割 + text.find）: {old_time:.2f}s")
+    print(f"⏱️  新实现（OffsetTextSplitter）: {new_time:.2f}s")
+    print(f"🚀 加速: {old_time / new_time:.1f}x")
+    print(f"\n📦 文本块数量: {len(new_spans)}")
+    print(f"   {'✅' if same_chunks else '❌'} 两种方式切出的文本块内容一致")
+    print(f"   {'✅' if new_exact else '❌'} 新实现的偏移量严格递增且与文本块对应")
+    print(f"   ⚠️  旧实现偏移量错误的文本块: {wrong}（重复出现的文本被定位到第一次出现处）")
+
+    if not (same_chunks and new_exact):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
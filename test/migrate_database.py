@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+数据库迁移脚本：将 DATABASE_URL 指定的数据库升级到最新结构
+（创建缺少的表、为旧版本 literature 表添加字段、创建查询索引），取代原来的建表和加字段脚本
+
+用法: python test/migrate_database.py
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+
+from app.database import engine
+from app.utils.group_idf import migrate_legacy_group_index
+from app.utils.schema_migrations import MIGRATIONS, get_schema_version, upgrade_database
+
+def main():
+    """主函数"""
+    print("📚 数据库结构迁移")
+    print("=" * 40)
+    print(f"🔍 当前结构版本: {get_schema_version(engine)}")
+
+    try:
+        applied = upgrade_database(engine)
+    except Exception as e:
+        print(f"❌ 数据库迁移失败: {e}")
+        sys.exit(1)
+
+    descriptions = {migration.version: migration.description for migration in MIGRATIONS}
+    for version in applied:
+        print(f"   ✅ {version}: {descriptions[version]}")
+    if not applied:
+        print("ℹ️  数据库已是最新结构，无需迁移")
+
+    try:
+        if migrate_legacy_group_index():
+            print("   ✅ 研究组词频索引已从缓存目录迁移到数据目录")
+    except Exception as e:
+        print(f"❌ 研究组词频索引迁移失败: {e}")
+        sys.exit(1)
+
+    inspector = inspect(engine)
+    print("\n📋 当前数据库表和索引:")
+    for table in inspector.get_table_names():
+        indexes = ", ".join(index["name"] for index in inspector.get_indexes(table))
+        print(f"   - {table}" + (f" ({indexes})" if indexes else ""))
+
+    print(f"\n🎉 数据库迁移完成! 结构版本: {get_schema_version(engine)}")
+
+if __name__ == "__main__":
+    main()
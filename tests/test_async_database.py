@@ -0,0 +1,122 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+from app import database
+from app.config import config
+from app.database import async_database_url, create_async_db_engine, run_with_session
+from app.models import User, ResearchGroup, UserResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk  # noqa: F401  注册Literature.text_chunks关系的目标模型
+from app.utils.auth_helper import (
+    get_literature_with_permission_async, get_user_groups_async, require_group_membership_async,
+    verify_literature_access_async
+)
+from app.utils.group_idf import group_idf_manager
+from app.utils.literature_manager import (
+    get_deleted_literature, get_deleted_literature_async, get_literature_stats, get_literature_stats_async,
+    restore_literature_async, soft_delete_literature_async
+)
+
+class TestAsyncDatabase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.url = f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}"
+        self.engine = create_engine(self.url)
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        db = self.SessionLocal()
+        member = User(username="member", email="member@example.com", password_hash="x")
+        outsider = User(username="outsider", email="outsider@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        db.add_all([member, outsider, group])
+        db.commit()
+        db.add(UserResearchGroup(user_id=member.id, group_id=group.id))
+        active = Literature("a", "a.pdf", "a.pdf", 10, ".pdf", member.id, group.id)
+        deleted = Literature("b", "b.html", "b.html", 5, ".html", member.id, group.id)
+        deleted.status = "deleted"
+        deleted.deleted_by = member.id
+        db.add_all([active, deleted])
+        db.commit()
+        self.member_id, self.outsider_id, self.group_id = member.id, outsider.id, group.id
+        self.active_id, self.deleted_id = active.id, deleted.id
+        db.close()
+
+        self.idf_patcher = mock.patch.object(group_idf_manager, "root_dir", os.path.join(self.tmp_dir, "idf"))
+        self.idf_patcher.start()
+
+    async def asyncSetUp(self):
+        self.async_engine = create_async_db_engine(self.url, profile="production")
+        self.db = async_sessionmaker(bind=self.async_engine, autoflush=False, expire_on_commit=False)()
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        await self.async_engine.dispose()
+
+    def tearDown(self):
+        self.idf_patcher.stop()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_async_database_url(self):
+        self.assertEqual(async_database_url("sqlite:///./a.db"), "sqlite+aiosqlite:///./a.db")
+        self.assertEqual(async_database_url("postgresql://u@db/lit"), "postgresql+psycopg://u@db/lit")
+
+    def test_async_pool_sized_separately(self):
+        # 异步连接池使用自己的大小，不再与同步连接池各占一份完整的连接预算
+        self.assertEqual(self.async_engine.pool.size(), config.ASYNC_DB_POOL_SIZE)
+        with mock.patch.object(config, "ASYNC_DB_POOL_SIZE", 3), mock.patch.object(config, "ASYNC_DB_MAX_OVERFLOW", 1):
+            engine = create_async_db_engine(self.url, profile="production")
+            self.assertEqual((engine.pool.size(), engine.pool._max_overflow), (3, 1))
+            self.assertEqual(database.create_db_engine(self.url, profile="production").pool.size(), config.DB_POOL_SIZE)
+
+    async def test_permission_helpers(self):
+        self.assertEqual([group.id for group in await get_user_groups_async(self.member_id, self.db)], [self.group_id])
+        await require_group_membership_async(self.member_id, self.group_id, self.db)
+        with self.assertRaises(HTTPException) as context:
+            await require_group_membership_async(self.outsider_id, self.group_id, self.db)
+        self.assertEqual(context.exception.status_code, 403)
+
+        self.assertTrue(await verify_literature_access_async(self.member_id, self.active_id, self.db))
+        self.assertFalse(await verify_literature_access_async(self.member_id, self.deleted_id, self.db))
+        literature = await get_literature_with_permission_async(self.active_id, self.member_id, self.db)
+        self.assertEqual(literature.title, "a")
+        with self.assertRaises(HTTPException) as context:
+            await get_literature_with_permission_async(self.deleted_id, self.member_id, self.db)
+        self.assertEqual(context.exception.status_code, 410)
+
+    async def test_listing_and_statistics_match_sync_versions(self):
+        sync_db = self.SessionLocal()
+        try:
+            self.assertEqual(
+                await get_literature_stats_async(self.group_id, self.db),
+                get_literature_stats(self.group_id, sync_db)
+            )
+            self.assertEqual(
+                await get_deleted_literature_async(self.group_id, self.member_id, self.db),
+                get_deleted_literature(self.group_id, self.member_id, sync_db)
+            )
+        finally:
+            sync_db.close()
+        self.assertEqual(await get_deleted_literature_async(self.group_id, self.outsider_id, self.db), [])
+
+    async def test_soft_delete_and_restore(self):
+        self.assertFalse(await soft_delete_literature_async(self.active_id, self.outsider_id, self.db))
+        self.assertTrue(await soft_delete_literature_async(self.active_id, self.member_id, self.db, "重复"))
+        self.assertEqual((await get_literature_stats_async(self.group_id, self.db))["deleted_count"], 2)
+
+        self.assertTrue(await restore_literature_async(self.active_id, self.member_id, self.db))
+        with mock.patch.object(database, "SessionLocal", self.SessionLocal):
+            literature = await run_with_session(lambda literature_id, db: db.get(Literature, literature_id), self.active_id)
+        self.assertEqual((literature.status, literature.restored_by), ("active", self.member_id))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, UserResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk  # noqa: F401  注册Literature.text_chunks关系的目标模型
+from app.utils import auth_cache as auth_cache_module
+from app.utils.auth_cache import TTLCache, auth_cache, invalidate_group_membership
+from app.utils.auth_helper import (
+    get_literature_with_permission, require_group_membership, verify_group_membership
+)
+
+class TestTTLCache(unittest.TestCase):
+    def test_lru_eviction_and_expiry(self):
+        cache = TTLCache(max_entries=2, ttl=10)
+        with mock.patch.object(auth_cache_module.time, "monotonic", return_value=100.0) as clock:
+            cache.set("a", 1)
+            cache.set("b", 2)
+            self.assertEqual(cache.get("a"), 1)
+            cache.set("c", 3)
+            self.assertIsNone(cache.get("b"))
+            self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+
+            clock.return_value = 110.0
+            self.assertIsNone(cache.get("a"))
+            self.assertEqual(len(cache), 1)
+
+class TestAuthCache(unittest.TestCase):
+    def setUp(self):
+        auth_cache.clear()
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        db = self.SessionLocal()
+        member = User(username="member", email="member@example.com", password_hash="x")
+        outsider = User(username="outsider", email="outsider@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        db.add_all([member, outsider, group])
+        db.commit()
+        db.add(UserResearchGroup(user_id=member.id, group_id=group.id))
+        literature = Literature("t", "a.pdf", "a.pdf", 1, ".pdf", member.id, group.id)
+        db.add(literature)
+        db.commit()
+        self.member_id, self.outsider_id = member.id, outsider.id
+        self.group_id, self.literature_id = group.id, literature.id
+        db.close()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: self.statements.append(statement))
+        self.db = self.SessionLocal()
+
+    def tearDown(self):
+        self.db.close()
+        auth_cache.clear()
+
+    def test_principal_served_without_query(self):
+        user = self.db.query(User).filter(User.username == "member").first()
+        auth_cache.set_principal(user)
+        self.db.close()
+
+        self.db = self.SessionLocal()
+        self.statements.clear()
+        cached = auth_cache.get_principal("member", self.db)
+        self.assertEqual((cached.id, cached.username), (self.member_id, "member"))
+        self.assertIn(cached, self.db)
+        self.db.commit()
+        self.assertEqual(self.statements, [])
+        self.assertIsNone(auth_cache.get_principal("outsider", self.db))
+
+    def test_authorised_read_costs_one_query(self):
+        require_group_membership(self.member_id, self.group_id, self.db)
+        self.statements.clear()
+
+        require_group_membership(self.member_id, self.group_id, self.db)
+        self.assertEqual(self.statements, [])
+        literature = get_literature_with_permission(self.literature_id, self.member_id, self.db)
+        self.assertEqual(literature.id, self.literature_id)
+        self.assertEqual(len(self.statements), 1)
+
+    def test_non_members_are_not_cached(self):
+        self.assertFalse(verify_group_membership(self.outsider_id, self.group_id, self.db))
+
+        # 加入研究组（可能由其他进程写入）后立即生效
+        self.db.add(UserResearchGroup(user_id=self.outsider_id, group_id=self.group_id))
+        self.db.commit()
+        invalidate_group_membership(self.outsider_id, self.group_id)
+        self.assertTrue(verify_group_membership(self.outsider_id, self.group_id, self.db))
+        self.assertTrue(auth_cache.is_member(self.outsider_id, self.group_id))
+
+        invalidate_group_membership(self.outsider_id, self.group_id)
+        self.assertFalse(auth_cache.is_member(self.outsider_id, self.group_id))
+        self.assertFalse(auth_cache.group_exists(self.group_id))
+
+if __name__ == '__main__':
+    unittest.main()
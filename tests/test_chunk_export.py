@@ -0,0 +1,67 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk
+from app.utils import chunk_export
+from app.utils.chunk_export import iter_chunks_ndjson
+
+class TestChunkExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}")
+        Base.metadata.create_all(bind=engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.patcher = mock.patch.object(chunk_export, "SessionLocal", self.SessionLocal)
+        self.patcher.start()
+
+        db = self.SessionLocal()
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        db.add_all([user, group])
+        db.commit()
+        literature = Literature("t", "a.html", "a.html", 1, ".html", user.id, group.id)
+        db.add(literature)
+        db.commit()
+        self.literature_id = literature.id
+
+        chunks = []
+        for i in reversed(range(7)):
+            chunk = TextChunk(self.literature_id, i, "content", f"第{i}块\n文本", 6, 6, {"page_number": i})
+            if i % 3 == 0:
+                chunk.embedding_status = "completed"
+            chunks.append(chunk)
+        db.add_all(chunks)
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_export_all_chunks_in_order(self):
+        parts = list(iter_chunks_ndjson(self.literature_id, batch_size=3))
+        rows = [json.loads(line) for line in "".join(parts).splitlines()]
+
+        self.assertEqual(len(parts), 3)
+        self.assertEqual([row["chunk_index"] for row in rows], list(range(7)))
+        self.assertEqual(rows[2]["text"], "第2块\n文本")
+        self.assertEqual(rows[2]["metadata"], {"page_number": 2})
+        self.assertIsInstance(rows[0]["created_at"], str)
+
+    def test_filter_by_embedding_status(self):
+        rows = [json.loads(line) for line in "".join(iter_chunks_ndjson(self.literature_id, "completed")).splitlines()]
+
+        self.assertEqual([row["chunk_index"] for row in rows], [0, 3, 6])
+        self.assertEqual(list(iter_chunks_ndjson("missing")), [])
+
+if __name__ == '__main__':
+    unittest.main()
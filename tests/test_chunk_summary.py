@@ -0,0 +1,68 @@
+import unittest
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.chunk_summary import ChunkSummary
+from app.models.text_chunk import TextChunk
+from app.utils.chunk_summary import get_chunk_stats, refresh_chunk_summary
+
+class TestChunkSummary(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([user, group])
+        self.db.commit()
+        literature = Literature("t", "a.html", "a.html", 1, ".html", user.id, group.id)
+        self.db.add(literature)
+        self.db.commit()
+        self.literature_id = literature.id
+
+        chunks = [TextChunk(self.literature_id, i, "content", "文本", 10 + i, 5) for i in range(4)]
+        chunks[0].embedding_status = "completed"
+        chunks[1].embedding_status = "failed"
+        self.db.add_all(chunks)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_stats_from_single_aggregate_then_summary_row(self):
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        stats = get_chunk_stats(self.literature_id, self.db)
+        self.assertEqual(stats, {
+            "total_chunks": 4,
+            "total_chars": 46,
+            "total_tokens": 20,
+            "embedding_status": {"pending": 2, "processing": 0, "completed": 1, "failed": 1}
+        })
+        self.assertEqual(sum(1 for s in statements if "FROM text_chunks" in s), 1)
+
+        # 汇总行已保存，再次读取不访问文本块表
+        statements.clear()
+        self.db.expire_all()
+        self.assertEqual(get_chunk_stats(self.literature_id, self.db), stats)
+        self.assertFalse(any("text_chunks" in s for s in statements))
+
+    def test_refresh_after_update(self):
+        get_chunk_stats(self.literature_id, self.db)
+
+        chunk = self.db.query(TextChunk).filter(TextChunk.chunk_index == 2).first()
+        chunk.embedding_status = "completed"
+        refresh_chunk_summary(self.literature_id, self.db)
+        self.db.commit()
+
+        self.assertEqual(self.db.get(ChunkSummary, self.literature_id).embedding_completed, 2)
+        self.assertEqual(get_chunk_stats("missing", self.db)["total_chunks"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.database import create_db_engine, normalize_database_url
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base, UserResearchGroup
+from app.models.text_chunk import TextChunk
+from app.utils.chunk_summary import get_chunk_stats
+from app.utils.ingestion import claim_literature
+
+class TestDatabaseProfile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.url = f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}"
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _pragma(self, engine, name):
+        with engine.connect() as conn:
+            value = conn.execute(text(f"PRAGMA {name}")).scalar()
+        engine.dispose()
+        return value
+
+    def test_production_profile_enables_wal(self):
+        engine = create_db_engine(self.url, profile="production")
+        self.assertEqual(engine.pool.size(), 10)
+        with engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)
+            self.assertEqual(conn.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+        engine.dispose()
+
+    def test_default_profile_keeps_sqlite_defaults(self):
+        engine = create_db_engine(self.url, profile="default")
+        self.assertEqual(self._pragma(engine, "journal_mode"), "delete")
+
+    def test_in_memory_database_ignores_profile(self):
+        engine = create_db_engine("sqlite://", profile="production")
+        self.assertEqual(self._pragma(engine, "journal_mode"), "memory")
+
+    def test_postgres_url_uses_psycopg(self):
+        self.assertEqual(normalize_database_url("postgres://u:p@db/lit"), "postgresql+psycopg://u:p@db/lit")
+        self.assertEqual(normalize_database_url("postgresql://u:p@db/lit"), "postgresql+psycopg://u:p@db/lit")
+        self.assertEqual(normalize_database_url("postgresql+asyncpg://db/lit"), "postgresql+asyncpg://db/lit")
+        self.assertEqual(normalize_database_url(self.url), self.url)
+
+class TestPostgresSchema(unittest.TestCase):
+    def test_schema_compiles_for_postgres(self):
+        dialect = postgresql.psycopg.dialect()
+        for table in Base.metadata.sorted_tables:
+            ddl = str(CreateTable(table).compile(dialect=dialect))
+            self.assertIn(table.name, ddl)
+            for index in table.indexes:
+                CreateIndex(index).compile(dialect=dialect)
+
+        ddl = str(CreateTable(TextChunk.__table__).compile(dialect=dialect))
+        self.assertIn("metadata JSON", ddl)
+        self.assertIn("created_at TIMESTAMP WITHOUT TIME ZONE NOT NULL", ddl)
+
+class TestModelPortability(unittest.TestCase):
+    """在SQLite临时文件上运行模型和查询；TestModelPortabilityPostgres 在PostgreSQL上运行同样的用例"""
+
+    def database_url(self) -> str:
+        return f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}"
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_db_engine(self.database_url())
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+
+    def tearDown(self):
+        self.db.close()
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_models_and_queries(self):
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([user, group])
+        self.db.commit()
+        self.db.add(UserResearchGroup(user_id=user.id, group_id=group.id))
+
+        base_time = datetime(2024, 1, 1)
+        literature_ids = []
+        for i in range(3):
+            literature = Literature(f"文献{i}", f"{i}.pdf", f"{i}.pdf", 1, ".pdf", user.id, group.id)
+            literature.upload_time = base_time + timedelta(minutes=i)
+            self.db.add(literature)
+            literature_ids.append(literature.id)
+        self.db.commit()
+
+        chunks = [TextChunk(literature_ids[0], i, "content", "深度学习", 4, 2, {"page": i}) for i in range(5)]
+        chunks[0].embedding_status = "completed"
+        self.db.add_all(chunks)
+        self.db.commit()
+
+        # 成员关系
+        self.assertIsNotNone(self.db.query(UserResearchGroup).filter(
+            UserResearchGroup.user_id == user.id, UserResearchGroup.group_id == group.id
+        ).first())
+
+        # 研究组文献列表的游标分页条件
+        first = self.db.query(Literature).filter(
+            Literature.research_group_id == group.id, Literature.status == "active"
+        ).order_by(Literature.upload_time.desc(), Literature.id.desc()).first()
+        rest = self.db.query(Literature).filter(
+            Literature.research_group_id == group.id,
+            Literature.status == "active",
+            or_(Literature.upload_time < first.upload_time,
+                (Literature.upload_time == first.upload_time) & (Literature.id < first.id))
+        ).order_by(Literature.upload_time.desc(), Literature.id.desc()).all()
+        self.assertEqual([item.id for item in rest], literature_ids[1::-1])
+
+        # 文本块按chunk_index游标读取、JSON元数据和聚合统计
+        page = self.db.query(TextChunk).filter(
+            TextChunk.literature_id == literature_ids[0], TextChunk.chunk_index > 2
+        ).order_by(TextChunk.chunk_index).all()
+        self.assertEqual([(chunk.chunk_index, chunk.metadata["page"]) for chunk in page], [(3, 3), (4, 4)])
+        self.assertEqual(get_chunk_stats(literature_ids[0], self.db), {
+            "total_chunks": 5,
+            "total_chars": 20,
+            "total_tokens": 10,
+            "embedding_status": {"pending": 4, "processing": 0, "completed": 1, "failed": 0}
+        })
+
+    def test_claim_literature(self):
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([user, group])
+        self.db.commit()
+        literature = Literature("文献", "a.pdf", "a.pdf", 1, ".pdf", user.id, group.id)
+        self.db.add(literature)
+        self.db.commit()
+
+        # 未认领时认领成功，布尔列和时间比较在两种数据库上行为一致
+        self.assertTrue(claim_literature(literature.id, "a", self.db, {Literature.extract_title: True}))
+        self.db.commit()
+        self.assertFalse(claim_literature(literature.id, "b", self.db))
+        self.assertTrue(claim_literature(literature.id, "a", self.db))
+        self.db.commit()
+
+        # 心跳超时后可以被其他进程接管
+        self.db.query(Literature).filter(Literature.id == literature.id).update(
+            {Literature.extraction_heartbeat_at: datetime.utcnow() - timedelta(days=1)}, synchronize_session=False
+        )
+        self.db.commit()
+        self.assertTrue(claim_literature(literature.id, "b", self.db))
+        self.db.commit()
+        self.db.expire_all()
+        claimed = self.db.get(Literature, literature.id)
+        self.assertEqual(claimed.extraction_owner, "b")
+        self.assertIs(claimed.extract_title, True)
+
+class TestModelPortabilityPostgres(TestModelPortability):
+    """
+    在PostgreSQL上运行同样的模型和查询（使用 psycopg 驱动）：
+    优先使用 TEST_DATABASE_URL 指定的PostgreSQL，未设置时用 testcontainers 启动临时的PostgreSQL容器；
+    都不可用时跳过并输出原因
+    """
+
+    container = None
+    url = None
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            cls.url = cls._start_postgres()
+        except unittest.SkipTest as e:
+            warnings.warn(f"PostgreSQL集成测试已跳过: {e}")
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.container is not None:
+            cls.container.stop()
+            cls.container = None
+
+    @classmethod
+    def _start_postgres(cls) -> str:
+        """返回可用的PostgreSQL URL，没有可用的PostgreSQL时抛出 SkipTest"""
+        try:
+            import psycopg  # noqa: F401
+        except ImportError:
+            raise unittest.SkipTest("未安装 psycopg（pip install 'psycopg[binary]'）")
+
+        url = os.getenv("TEST_DATABASE_URL")
+        if url:
+            if not normalize_database_url(url).startswith("postgresql"):
+                raise unittest.SkipTest(f"TEST_DATABASE_URL 不是PostgreSQL: {url}")
+            return url
+
+        try:
+            from testcontainers.postgres import PostgresContainer
+        except ImportError:
+            raise unittest.SkipTest("未设置 TEST_DATABASE_URL，且未安装 testcontainers[postgres]")
+
+        try:
+            container = PostgresContainer("postgres:16-alpine", driver="psycopg")
+            container.start()
+        except Exception as e:
+            raise unittest.SkipTest(f"无法启动PostgreSQL容器（需要Docker）: {e}")
+        cls.container = container
+        return container.get_connection_url()
+
+    def database_url(self) -> str:
+        return self.url
+
+    def test_connection_uses_psycopg(self):
+        self.assertEqual(self.engine.dialect.name, "postgresql")
+        self.assertEqual(self.engine.dialect.driver, "psycopg")
+        with self.engine.connect() as conn:
+            self.assertTrue(conn.execute(text("SELECT version()")).scalar().startswith("PostgreSQL"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app.utils import extraction_cache as cache_module
+from app.utils.extraction_cache import ExtractionCache, compute_file_digest
+from app.utils.text_extractor import iter_document_texts
+
+class TestExtractionCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = ExtractionCache(os.path.join(self.tmp_dir, "cache"))
+        self.file_path = os.path.join(self.tmp_dir, "paper.html")
+        with open(self.file_path, "w", encoding="utf-8") as f:
+            f.write("<html><body><p>缓存测试标题</p><p>" + "Cached sentence. " * 100 + "</p></body></html>")
+        self.digest = compute_file_digest(self.file_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_second_read_skips_extraction(self):
+        first = list(self.cache.iter_document_texts(self.file_path, self.digest))
+        self.assertEqual(first, list(iter_document_texts(self.file_path)))
+        self.assertTrue(self.cache.has(self.digest))
+
+        with mock.patch.object(cache_module, "iter_document_texts") as extract:
+            second = list(self.cache.iter_document_texts(self.file_path, self.digest))
+        extract.assert_not_called()
+        self.assertEqual(second, first)
+
+    def test_version_change_invalidates(self):
+        list(self.cache.iter_document_texts(self.file_path, self.digest))
+        with mock.patch.object(cache_module, "CLEANER_VERSION", 999):
+            self.assertFalse(self.cache.has(self.digest))
+
+    def test_partial_read_leaves_no_cache(self):
+        pages = self.cache.iter_document_texts(self.file_path, self.digest)
+        next(pages)
+        pages.close()
+        self.assertFalse(self.cache.has(self.digest))
+        self.assertEqual(os.listdir(os.path.dirname(self.cache.get_cache_path(self.digest))), [])
+
+    def test_corrupt_cache_is_rebuilt(self):
+        expected = list(self.cache.iter_document_texts(self.file_path, self.digest))
+        with open(self.cache.get_cache_path(self.digest), "wb") as f:
+            f.write(b"not gzip")
+
+        self.assertEqual(list(self.cache.iter_document_texts(self.file_path, self.digest)), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from fastapi import UploadFile
+
+from app.utils.error_handler import ValidationError
+from app.utils.file_handler import stream_upload_to_file, save_upload_deduplicated, sniff_file_type
+from app.utils.storage_manager import storage_manager
+
+class TestStreamUpload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.target = os.path.join(self.tmp_dir, "group", "paper.pdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _upload(self, content: bytes) -> UploadFile:
+        return UploadFile(file=io.BytesIO(content), filename="paper.pdf")
+
+    def test_stream_in_blocks(self):
+        content = b"%PDF-1.4\n" + b"x" * 10000
+        written = stream_upload_to_file(self._upload(content), self.target, chunk_size=1024)
+
+        self.assertEqual(written, len(content))
+        with open(self.target, "rb") as f:
+            self.assertEqual(f.read(), content)
+
+    def test_oversize_rejected_without_leftovers(self):
+        with self.assertRaises(ValidationError):
+            stream_upload_to_file(self._upload(b"x" * 5000), self.target, max_size=4096, chunk_size=1024)
+
+        # 目标文件和临时文件都不应残留
+        self.assertEqual(os.listdir(os.path.dirname(self.target)), [])
+
+    def test_empty_rejected(self):
+        with self.assertRaises(ValidationError):
+            stream_upload_to_file(self._upload(b""), self.target)
+        self.assertFalse(os.path.exists(self.target))
+
+class TestDeduplicatedUpload(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.saved_roots = (storage_manager.upload_root, storage_manager.blob_root)
+        storage_manager.upload_root = Path(self.tmp_dir)
+        storage_manager.blob_root = Path(self.tmp_dir) / "_blobs"
+
+    def tearDown(self):
+        storage_manager.upload_root, storage_manager.blob_root = self.saved_roots
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _upload(self, content: bytes, filename: str = "paper.pdf") -> UploadFile:
+        return UploadFile(file=io.BytesIO(content), filename=filename)
+
+    def test_same_content_shares_blob(self):
+        content = b"%PDF-1.4\n" + b"y" * 4096
+        first = save_upload_deduplicated(self._upload(content), "group-a")
+        second = save_upload_deduplicated(self._upload(content), "group-b")
+
+        self.assertFalse(first["deduplicated"])
+        self.assertTrue(second["deduplicated"])
+        self.assertEqual(first["sha256"], second["sha256"])
+        self.assertEqual(first["file_size"], len(content))
+        self.assertEqual(first["detected_type"], ".pdf")
+        # 两个研究组的文件指向同一份磁盘内容
+        self.assertEqual(os.stat(first["file_path"]).st_ino, os.stat(second["file_path"]).st_ino)
+
+    def test_mismatched_content_rejected(self):
+        with self.assertRaises(ValidationError):
+            save_upload_deduplicated(self._upload(b"%PDF-1.4 fake", "paper.docx"), "group-a")
+        blob_files = [p for p in (Path(self.tmp_dir) / "_blobs").rglob("*") if p.is_file()]
+        self.assertEqual(blob_files, [])
+
+    def test_sniff_file_type(self):
+        self.assertEqual(sniff_file_type(b"%PDF-1.7"), ".pdf")
+        self.assertEqual(sniff_file_type(b"PK\x03\x04rest"), ".docx")
+        self.assertEqual(sniff_file_type(b"\n  <!DOCTYPE html><html>"), ".html")
+        self.assertIsNone(sniff_file_type(b"plain text"))
+
+if __name__ == '__main__':
+    unittest.main()
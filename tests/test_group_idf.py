@@ -0,0 +1,125 @@
+import math
+import os
+import tempfile
+import threading
+import unittest
+
+from app.utils.group_idf import GroupIdfManager, fcntl, migrate_legacy_index
+
+class TestGroupIdfManager(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.manager = GroupIdfManager(self.tmp.name)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_group_idf_weights_rare_terms(self):
+        self.manager.add_literature("g1", "a", {"模型": 3, "知识图谱": 2})
+        self.manager.add_literature("g1", "b", {"模型": 5, "检索": 1})
+        self.manager.add_literature("g1", "c", {"模型": 1})
+
+        keywords = self.manager.extract_keywords("g1", "a", top_k=2)
+        self.assertEqual([w for w, _ in keywords], ["知识图谱", "模型"])
+
+        # 与 TfidfVectorizer(sublinear_tf=True, smooth_idf=True) 的公式一致
+        expected = [(1 + math.log(2)) * (math.log(4 / 2) + 1), (1 + math.log(3)) * (math.log(4 / 4) + 1)]
+        norm = math.sqrt(sum(w * w for w in expected))
+        self.assertAlmostEqual(keywords[0][1], round(expected[0] / norm, 4))
+
+        self.assertIsNone(self.manager.extract_keywords("g1", "missing"))
+        self.assertEqual(self.manager.get_group_summary("g1"), {"documents": 3, "vocabulary_size": 3})
+
+    def test_soft_delete_and_restore(self):
+        self.manager.add_literature("g1", "a", {"模型": 1, "检索": 1})
+        self.manager.add_literature("g1", "b", {"模型": 1})
+        before = self.manager.extract_keywords("g1", "a")
+
+        self.assertTrue(self.manager.deactivate_literature("g1", "b"))
+        self.assertFalse(self.manager.deactivate_literature("g1", "b"))
+        self.assertEqual(self.manager.get_group_summary("g1")["documents"], 1)
+        # 只剩一篇文献时两个词的IDF相同
+        weights = dict(self.manager.extract_keywords("g1", "a"))
+        self.assertAlmostEqual(weights["模型"], weights["检索"])
+
+        self.assertTrue(self.manager.activate_literature("g1", "b"))
+        self.assertEqual(self.manager.extract_keywords("g1", "a"), before)
+
+    def test_reindex_replaces_previous_vector(self):
+        self.manager.add_literature("g1", "a", {"模型": 1})
+        self.manager.add_literature("g1", "a", {"检索": 2})
+
+        self.assertEqual(self.manager.get_group_summary("g1")["documents"], 1)
+        self.assertEqual([w for w, _ in self.manager.extract_keywords("g1", "a")], ["检索"])
+
+        # 新的管理器实例（如另一个进程）读取到相同的词表和文档频率
+        other = GroupIdfManager(self.tmp.name)
+        self.assertEqual(other.extract_keywords("g1", "a"), self.manager.extract_keywords("g1", "a"))
+
+    def test_reads_wait_for_writer(self):
+        self.manager.add_literature("g1", "a", {"模型": 1})
+        self.assertIsNone(self.manager.extract_keywords("missing", "a"))
+        self.assertEqual(self.manager.get_group_summary("missing"), {"documents": 0, "vocabulary_size": 0})
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, "missing")))
+        if fcntl is None:
+            self.skipTest("需要fcntl文件锁")
+
+        # 另一个进程持有写锁（排他文件锁）期间，读取等待写入完成
+        results = []
+        lock_file = open(os.path.join(self.tmp.name, "g1", ".lock"), "a")
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        reader = threading.Thread(target=lambda: results.append(self.manager.get_group_summary("g1")))
+        reader.start()
+        reader.join(0.2)
+        self.assertTrue(reader.is_alive())
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+        lock_file.close()
+        reader.join(5)
+        self.assertEqual(results, [{"documents": 1, "vocabulary_size": 1}])
+
+    def test_vocabulary_cache_bounded(self):
+        manager = GroupIdfManager(self.tmp.name, vocabulary_cache_size=2)
+        for group_id in ("g1", "g2", "g3"):
+            manager.add_literature(group_id, "a", {group_id: 1})
+            self.assertEqual(manager.extract_keywords(group_id, "a"), [(group_id, 1.0)])
+        self.assertEqual(list(manager._vocabulary_cache), ["g2", "g3"])
+
+        # 被淘汰的研究组重新从文件读取
+        self.assertEqual(manager.extract_keywords("g1", "a"), [("g1", 1.0)])
+        self.assertEqual(list(manager._vocabulary_cache), ["g3", "g1"])
+
+    def test_migrate_legacy_index(self):
+        legacy = os.path.join(self.tmp.name, "cache", "group_idf")
+        root = os.path.join(self.tmp.name, "data", "group_idf")
+        GroupIdfManager(legacy).add_literature("g1", "a", {"模型": 1})
+
+        self.assertTrue(migrate_legacy_index(legacy, root))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(GroupIdfManager(root).get_group_summary("g1"), {"documents": 1, "vocabulary_size": 1})
+        # 数据目录已存在时不再迁移
+        self.assertFalse(migrate_legacy_index(legacy, root))
+
+    def test_concurrent_migration_moves_once(self):
+        legacy = os.path.join(self.tmp.name, "cache", "group_idf")
+        root = os.path.join(self.tmp.name, "data", "group_idf")
+        GroupIdfManager(legacy).add_literature("g1", "a", {"模型": 1})
+
+        # 多个工作进程同时启动时只有一个执行移动，其余不报错
+        results, errors = [], []
+        def migrate():
+            try:
+                results.append(migrate_legacy_index(legacy, root))
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=migrate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.assertEqual(GroupIdfManager(root).get_group_summary("g1"), {"documents": 1, "vocabulary_size": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,306 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import config
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.chunk_summary import ChunkSummary
+from app.models.literature_analysis import LiteratureAnalysis
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+from app.utils import extraction_cache as extraction_cache_module
+from app.utils import ingestion
+from app.utils.extraction_cache import extraction_cache
+from app.utils.group_idf import group_idf_manager
+
+class TestIngestionJob(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, 'test.db')
+        engine = create_engine(f"sqlite:///{self.db_path}")
+        Base.metadata.create_all(bind=engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        self.patcher = mock.patch.object(ingestion, "SessionLocal", self.SessionLocal)
+        self.patcher.start()
+        self.cache_patcher = mock.patch.object(extraction_cache, "cache_root", os.path.join(self.tmp_dir, "cache"))
+        self.cache_patcher.start()
+        self.idf_patcher = mock.patch.object(group_idf_manager, "root_dir", os.path.join(self.tmp_dir, "idf"))
+        self.idf_patcher.start()
+
+        db = self.SessionLocal()
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        db.add_all([user, group])
+        db.commit()
+        self.user_id, self.group_id = user.id, group.id
+        db.close()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.cache_patcher.stop()
+        self.idf_patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _create_literature(self, filename: str, content: str, file_hash: str = None, extract_title: bool = False) -> str:
+        file_path = os.path.join(self.tmp_dir, filename)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+        db = self.SessionLocal()
+        literature = Literature(filename, filename, file_path, len(content), ".html",
+                                self.user_id, self.group_id, file_hash=file_hash, extract_title=extract_title)
+        db.add(literature)
+        db.commit()
+        literature_id = literature.id
+        db.close()
+        return literature_id
+
+    def test_completed_with_chunks_and_title(self):
+        body = "深度学习在文献分析中的应用。" * 200
+        literature_id = self._create_literature(
+            "paper.html", f"<html><body><p>文献标题</p><p>{body}</p></body></html>"
+        )
+
+        result = ingestion.run_ingestion_job(literature_id, update_title=True)
+
+        self.assertEqual(result["status"], "completed")
+        db = self.SessionLocal()
+        literature = db.query(Literature).filter(Literature.id == literature_id).first()
+        chunk_count = db.query(TextChunk).filter(TextChunk.literature_id == literature_id).count()
+        self.assertEqual(literature.text_extraction_status, "completed")
+        self.assertNotEqual(literature.title, "paper.html")
+        self.assertEqual(chunk_count, result["chunk_count"])
+        self.assertGreater(chunk_count, 1)
+        # 处理完成时已预计算分析结果
+        analysis = db.get(LiteratureAnalysis, literature_id)
+        self.assertEqual(analysis.chunk_count, chunk_count)
+        self.assertEqual(db.get(ChunkSummary, literature_id).total_chunks, chunk_count)
+        db.close()
+
+        # 处理完成后文献已加入研究组关键词索引
+        keywords = group_idf_manager.extract_keywords(self.group_id, literature_id, top_k=3)
+        self.assertIn("深度学习", [w for w, _ in keywords])
+
+    def test_duplicate_reuses_chunks(self):
+        content = "<html><body>" + "Reusable content sentence. " * 200 + "</body></html>"
+        first_id = self._create_literature("a.html", content, file_hash="f" * 64)
+        second_id = self._create_literature("b.html", content, file_hash="f" * 64)
+        ingestion.run_ingestion_job(first_id)
+
+        # 第二份文件即使已不存在，也能直接复用文本块
+        os.remove(os.path.join(self.tmp_dir, "b.html"))
+        result = ingestion.run_ingestion_job(second_id)
+
+        self.assertEqual(result["status"], "completed")
+        db = self.SessionLocal()
+        first_texts = [c.text for c in db.query(TextChunk).filter(
+            TextChunk.literature_id == first_id).order_by(TextChunk.chunk_index)]
+        second_texts = [c.text for c in db.query(TextChunk).filter(
+            TextChunk.literature_id == second_id).order_by(TextChunk.chunk_index)]
+        self.assertEqual(first_texts, second_texts)
+        db.close()
+
+    def test_duplicate_title_from_content_not_source(self):
+        content = "<html><body><p>Shared Paper Title</p>" + "<p>Body sentence here.</p>" * 100 + "</body></html>"
+        first_id = self._create_literature("a.html", content, file_hash="e" * 64)
+        second_id = self._create_literature("b.html", content, file_hash="e" * 64)
+        db = self.SessionLocal()
+        # 复用文本块的来源文献在其他研究组，且标题由用户指定
+        other_group = ResearchGroup("其他组", "机构", "描述", "方向")
+        db.add(other_group)
+        db.commit()
+        source = db.get(Literature, first_id)
+        source.research_group_id, source.title = other_group.id, "其他研究组的标题"
+        db.commit()
+        db.close()
+        ingestion.run_ingestion_job(first_id)
+
+        ingestion.run_ingestion_job(second_id, update_title=True)
+
+        db = self.SessionLocal()
+        self.assertTrue(db.get(Literature, second_id).title.startswith("Shared Paper Title"))
+        self.assertEqual(db.get(Literature, first_id).title, "其他研究组的标题")
+        db.close()
+
+    def test_no_write_lock_while_parsing(self):
+        # 重新处理时解析文档期间，其他连接的写操作不需要等待写锁
+        content = "<html><body>" + "Parsed while others write. " * 200 + "</body></html>"
+        literature_id = self._create_literature("c.html", content)
+        ingestion.run_ingestion_job(literature_id)
+        extraction_cache.remove(extraction_cache_module.compute_file_digest(os.path.join(self.tmp_dir, "c.html")))
+
+        writes = []
+        original = extraction_cache_module.iter_document_texts
+
+        def parse_and_write(file_path):
+            conn = sqlite3.connect(self.db_path, timeout=0)
+            try:
+                conn.execute("UPDATE research_groups SET description = 'x'")
+                conn.commit()
+                writes.append(file_path)
+            finally:
+                conn.close()
+            yield from original(file_path)
+
+        with mock.patch.object(extraction_cache_module, "iter_document_texts", parse_and_write):
+            result = ingestion.run_ingestion_job(literature_id)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(len(writes), 1)
+
+    def _chunk_texts(self, literature_id: str, chunk_type: str = "literature_text"):
+        db = self.SessionLocal()
+        try:
+            return [text for (text,) in db.query(TextChunk.text).filter(
+                TextChunk.literature_id == literature_id, TextChunk.chunk_type == chunk_type
+            ).order_by(TextChunk.chunk_index)]
+        finally:
+            db.close()
+
+    def _reprocess_observing_batches(self, literature_id: str, fail_after: int = None):
+        """以每批2个文本块重新处理文献，在写入第5个文本块前检查数据库状态"""
+        observed = {}
+        original = ingestion.iter_text_chunks
+
+        def observing_chunks(*args, **kwargs):
+            for index, chunk in enumerate(original(*args, **kwargs)):
+                if index == 4:
+                    observed["staged"] = len(self._chunk_texts(literature_id, STAGING_CHUNK_TYPE))
+                    observed["visible"] = self._chunk_texts(literature_id)
+                    conn = sqlite3.connect(self.db_path, timeout=0)
+                    conn.execute("UPDATE research_groups SET description = 'x'")
+                    conn.commit()
+                    conn.close()
+                    if fail_after is not None:
+                        raise RuntimeError("处理中断")
+                yield chunk
+
+        with mock.patch.object(ingestion.config, "CHUNK_PERSIST_BATCH_SIZE", 2), \
+                mock.patch.object(ingestion, "iter_text_chunks", observing_chunks):
+            result = ingestion.run_ingestion_job(literature_id)
+        return result, observed
+
+    def test_batches_committed_as_staged_chunks(self):
+        # 新文本块逐批提交为暂存文本块，处理期间读取到的仍是旧文本块，最后一次性替换
+        content = "<html><body>" + "Staged sentence for batching. " * 200 + "</body></html>"
+        literature_id = self._create_literature("d.html", content)
+        ingestion.run_ingestion_job(literature_id)
+        old_texts = self._chunk_texts(literature_id)
+
+        result, observed = self._reprocess_observing_batches(literature_id)
+
+        self.assertEqual(result["status"], "completed")
+        self.assertEqual(observed["staged"], 4)
+        self.assertEqual(observed["visible"], old_texts)
+        self.assertEqual(self._chunk_texts(literature_id), old_texts)
+        self.assertEqual(self._chunk_texts(literature_id, STAGING_CHUNK_TYPE), [])
+        db = self.SessionLocal()
+        self.assertEqual(db.get(ChunkSummary, literature_id).total_chunks, len(old_texts))
+        db.close()
+
+    def test_failure_keeps_old_chunks(self):
+        # 处理中途失败时清理已提交的暂存文本块，旧文本块保持不变
+        content = "<html><body>" + "Old chunks survive failures. " * 200 + "</body></html>"
+        literature_id = self._create_literature("e.html", content)
+        ingestion.run_ingestion_job(literature_id)
+        old_texts = self._chunk_texts(literature_id)
+
+        result, observed = self._reprocess_observing_batches(literature_id, fail_after=4)
+
+        self.assertEqual(result["status"], "failed")
+        self.assertEqual(observed["staged"], 4)
+        self.assertEqual(self._chunk_texts(literature_id), old_texts)
+        self.assertEqual(self._chunk_texts(literature_id, STAGING_CHUNK_TYPE), [])
+
+    def _literature(self, literature_id: str) -> Literature:
+        db = self.SessionLocal()
+        literature = db.get(Literature, literature_id)
+        db.close()
+        return literature
+
+    def test_recovery_claims_before_submitting(self):
+        first_id = self._create_literature("r1.html", "<html><body>恢复</body></html>", extract_title=True)
+        second_id = self._create_literature("r2.html", "<html><body>恢复</body></html>")
+
+        # 两个应用进程同时启动：只有先认领的进程提交任务
+        managers = [ingestion.IngestionManager(max_workers=1), ingestion.IngestionManager(max_workers=1)]
+        submitted = {manager.owner_id: [] for manager in managers}
+        db = self.SessionLocal()
+        for manager in managers:
+            with mock.patch.object(manager, "submit", lambda lit_id, m=manager: submitted[m.owner_id].append(lit_id) or True):
+                manager.recover_unfinished(db)
+        self.assertEqual(sorted(submitted[managers[0].owner_id]), sorted([first_id, second_id]))
+        self.assertEqual(submitted[managers[1].owner_id], [])
+        self.assertEqual(self._literature(first_id).extraction_owner, managers[0].owner_id)
+
+        # 认领进程超时未更新心跳后，其他进程可以接管
+        db.query(Literature).filter(Literature.id == first_id).update({
+            Literature.extraction_heartbeat_at: datetime.utcnow() - timedelta(seconds=config.INGESTION_CLAIM_TIMEOUT_SECONDS + 1)
+        })
+        db.commit()
+        with mock.patch.object(managers[1], "submit", lambda lit_id: submitted[managers[1].owner_id].append(lit_id) or True):
+            self.assertEqual(managers[1].recover_unfinished(db), 1)
+        self.assertEqual(submitted[managers[1].owner_id], [first_id])
+        db.close()
+
+        # 另一个进程的任务不会处理已被接管的文献
+        self.assertEqual(ingestion.run_ingestion_job(first_id, owner=managers[0].owner_id)["status"], "skipped")
+        self.assertEqual(self._literature(first_id).text_extraction_status, "pending")
+
+        # 接管的进程按保存的标记提取标题，完成后释放认领
+        result = ingestion.run_ingestion_job(first_id, owner=managers[1].owner_id)
+        self.assertEqual(result["status"], "completed")
+        literature = self._literature(first_id)
+        self.assertEqual(literature.title, "恢复")
+        self.assertFalse(literature.extract_title)
+        self.assertIsNone(literature.extraction_owner)
+
+    def test_claim_lost_mid_job_stops_writing(self):
+        content = "<html><body>" + "Taken over while streaming. " * 200 + "</body></html>"
+        literature_id = self._create_literature("t.html", content)
+        original = ingestion.iter_text_chunks
+
+        def taken_over(*args, **kwargs):
+            for index, chunk in enumerate(original(*args, **kwargs)):
+                if index == 4:
+                    # 另一个进程在本进程心跳超时后接管
+                    db = self.SessionLocal()
+                    db.query(Literature).filter(Literature.id == literature_id).update(
+                        {Literature.extraction_owner: "other"}
+                    )
+                    db.commit()
+                    db.close()
+                yield chunk
+
+        with mock.patch.object(ingestion.config, "CHUNK_PERSIST_BATCH_SIZE", 2), \
+                mock.patch.object(ingestion, "iter_text_chunks", taken_over):
+            result = ingestion.run_ingestion_job(literature_id)
+
+        self.assertEqual(result["status"], "superseded")
+        literature = self._literature(literature_id)
+        self.assertEqual((literature.text_extraction_status, literature.extraction_owner), ("processing", "other"))
+        # 接管后不再写入文本块（已提交的两批暂存文本块由接管的进程清理）
+        self.assertEqual(len(self._chunk_texts(literature_id, STAGING_CHUNK_TYPE)), 4)
+        self.assertEqual(self._chunk_texts(literature_id), [])
+
+    def test_failure_marks_failed(self):
+        literature_id = self._create_literature("empty.html", "<html><body></body></html>")
+
+        result = ingestion.run_ingestion_job(literature_id)
+
+        self.assertEqual(result["status"], "failed")
+        db = self.SessionLocal()
+        literature = db.query(Literature).filter(Literature.id == literature_id).first()
+        self.assertEqual(literature.text_extraction_status, "failed")
+        self.assertTrue(literature.text_extraction_error)
+        db.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.literature_analysis import LiteratureAnalysis
+from app.models.text_chunk import TextChunk
+from app.utils import literature_analysis
+from app.utils.group_idf import group_idf_manager
+from app.utils.literature_analysis import (
+    compute_literature_analysis, get_literature_analysis, invalidate_literature_analysis
+)
+
+class TestLiteratureAnalysis(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}")
+        Base.metadata.create_all(bind=engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+        self.idf_patcher = mock.patch.object(group_idf_manager, "root_dir", os.path.join(self.tmp_dir, "idf"))
+        self.idf_patcher.start()
+
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([user, group])
+        self.db.commit()
+        literature = Literature("t", "a.html", "a.html", 1, ".html", user.id, group.id)
+        self.db.add(literature)
+        self.db.commit()
+        self.literature_id, self.group_id = literature.id, group.id
+
+        texts = ["知识图谱用于文献检索。", "知识图谱连接作者和机构。"]
+        self.db.add_all([
+            TextChunk(self.literature_id, i, "content", text, len(text), len(text))
+            for i, text in enumerate(texts)
+        ])
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+        self.idf_patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_analysis_is_stored_and_reused(self):
+        analysis = compute_literature_analysis(self.literature_id, self.db)
+        self.assertEqual(analysis.chunk_count, 2)
+        self.assertEqual(analysis.keywords[0]["word"], "知识图谱")
+        self.assertIn("chinese_chars", analysis.statistics)
+        # 合并得到的词频同时加入了研究组关键词索引
+        self.assertEqual(group_idf_manager.get_group_summary(self.group_id)["documents"], 1)
+
+        with mock.patch.object(literature_analysis.text_analyzer, "analyze_chunks") as analyze_chunks:
+            self.assertIs(get_literature_analysis(self.literature_id, self.db), analysis)
+            analyze_chunks.assert_not_called()
+
+    def test_invalidated_or_outdated_analysis_is_recomputed(self):
+        compute_literature_analysis(self.literature_id, self.db)
+
+        chunk = self.db.query(TextChunk).filter(TextChunk.chunk_index == 1).first()
+        chunk.text = "全新的内容"
+        invalidate_literature_analysis(self.literature_id, self.db, chunk_ids=[chunk.id])
+        self.db.commit()
+        self.assertIsNone(self.db.get(LiteratureAnalysis, self.literature_id))
+
+        # 只重新分析修改过的文本块，文献级结果由分段结果合并得到
+        analyze_chunks = mock.Mock(wraps=literature_analysis.text_analyzer.analyze_chunks)
+        with mock.patch.object(literature_analysis.text_analyzer, "analyze_chunks", analyze_chunks):
+            analysis = get_literature_analysis(self.literature_id, self.db)
+        analyze_chunks.assert_called_once_with(["全新的内容"])
+        full_text = "知识图谱用于文献检索。\n\n全新的内容"
+        self.assertEqual(analysis.statistics, literature_analysis.text_analyzer.get_text_stats(full_text))
+
+        # 分析逻辑版本变化后自动重新计算
+        analysis.analyzer_version = 0
+        self.db.commit()
+        with mock.patch.object(literature_analysis, "ANALYZER_VERSION", 99):
+            self.assertEqual(get_literature_analysis(self.literature_id, self.db).analyzer_version, 99)
+
+if __name__ == '__main__':
+    unittest.main()
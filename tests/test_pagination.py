@@ -0,0 +1,137 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import STAGING_CHUNK_TYPE, TextChunk
+from app.utils.error_handler import ValidationError
+from app.utils.pagination import (
+    encode_cursor, decode_cursor, paginate_chunks, paginate_literature, split_page
+)
+
+class TestCursor(unittest.TestCase):
+    def test_round_trip(self):
+        upload_time = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        cursor = encode_cursor({"upload_time": upload_time, "id": "文献-1"})
+
+        self.assertNotIn("=", cursor)
+        self.assertEqual(
+            decode_cursor(cursor, ["upload_time", "id"], datetime_fields=["upload_time"]),
+            {"upload_time": upload_time, "id": "文献-1"}
+        )
+        self.assertEqual(decode_cursor(encode_cursor({"chunk_index": 41}), ["chunk_index"]), {"chunk_index": 41})
+
+    def test_invalid_cursor(self):
+        for cursor in ("not-base64!", encode_cursor({"id": "x"}), encode_cursor({"upload_time": "bad", "id": "x"})):
+            with self.assertRaises(ValidationError):
+                decode_cursor(cursor, ["upload_time", "id"], datetime_fields=["upload_time"])
+
+class TestKeysetPages(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=self.engine)
+        self.db = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)()
+
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([user, group])
+        self.db.commit()
+        self.group_id = group.id
+
+        # 大部分文献的上传时间相同（批量导入），只能靠ID区分先后
+        shared_time = datetime(2024, 5, 1, 12, 30, 15, 123456)
+        times = [shared_time] * 9 + [shared_time + timedelta(seconds=1), shared_time - timedelta(microseconds=1)]
+        for i, upload_time in enumerate(times):
+            literature = Literature(f"t{i}", f"{i}.pdf", f"{i}.pdf", 1, ".pdf", user.id, group.id)
+            literature.upload_time = upload_time
+            self.db.add(literature)
+        deleted = Literature("deleted", "d.pdf", "d.pdf", 1, ".pdf", user.id, group.id)
+        deleted.upload_time = shared_time
+        deleted.status = "deleted"
+        self.db.add(deleted)
+        self.db.commit()
+        self.literature_id = deleted.id
+
+        # 文本块编号不连续，并混有入库中的暂存块
+        self.db.add_all(
+            [TextChunk(self.literature_id, i, "content", f"块{i}", 2, 2) for i in range(0, 30, 2)]
+            + [TextChunk(self.literature_id, i, STAGING_CHUNK_TYPE, f"暂存{i}", 3, 3) for i in range(1, 30, 4)]
+        )
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def _literature_query(self):
+        # 与文献列表接口相同的过滤条件
+        return self.db.query(Literature, User).join(User, Literature.uploaded_by == User.id).filter(
+            Literature.research_group_id == self.group_id,
+            Literature.status == "active"
+        )
+
+    def _chunk_statement(self):
+        # 与文本块列表接口相同的过滤条件
+        return select(TextChunk).where(
+            TextChunk.literature_id == self.literature_id,
+            TextChunk.chunk_type != STAGING_CHUNK_TYPE
+        )
+
+    def test_literature_pages_with_shared_upload_time(self):
+        expected = [
+            literature.id for literature, _ in self._literature_query().order_by(
+                Literature.upload_time.desc(), Literature.id.desc()
+            )
+        ]
+        self.assertEqual(len(expected), 11)
+
+        for limit in (1, 2, 3, 11, 50):
+            seen, cursor, pages = [], None, 0
+            while True:
+                rows, cursor = split_page(
+                    paginate_literature(self._literature_query(), limit, cursor).all(), limit,
+                    lambda row: {"upload_time": row[0].upload_time, "id": row[0].id}
+                )
+                self.assertLessEqual(len(rows), limit)
+                seen.extend(literature.id for literature, _ in rows)
+                pages += 1
+                if cursor is None:
+                    break
+            # 没有遗漏或重复，顺序与不分页的查询一致
+            self.assertEqual(seen, expected, f"limit={limit}")
+            self.assertEqual(pages, -(-len(expected) // limit))
+
+    def test_chunk_pages_follow_next_cursor(self):
+        expected = list(range(0, 30, 2))
+
+        for limit in (1, 4, 15, 100):
+            seen, cursor = [], None
+            while True:
+                chunks, cursor = split_page(
+                    self.db.scalars(paginate_chunks(self._chunk_statement(), limit, cursor)), limit,
+                    lambda chunk: {"chunk_index": chunk.chunk_index}
+                )
+                seen.extend(chunk.chunk_index for chunk in chunks)
+                if cursor is None:
+                    break
+            self.assertEqual(seen, expected, f"limit={limit}")
+
+        # 第一页按skip偏移，之后的页面沿游标继续
+        chunks, cursor = split_page(
+            self.db.scalars(paginate_chunks(self._chunk_statement(), 4, skip=3)), 4,
+            lambda chunk: {"chunk_index": chunk.chunk_index}
+        )
+        self.assertEqual([chunk.chunk_index for chunk in chunks], [6, 8, 10, 12])
+        chunks, _ = split_page(
+            self.db.scalars(paginate_chunks(self._chunk_statement(), 4, cursor, skip=3)), 4,
+            lambda chunk: {"chunk_index": chunk.chunk_index}
+        )
+        self.assertEqual([chunk.chunk_index for chunk in chunks], [14, 16, 18, 20])
+
+        with self.assertRaises(ValidationError):
+            paginate_chunks(self._chunk_statement(), 4, "not-base64!")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, event, inspect, or_
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, UserResearchGroup, Literature
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk
+from app.utils import chunk_export
+from app.utils.auth_helper import get_user_groups, verify_group_membership, verify_literature_access
+from app.utils.chunk_export import iter_chunks_ndjson
+from app.utils.chunk_summary import get_chunk_stats
+from app.utils.literature_manager import get_deleted_literature, get_literature_stats
+from app.utils.schema_migrations import MIGRATIONS, get_schema_version, upgrade_database
+
+# 早期版本的数据库结构（literature 表只有基础字段，没有文本块和分析相关的表）
+LEGACY_SCHEMA = [
+    "CREATE TABLE users (id VARCHAR NOT NULL, username VARCHAR NOT NULL, email VARCHAR NOT NULL, "
+    "password_hash VARCHAR NOT NULL, PRIMARY KEY (id), UNIQUE (username), UNIQUE (email))",
+    "CREATE TABLE research_groups (id VARCHAR NOT NULL, name VARCHAR NOT NULL, institution VARCHAR, "
+    "description VARCHAR, research_area VARCHAR, invitation_code VARCHAR, PRIMARY KEY (id), UNIQUE (invitation_code))",
+    "CREATE TABLE user_research_groups (user_id VARCHAR NOT NULL, group_id VARCHAR NOT NULL, "
+    "PRIMARY KEY (user_id, group_id))",
+    "CREATE TABLE literature (id VARCHAR NOT NULL, title VARCHAR NOT NULL, filename VARCHAR NOT NULL, "
+    "file_path VARCHAR NOT NULL, file_size INTEGER NOT NULL, file_type VARCHAR NOT NULL, upload_time DATETIME NOT NULL, "
+    "uploaded_by VARCHAR NOT NULL, research_group_id VARCHAR NOT NULL, status VARCHAR NOT NULL, PRIMARY KEY (id))",
+    "INSERT INTO literature VALUES ('old', 't', 'a.pdf', 'a.pdf', 1, '.pdf', '2024-01-01 00:00:00', 'u', 'g', 'active')",
+]
+
+class TestSchemaMigrations(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def assert_latest_schema(self):
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            self.assertTrue(inspector.has_table(table.name), table.name)
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            self.assertEqual(columns, set(table.columns.keys()), table.name)
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            self.assertEqual(indexes, {index.name for index in table.indexes}, table.name)
+
+    def test_upgrade_new_database(self):
+        self.assertEqual(get_schema_version(self.engine), 0)
+        self.assertEqual(upgrade_database(self.engine), [migration.version for migration in MIGRATIONS])
+        self.assert_latest_schema()
+        self.assertEqual(get_schema_version(self.engine), MIGRATIONS[-1].version)
+        self.assertEqual(upgrade_database(self.engine), [])
+
+    def test_upgrade_legacy_database(self):
+        with self.engine.begin() as conn:
+            for statement in LEGACY_SCHEMA:
+                conn.exec_driver_sql(statement)
+
+        upgrade_database(self.engine)
+        self.assert_latest_schema()
+
+        db = sessionmaker(bind=self.engine)()
+        literature = db.get(Literature, "old")
+        self.assertEqual(literature.text_extraction_status, "pending")
+        db.close()
+
+    def test_upgrade_database_created_by_create_all(self):
+        Base.metadata.create_all(bind=self.engine)
+        upgrade_database(self.engine)
+        self.assert_latest_schema()
+
+class TestHotQueriesUseIndexes(unittest.TestCase):
+    """对研究组、文献和文本块接口执行的查询做 EXPLAIN QUERY PLAN，不允许全表扫描"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}")
+        upgrade_database(self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.db = self.SessionLocal()
+
+        self.user = User(username="tester", email="tester@example.com", password_hash="x")
+        self.group = ResearchGroup("组", "机构", "描述", "方向")
+        self.db.add_all([self.user, self.group])
+        self.db.commit()
+        self.db.add(UserResearchGroup(user_id=self.user.id, group_id=self.group.id))
+        self.literature = Literature("t", "a.pdf", "a.pdf", 1, ".pdf", self.user.id, self.group.id, file_hash="0" * 64)
+        self.db.add(self.literature)
+        self.db.commit()
+        self.db.add_all([TextChunk(self.literature.id, i, "content", "文本", 2, 1) for i in range(3)])
+        self.db.commit()
+
+        self.statements = []
+        event.listen(self.engine, "before_cursor_execute", self._capture)
+
+    def tearDown(self):
+        self.db.close()
+        self.engine.dispose()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _capture(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            self.statements.append((statement, parameters))
+
+    def run_hot_queries(self):
+        db, user_id, group_id, literature = self.db, self.user.id, self.group.id, self.literature
+
+        # 成员关系和权限检查
+        verify_group_membership(user_id, group_id, db)
+        get_user_groups(user_id, db)
+        verify_literature_access(user_id, literature.id, db)
+        db.query(UserResearchGroup).filter(UserResearchGroup.group_id == group_id).all()
+
+        # 研究组文献列表（总数和键集分页）、上传去重、上传者的文献
+        group_filter = (Literature.research_group_id == group_id, Literature.status == 'active')
+        db.query(Literature.id).filter(*group_filter).count()
+        db.query(Literature).filter(*group_filter).filter(or_(
+            Literature.upload_time < literature.upload_time,
+            (Literature.upload_time == literature.upload_time) & (Literature.id < literature.id)
+        )).order_by(Literature.upload_time.desc(), Literature.id.desc()).limit(51).all()
+        db.query(Literature).filter(Literature.file_hash == literature.file_hash).order_by(Literature.upload_time).first()
+        db.query(Literature).filter(Literature.uploaded_by == user_id).all()
+        get_deleted_literature(group_id, user_id, db)
+        get_literature_stats(group_id, db)
+
+        # 文本块列表（游标分页、按类型筛选）、单块读取、统计、按嵌入状态筛选和导出
+        db.query(Literature).filter(Literature.id == literature.id, Literature.status == 'active').first()
+        db.query(TextChunk).filter(TextChunk.literature_id == literature.id, TextChunk.chunk_type == "content").filter(
+            TextChunk.chunk_index > 0
+        ).order_by(TextChunk.chunk_index).limit(101).all()
+        db.query(TextChunk).filter(TextChunk.literature_id == literature.id).count()
+        db.query(TextChunk).filter(TextChunk.id == "missing").first()
+        db.query(TextChunk).filter(TextChunk.embedding_status == "pending").limit(100).all()
+        get_chunk_stats(literature.id, db)
+        with mock.patch.object(chunk_export, "SessionLocal", self.SessionLocal):
+            list(iter_chunks_ndjson(literature.id, embedding_status="completed"))
+
+    def test_no_full_table_scans(self):
+        self.run_hot_queries()
+        event.remove(self.engine, "before_cursor_execute", self._capture)
+        self.assertGreater(len(self.statements), 15)
+
+        tables = set(Base.metadata.tables)
+        with self.engine.connect() as conn:
+            for statement, parameters in self.statements:
+                plan = [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                for detail in plan:
+                    match = re.match(r"SCAN (\w+)", detail)
+                    self.assertFalse(
+                        match and match.group(1) in tables,
+                        f"全表扫描: {detail}\n{statement}"
+                    )
+
+if __name__ == '__main__':
+    unittest.main()
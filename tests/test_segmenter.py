@@ -0,0 +1,77 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import jieba
+
+from app.utils import segmenter as segmenter_module
+from app.utils.segmenter import Segmenter, SegmenterCompatibilityError
+
+class TestSegmenter(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.user_dict = os.path.join(self.tmp_dir, "user_dict.txt")
+        with open(self.user_dict, "w", encoding="utf-8") as f:
+            f.write("协同文献库 1000 n\nBERT-base 1000 n\n")
+        self.cache_dir = os.path.join(self.tmp_dir, "jieba")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_user_dict_and_cache(self):
+        segmenter = Segmenter(self.user_dict, self.cache_dir, parallel_threshold=0)
+
+        self.assertIn("协同文献库", segmenter.cut("我们搭建了协同文献库平台"))
+        self.assertTrue(os.listdir(self.cache_dir))
+
+    def test_parallel_matches_serial(self):
+        text = "".join(f"第{i}行：深度学习模型在协同文献库中的应用 Deep learning {i}.\n" for i in range(400))
+        serial = Segmenter(self.user_dict, self.cache_dir, parallel_threshold=0)
+        parallel = Segmenter(self.user_dict, self.cache_dir, parallel_threshold=1000, max_workers=2)
+        try:
+            self.assertGreater(len(parallel._split_blocks(text)), 1)
+            self.assertEqual(parallel.cut(text), serial.cut(text))
+        finally:
+            parallel.shutdown()
+
+    def test_matches_jieba(self):
+        # 按中文段缓存的分词结果与 jieba.Tokenizer.lcut 完全相同（两种分词器实现都验证）
+        reference = jieba.Tokenizer()
+        reference.tmp_dir = self.cache_dir
+        reference.initialize()
+        reference.load_userdict(self.user_dict)
+
+        rng = random.Random(0)
+        pieces = ["协同文献库", "深度学习", "模型", "的", "BERT-base", "pre-trained", "3.5%", "v2.0", "C++",
+                  "Deep", "learning", " ", "\n", "，", "。", "!", "😀", "ｆｕｌｌ", "x-y", "--", "#1"]
+        texts = ["".join(rng.choice(pieces) for _ in range(rng.randint(0, 40))) for _ in range(300)]
+
+        for tokenizer_class in {segmenter_module._TOKENIZER_CLASS, jieba.Tokenizer}:
+            with mock.patch.object(segmenter_module, "_TOKENIZER_CLASS", tokenizer_class):
+                segmenter = Segmenter(self.user_dict, self.cache_dir, parallel_threshold=0, block_cache_size=50)
+                for text in texts:
+                    self.assertEqual(segmenter.cut(text), reference.lcut(text), text)
+                self.assertLessEqual(len(segmenter._block_words), 50)
+
+    def test_incompatible_jieba_fails_loudly(self):
+        # jieba私有方法缺失或行为改变时，加载词典直接报错，而不是静默产生错误的分词结果
+        class MissingMethod(jieba.Tokenizer):
+            _Tokenizer__cut_DAG = None
+
+        class ChangedMethod(jieba.Tokenizer):
+            # 新版本的 cut 不再通过该私有方法分词
+            def cut(self, sentence, *args, **kwargs):
+                return iter(sentence)
+
+        for tokenizer_class in (MissingMethod, ChangedMethod):
+            with mock.patch.object(segmenter_module, "_TOKENIZER_CLASS", tokenizer_class):
+                segmenter = Segmenter(self.user_dict, self.cache_dir, parallel_threshold=0)
+                with self.assertRaises(SegmenterCompatibilityError):
+                    segmenter.cut("深度学习模型")
+                self.assertIsNone(segmenter._tokenizer)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import unicodedata
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from app.utils import text_analyzer as analyzer_module
+from app.utils.text_analyzer import TextAnalyzer
+
+class TestTextAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = TextAnalyzer()
+
+    def test_text_stats(self):
+        text = "深度学习很有效。Deep learning works well! Accuracy is 12.5 percent\n\n第二段"
+        stats = self.analyzer.get_text_stats(text)
+
+        self.assertEqual(stats["total_chars"], len(text))
+        self.assertEqual(stats["chinese_chars"], 10)
+        self.assertEqual(stats["english_words"], 7)
+        self.assertEqual(stats["digits"], 3)
+        self.assertEqual(stats["paragraphs"], 2)
+        self.assertEqual(stats["sentences"], 3)
+        self.assertEqual(self.analyzer.get_text_stats("")["total_chars"], 0)
+
+    def test_keywords_rank_repeated_terms(self):
+        chunks = [
+            f"第{i}部分：知识图谱用于文献检索，知识图谱可以连接作者和机构。Knowledge graph retrieval {i}."
+            for i in range(20)
+        ]
+        keywords = self.analyzer.extract_keywords("\n\n".join(chunks), top_k=5)
+
+        self.assertEqual(len(keywords), 5)
+        self.assertEqual(keywords[0][0], "知识图谱")
+        self.assertEqual([w for w, _ in keywords], [w for w, _ in sorted(keywords, key=lambda k: (-k[1], k[0]))])
+        self.assertNotIn("可以", [w for w, _ in keywords])
+        self.assertEqual(self.analyzer.extract_keywords("", top_k=5), [])
+
+    def test_char_tables_match_unicode_properties(self):
+        # 向量化构建的字符类别表与逐字符按Unicode属性判断的结果一致
+        expected = np.zeros(0x10000, dtype=np.uint8)
+        for code in range(0x10000):
+            char = chr(code)
+            if 0x4E00 <= code <= 0x9FFF:
+                expected[code] = analyzer_module.CHAR_CJK
+            elif char.isspace():
+                expected[code] = analyzer_module.CHAR_SPACE
+            elif char.isdigit():
+                expected[code] = analyzer_module.CHAR_DIGIT
+            elif char.isalpha():
+                expected[code] = analyzer_module.CHAR_LETTER
+            elif code == 0xFFFD or 0xE000 <= code <= 0xF8FF or 0xD800 <= code <= 0xDFFF \
+                    or unicodedata.category(char) == "Cc":
+                expected[code] = analyzer_module.CHAR_GARBLED
+            elif unicodedata.category(char)[0] in "PS":
+                expected[code] = analyzer_module.CHAR_PUNCT
+        np.testing.assert_array_equal(analyzer_module._CHAR_CLASSES, expected)
+
+    def test_filter_terms(self):
+        words = ["知识图谱", "的", "Graph", "graph", "the", "12", "x", "可以", "BERT-base", "知识图谱"]
+        self.assertEqual(self.analyzer._filter_terms(words), ("知识图谱", "graph", "graph", "bert-base", "知识图谱"))
+        self.assertEqual(self.analyzer._filter_terms(words), ("知识图谱", "graph", "graph", "bert-base", "知识图谱"))
+
+    def test_segmentation_is_cached(self):
+        text = "\n\n".join(f"注意力机制第{i}次实验" for i in range(10))
+        first = self.analyzer.extract_keywords(text)
+
+        with mock.patch.object(analyzer_module.segmenter, "cut_many") as cut_many:
+            second = self.analyzer.extract_keywords(text)
+        cut_many.assert_not_called()
+        self.assertEqual(first, second)
+
+    def test_quality_issues(self):
+        clean = "这是一段正常的文献内容，用于测试文本质量检测功能是否会误报。" * 3
+        self.assertEqual(self.analyzer.detect_text_quality_issues(clean), [])
+
+        garbled = clean + "�\x07" * 10
+        types = [issue["type"] for issue in self.analyzer.detect_text_quality_issues(garbled)]
+        self.assertIn("garbled_chars", types)
+
+        header = "\n".join(["Journal of Testing Vol 1"] * 5 + ["正文内容第一行", "正文内容第二行"])
+        types = [issue["type"] for issue in self.analyzer.detect_text_quality_issues(header)]
+        self.assertIn("repeated_lines", types)
+
+        self.assertEqual(self.analyzer.detect_text_quality_issues("  ")[0]["type"], "empty")
+
+    def test_normalize_text(self):
+        text = "ＡＩ模型１２３，效果很好！　Next​  step\r\n\n\n\n  结论\x07 "
+        normalized = self.analyzer.normalize_text(text)
+
+        self.assertEqual(normalized, "AI模型123，效果很好！ Next step\n\n结论")
+        self.assertEqual(self.analyzer.normalize_text(normalized), normalized)
+
+    def test_merged_partials_match_full_text(self):
+        chunks = [
+            "第一段没有句末标点",
+            "Page header line\n深度学习很有效。Deep learning works.\nPage header line",
+            "",
+            "   \n",
+            "Page header line\ninforma-\ntion retrie-\nval and classi-\nfication\n",
+            "第二段。还有一句",
+            "x" * 60 + "\n\nPage header line",
+        ]
+        full_text = "\n\n".join(chunks)
+        merged = self.analyzer.merge_partials(self.analyzer.analyze_chunks(chunks))
+
+        self.assertEqual(self.analyzer.stats_from_merged(merged), self.analyzer.get_text_stats(full_text))
+        self.assertEqual(self.analyzer.quality_issues_from_merged(merged),
+                         self.analyzer.detect_text_quality_issues(full_text))
+
+        # 只有空白的文本块之后没有正文时，末尾不再多算一句
+        tail_chunks = ["第一句。", "未结束的句子", "   "]
+        merged = self.analyzer.merge_partials(self.analyzer.analyze_chunks(tail_chunks))
+        self.assertEqual(self.analyzer.stats_from_merged(merged)["sentences"],
+                         self.analyzer.get_text_stats("\n\n".join(tail_chunks))["sentences"])
+
+    def test_keywords_from_merged(self):
+        chunks = [f"知识图谱第{i}次用于文献检索，知识图谱连接作者。" for i in range(5)] + ["注意力机制只出现一次"]
+        merged = self.analyzer.merge_partials(self.analyzer.analyze_chunks(chunks))
+        keywords = self.analyzer.keywords_from_merged(merged, top_k=3)
+
+        self.assertEqual(keywords[0][0], "知识图谱")
+        self.assertEqual(merged["term_chunks"]["知识图谱"], 5)
+        self.assertEqual(self.analyzer.keywords_from_merged(self.analyzer.merge_partials([]), top_k=3), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app.utils import ingestion
+from app.utils.text_extractor import (
+    extract_pdf_pages,
+    extract_pdf_text,
+    extract_pdf_text_with_pages,
+    clean_text,
+    disable_parallel_pdf_extraction,
+    pdf_page_pool
+)
+from app.utils.text_processor import split_text_into_chunks, attach_page_numbers
+from app.utils.text_cleaner import clean_text_reference
+
+def make_pdf(pages):
+    """生成每页一行文本的最小PDF文件内容"""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        ("<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages))), len(pages))).encode(),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        objects.append((
+            "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        ).encode())
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(output))
+        output += f"{i + 1} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        output += f"{offset:010d} 00000 n \n".encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return output
+
+class TestCleanText(unittest.TestCase):
+    def test_matches_reference(self):
+        samples = [
+            "", "   ", "a @ b", "x.- ,y", ".- A", "a- - b", "a-- b", "A.B.C",
+            "  lead- ", "end.  \t Z", "Hi!!  There", "é.Ö", "a\u3000b\x1c c",
+            "深度学习（DL）模型；效果很好！！Next  step.",
+            "Results ~ 95% ± 2 @ 10°C...and then? Yes",
+            "data-\ndriven methods\n\nNew paragraph. another one",
+        ]
+        for text in samples:
+            self.assertEqual(clean_text(text), clean_text_reference(text), repr(text))
+
+class TestPdfExtraction(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.pages = [f"Page {i} discusses topic number {i}" for i in range(12)]
+        self.pdf_path = os.path.join(self.tmp_dir, "thesis.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(make_pdf(self.pages))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_parallel_matches_serial(self):
+        serial = extract_pdf_pages(self.pdf_path, parallel_threshold=1000)
+        parallel = extract_pdf_pages(self.pdf_path, parallel_threshold=2, max_workers=3)
+
+        self.assertEqual(serial, self.pages)
+        self.assertEqual(parallel, serial)
+
+    def test_page_pool_reused_across_documents(self):
+        self.addCleanup(pdf_page_pool.shutdown)
+        self.assertEqual(extract_pdf_pages(self.pdf_path, parallel_threshold=2, max_workers=2), self.pages)
+        executor = pdf_page_pool._executor
+        self.assertIsNotNone(executor)
+        self.assertEqual(extract_pdf_pages(self.pdf_path, parallel_threshold=2, max_workers=2), self.pages)
+        self.assertIs(pdf_page_pool._executor, executor)
+
+    def test_ingestion_workers_extract_serially(self):
+        # 文献后台处理进程池的工作进程启动时禁用并行提取
+        manager = ingestion.IngestionManager(max_workers=1)
+        self.addCleanup(manager.shutdown)
+        self.assertIs(manager._get_executor()._initializer, disable_parallel_pdf_extraction)
+
+        with mock.patch.object(pdf_page_pool, "enabled", True):
+            disable_parallel_pdf_extraction()
+            self.assertEqual(extract_pdf_pages(self.pdf_path, parallel_threshold=2, max_workers=2), self.pages)
+            self.assertIsNone(pdf_page_pool._executor)
+
+    def test_joined_text_unchanged(self):
+        self.assertEqual(extract_pdf_text(self.pdf_path), clean_text("\n".join(self.pages)))
+
+    def test_chunks_get_page_numbers(self):
+        result = extract_pdf_text_with_pages(self.pdf_path)
+        for page_num, start in enumerate(result["page_starts"]):
+            self.assertTrue(result["text"].startswith(self.pages[page_num], start))
+
+        page_starts = result["page_starts"] + [len(result["text"]) + 1]
+        chunks = split_text_into_chunks(result["text"], chunk_size=60, chunk_overlap=0, token_count_method="chars")
+        attach_page_numbers(chunks, result["page_starts"])
+        for chunk in chunks:
+            start = chunk["start_char"]
+            end = start + chunk["char_length"] - 1
+            self.assertTrue(page_starts[chunk["page_number"] - 1] <= start < page_starts[chunk["page_number"]])
+            self.assertTrue(page_starts[chunk["page_end"] - 1] <= end < page_starts[chunk["page_end"]])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.models import User, ResearchGroup, Literature
+from app.models.chunk_summary import ChunkSummary
+from app.models.research_group import Base
+from app.models.text_chunk import TextChunk
+from app.utils import text_normalization
+from app.utils.chunk_summary import refresh_chunk_summary
+from app.utils.text_normalization import NormalizationManager
+from app.utils.token_counter import TokenCounter
+
+class TestNormalization(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.engine = create_engine(f"sqlite:///{os.path.join(self.tmp_dir, 'test.db')}")
+        Base.metadata.create_all(bind=self.engine)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.patcher = mock.patch.object(text_normalization, "SessionLocal", self.SessionLocal)
+        self.patcher.start()
+
+        db = self.SessionLocal()
+        user = User(username="tester", email="tester@example.com", password_hash="x")
+        group = ResearchGroup("组", "机构", "描述", "方向")
+        db.add_all([user, group])
+        db.commit()
+        literature = Literature("t", "a.html", "a.html", 1, ".html", user.id, group.id)
+        db.add(literature)
+        db.commit()
+        self.literature_id = literature.id
+
+        # 偶数块需要标准化（全角字母和多余空格），奇数块已是标准化文本
+        texts = [f"ＡＢＣ  第{i}块" if i % 2 == 0 else f"第{i}块" for i in range(25)]
+        db.add_all([
+            TextChunk(self.literature_id, i, "content", text, len(text), len(text))
+            for i, text in enumerate(texts)
+        ])
+        refresh_chunk_summary(self.literature_id, db)
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _texts(self):
+        db = self.SessionLocal()
+        texts = [text for (text,) in db.query(TextChunk.text).order_by(TextChunk.chunk_index)]
+        db.close()
+        return texts
+
+    def test_batched_update_only_writes_changed_chunks(self):
+        manager = NormalizationManager(max_workers=1, batch_size=10)
+        statements = []
+        event.listen(self.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        db = self.SessionLocal()
+        progress = []
+        result = manager.normalize_literature(self.literature_id, db, lambda *args: progress.append(args))
+        db.close()
+
+        self.assertEqual(result, {"total_chunks": 25, "normalized_chunks": 13})
+        self.assertEqual(progress[-1], (25, 13))
+        self.assertEqual(len(progress), 3)
+        # 每批一条 executemany UPDATE
+        self.assertEqual(sum(1 for s in statements if s.startswith("UPDATE text_chunks")), 3)
+        self.assertEqual(self._texts()[0], "ABC 第0块")
+
+    def test_background_job_reports_progress(self):
+        manager = NormalizationManager(max_workers=1, batch_size=10)
+        job = manager.submit(self.literature_id, total_chunks=25)
+
+        for _ in range(100):
+            status = manager.get_job(job["job_id"])
+            if status["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+        manager.shutdown()
+
+        self.assertEqual(status["status"], "completed")
+        self.assertEqual(status["total_chunks"], 25)
+        self.assertEqual(status["processed_chunks"], 25)
+        self.assertEqual(status["normalized_chunks"], 13)
+        self.assertIsNotNone(status["finished_at"])
+        self.assertIsNone(manager.get_job("missing"))
+
+        # 改写的文本块的字符数、token数和文本块汇总与新文本一致
+        db = self.SessionLocal()
+        rows = db.query(TextChunk.text, TextChunk.char_length, TextChunk.estimated_tokens).order_by(
+            TextChunk.chunk_index
+        ).all()
+        texts = [text for text, _, _ in rows]
+        self.assertEqual(texts[0], "ABC 第0块")
+        self.assertEqual([char_length for _, char_length, _ in rows], [len(text) for text in texts])
+        self.assertEqual([tokens for _, _, tokens in rows][::2], TokenCounter.count_many(texts[::2]))
+
+        summary = db.get(ChunkSummary, self.literature_id)
+        self.assertEqual(summary.total_chunks, 25)
+        self.assertEqual(summary.total_chars, sum(len(text) for text in texts))
+        self.assertEqual(summary.total_tokens, sum(tokens for _, _, tokens in rows))
+        db.close()
+
+    def test_finished_jobs_expire(self):
+        manager = NormalizationManager(max_workers=1, batch_size=10, job_ttl=60)
+        job = manager.submit(self.literature_id, total_chunks=25)
+        for _ in range(100):
+            if manager.get_job(job["job_id"])["status"] in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+        manager.shutdown()
+
+        with mock.patch.object(text_normalization.time, "monotonic", return_value=time.monotonic() + 59):
+            self.assertIsNotNone(manager.get_job(job["job_id"]))
+        with mock.patch.object(text_normalization.time, "monotonic", return_value=time.monotonic() + 61):
+            self.assertIsNone(manager.get_job(job["job_id"]))
+        self.assertEqual((manager._jobs, manager._finished), ({}, {}))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,19 @@
+import random
+import re
 import unittest
+from bisect import bisect_right
+from unittest import mock
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from app.utils import token_counter
 from app.utils.token_counter import TokenCounter
 from app.utils.text_processor import (
     split_text_into_chunks,
     prepare_chunks_for_embedding,
-    process_literature_text
+    process_literature_text,
+    iter_text_chunks,
+    OffsetTextSplitter,
+    AVG_CHARS_PER_TOKEN,
+    DEFAULT_SEPARATORS
 )
 
 class TestTextProcessing(unittest.TestCase):
@@ -37,6 +47,48 @@ class TestTextProcessing(unittest.TestCase):
         auto_count = TokenCounter.estimate_tokens(text, method="auto")
         self.assertGreater(auto_count, 0)
         
+    def test_count_many_matches_single(self):
+        # 批量计数结果与逐条计数一致
+        texts = ["", "这是一个测试。", "This is a test.", self.test_text]
+        for method in ("chars", "words", "tiktoken", "auto"):
+            self.assertEqual(
+                TokenCounter.count_many(texts, method=method),
+                [TokenCounter.estimate_tokens(text, method=method) for text in texts]
+            )
+    
+    def test_fast_estimate_matches_regex(self):
+        # 单遍/向量化估算与原 re.findall + re.sub 实现结果一致
+        def regex_estimate(text):
+            if not text:
+                return 0
+            chinese = len(re.findall(r'[\u4e00-\u9fff]', text))
+            other = len(re.sub(r'[\u4e00-\u9fff]', '', text))
+            return max(1, chinese + other // 4)
+        
+        rng = random.Random(1)
+        alphabet = ["a", " ", "深", "度", "\u4e00", "\u9fff", "\u3400", "\ua000", "é", "😀", "。", "\ud800"]
+        texts = [""] + ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 400))) for _ in range(200)]
+        
+        expected = [regex_estimate(text) for text in texts]
+        self.assertEqual([TokenCounter.estimate_tokens(text, method="fast") for text in texts], expected)
+        self.assertEqual(TokenCounter.count_many(texts, method="fast"), expected)
+        self.assertEqual(TokenCounter.count_many(["", "abc", ""], method="fast"), [0, 1, 0])
+    
+    def test_tiktoken_encoding_loaded_once(self):
+        # 编码器只加载一次，并通过 encode_batch 批量编码
+        encoding = mock.Mock()
+        encoding.encode_batch.side_effect = lambda texts, num_threads: [list(text) for text in texts]
+        token_counter.get_tiktoken_encoding.cache_clear()
+        try:
+            with mock.patch("tiktoken.get_encoding", return_value=encoding) as get_encoding:
+                counts = TokenCounter.count_many(["ab", "cde"] * 300, method="tiktoken")
+                TokenCounter.count_many(["f"], method="tiktoken")
+            self.assertEqual(counts, [2, 3] * 300)
+            get_encoding.assert_called_once_with("cl100k_base")
+            encoding.encode.assert_not_called()
+        finally:
+            token_counter.get_tiktoken_encoding.cache_clear()
+    
     def test_text_splitting(self):
         # 测试文本分块
         chunks = split_text_into_chunks(
@@ -93,5 +145,148 @@ class TestTextProcessing(unittest.TestCase):
         self.assertIsInstance(result, list)
         self.assertTrue(len(result) > 0)
 
+    def test_streaming_chunks(self):
+        # 规则分段的文本：流式分块与整体分块结果一致，且偏移量准确
+        pages = [
+            (page, " ".join(f"第{page}页的第{i}句话。Sentence {i}." for i in range(20)))
+            for page in range(1, 31)
+        ]
+        full_text = " ".join(text for _, text in pages)
+        page_starts = [full_text.index(f"第{page}页的第0句话") for page, _ in pages]
+        
+        streamed = list(iter_text_chunks(pages, chunk_size=300, chunk_overlap=50, token_count_method="chars"))
+        whole = split_text_into_chunks(full_text, chunk_size=300, chunk_overlap=50, token_count_method="chars")
+        
+        self.assertEqual([c["text"] for c in streamed], [c["text"] for c in whole])
+        self.assertEqual([c["chunk_index"] for c in streamed], list(range(len(streamed))))
+        for chunk in streamed:
+            start = chunk["start_char"]
+            self.assertEqual(full_text[start:start + chunk["char_length"]], chunk["text"])
+            self.assertEqual(chunk["page_number"], bisect_right(page_starts, start))
+            self.assertLessEqual(chunk["page_number"], chunk["page_end"])
+
+    def test_streaming_chunks_invariants(self):
+        # 流式分块与整体分块在窗口边界附近可能不同，但偏移量、编号、块大小和覆盖范围始终成立
+        rng = random.Random(3)
+        words = ["深度", "学习", "model", "data", "。", "！", "?", ". ", "\n", "\n\n", " ", "分析", "experiment"]
+        for _ in range(30):
+            pages = [
+                (page, "".join(rng.choice(words) for _ in range(rng.randint(50, 600))))
+                for page in range(1, rng.randint(2, 40))
+            ]
+            full_text = " ".join(text for _, text in pages)
+            chunk_size = rng.randint(100, 500)
+            chunk_overlap = rng.randint(0, chunk_size // 4)
+            streamed = list(iter_text_chunks(pages, chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                                             token_count_method="chars"))
+            
+            self.assertEqual([c["chunk_index"] for c in streamed], list(range(len(streamed))))
+            covered = [False] * len(full_text)
+            for chunk in streamed:
+                self.assertEqual(full_text[chunk["start_char"]:chunk["end_char"]], chunk["text"])
+                self.assertLessEqual(chunk["char_length"], chunk_size)
+                covered[chunk["start_char"]:chunk["end_char"]] = [True] * chunk["char_length"]
+            self.assertTrue(all(flag or char.isspace() for flag, char in zip(covered, full_text)))
+            starts = [c["start_char"] for c in streamed]
+            self.assertEqual(starts, sorted(starts))
+            
+            # 全文短于缓冲区时与整体分块完全相同
+            short_text = full_text[:chunk_size * 4 - 1]
+            self.assertEqual(
+                [(c["text"], c["start_char"]) for c in iter_text_chunks(
+                    [(1, short_text)], chunk_size=chunk_size, chunk_overlap=chunk_overlap, token_count_method="chars")],
+                [(c["text"], c["start_char"]) for c in split_text_into_chunks(
+                    short_text, chunk_size=chunk_size, chunk_overlap=chunk_overlap, token_count_method="chars")]
+            )
+
+    def test_offsets_with_repeated_text(self):
+        # 重复出现的段落也要得到各自的准确位置
+        text = "重复的段落内容。Repeated paragraph.\n\n" * 50
+        chunks = split_text_into_chunks(text, chunk_size=80, chunk_overlap=10, token_count_method="chars")
+        
+        starts = [chunk["start_char"] for chunk in chunks]
+        self.assertEqual(starts, sorted(set(starts)))
+        for chunk in chunks:
+            self.assertEqual(text[chunk["start_char"]:chunk["end_char"]], chunk["text"])
+        self.assertEqual(chunks[-1]["end_char"], len(text.rstrip()))
+    
+    def test_offset_splitter_matches_langchain(self):
+        # 分割结果必须与 RecursiveCharacterTextSplitter 完全一致
+        rng = random.Random(0)
+        alphabet = ["词", "word", " ", "  ", "\n", "\n\n", "。", ".", "！", "?", " \n "]
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300)))
+            chunk_size = rng.randint(1, 60)
+            chunk_overlap = rng.randint(0, chunk_size)
+            expected = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size, chunk_overlap=chunk_overlap,
+                length_function=len, separators=DEFAULT_SEPARATORS
+            ).split_text(text)
+            spans = OffsetTextSplitter(chunk_size, chunk_overlap).split_spans(text)
+            self.assertEqual([text[start:end] for start, end in spans], expected)
+
+    def test_token_budget_chunks(self):
+        # 按token预算分块：每个块的真实token数不超过预算，流式结果与整体结果一致
+        class WordEncoding:
+            # 每个汉字或英文单词计为一个token
+            pattern = re.compile(r'[\u4e00-\u9fff]|[A-Za-z0-9]+')
+            
+            def encode(self, text):
+                return self.pattern.findall(text)
+            
+            def encode_batch(self, texts, num_threads=8):
+                return [self.encode(text) for text in texts]
+        
+        text = "".join(
+            f"第{i}段使用中文描述实验结果。Paragraph {i} is written in English with many more characters. "
+            + ("\n\n" if i % 3 == 2 else "")
+            for i in range(60)
+        )
+        token_counter.get_tiktoken_encoding.cache_clear()
+        try:
+            with mock.patch("tiktoken.get_encoding", return_value=WordEncoding()):
+                chunks = split_text_into_chunks(text, chunk_size=40, chunk_overlap=8,
+                                                token_count_method="tiktoken", size_unit="tokens")
+                streamed = list(iter_text_chunks([(None, text)], chunk_size=40, chunk_overlap=8,
+                                                 token_count_method="tiktoken", size_unit="tokens"))
+        finally:
+            token_counter.get_tiktoken_encoding.cache_clear()
+        
+        self.assertGreater(len(chunks), 5)
+        for chunk in chunks:
+            self.assertLessEqual(chunk["estimated_tokens"], 40)
+            self.assertEqual(len(WordEncoding().encode(chunk["text"])), chunk["estimated_tokens"])
+            self.assertEqual(text[chunk["start_char"]:chunk["end_char"]], chunk["text"])
+        self.assertEqual([c["text"] for c in streamed], [c["text"] for c in chunks])
+
+    def test_token_budget_with_long_tokens(self):
+        # token平均长度超过 AVG_CHARS_PER_TOKEN 时缓冲区容纳的块变少，但分块结果不变
+        class LongTokenEncoding:
+            # 每12个非空白字符计为一个token
+            pattern = re.compile(r'\S{1,12}')
+            
+            def encode(self, text):
+                return self.pattern.findall(text)
+            
+            def encode_batch(self, texts, num_threads=8):
+                return [self.encode(text) for text in texts]
+        
+        text = " ".join(f"internationalization{i % 7}" for i in range(3000))
+        token_counter.get_tiktoken_encoding.cache_clear()
+        try:
+            with mock.patch("tiktoken.get_encoding", return_value=LongTokenEncoding()):
+                chunks = split_text_into_chunks(text, chunk_size=50, chunk_overlap=10,
+                                                token_count_method="tiktoken", size_unit="tokens")
+                streamed = list(iter_text_chunks([(None, text)], chunk_size=50, chunk_overlap=10,
+                                                 token_count_method="tiktoken", size_unit="tokens"))
+        finally:
+            token_counter.get_tiktoken_encoding.cache_clear()
+        
+        self.assertGreater(chunks[0]["char_length"], 50 * AVG_CHARS_PER_TOKEN)
+        self.assertEqual([c["text"] for c in streamed], [c["text"] for c in chunks])
+        for chunk in streamed:
+            self.assertLessEqual(chunk["estimated_tokens"], 50)
+            self.assertEqual(text[chunk["start_char"]:chunk["end_char"]], chunk["text"])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file